@@ -60,9 +60,24 @@ if settings.DEBUG:
             'Requested to delete %s. Received response: %s.', objects_repr, ws_response)
 
 
+@admin.register(models.PeriodicTask, site=site)
+class PeriodicTaskModelAdmin(admin.ModelAdmin):
+    list_display = ('name', 'registered_task', 'interval', 'cron', 'enabled', 'next_run_at', 'last_run_at',
+                    'last_status')
+    readonly_fields = ('last_run_at', 'last_completed_at', 'last_status')
+
+
+class DocTaskProgressInline(admin.TabularInline):
+    model = models.DocTaskProgress
+    fields = readonly_fields = ('created_at', 'status_data')
+    extra = 0
+    ordering = ('pk',)
+
+
 @admin.register(models.DocTask, site=site)
 class DocTaskModelAdmin(admin.ModelAdmin):
     list_display = ('registered_task', 'inputs', 'duration', *DocTaskSerializer.Meta.read_only_fields)
+    inlines = [DocTaskProgressInline]
 
     if settings.DEBUG:
         actions = [doctask_access_test, doctask_deletion_test]
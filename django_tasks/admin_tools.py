@@ -5,7 +5,9 @@ along with the tools for scheduling tasks as Django Admin actions.
 import asyncio
 import functools
 import logging
+import math
 import os
+import uuid
 
 from asgiref.sync import sync_to_async
 from typing import Any, Callable
@@ -14,7 +16,8 @@ from django.apps import apps
 from django.conf import settings
 from django.contrib import admin, messages
 from django.db.models import Model, QuerySet
-from django.http import HttpRequest
+from django.http import HttpRequest, JsonResponse
+from django.urls import path, reverse
 
 from django_tasks.task_cache import TaskCache
 from django_tasks.websocket.backend_client import BackendWebSocketClient
@@ -30,21 +33,52 @@ class ChannelTasksAdminSite(admin.AdminSite):
     site_header = 'Channel Tasks'
     index_title = 'Index'
 
+    #: Maximum number of tasks per page of the task events view.
+    max_task_events_page_size = 100
+
     def each_context(self, request: HttpRequest):
         """
         Overrides the Django method by adding to the returned context the web-socket URL of the backgroung task unit
-        and the cached task events of the user, if any; note this method may be called from the log-in page.
+        and the URL of the task events view, from which the pages load the cached task events of the user; note this
+        method may be called from the log-in page.
         """
         context = super().each_context(request)
         username = getattr(request.user, 'username')
 
         if username and request.user.is_authenticated:
-            context['cached_task_events'] = TaskCache(username).get_index()
+            context['task_events_url'] = reverse(f'{self.name}:task_events')
             context['websocket_uri'] = os.path.join('/', settings.CHANNEL_TASKS.proxy_route, 'tasks/clear-cache')
             context['websocket_port'] = os.getenv('CHANNEL_TASKS_ASGI_PORT', 8001)
 
         return context
 
+    def get_urls(self):
+        """Overrides the Django method by adding the task events view."""
+        return [path('task-events/', self.admin_view(self.task_events_view), name='task_events'), *super().get_urls()]
+
+    def task_events_view(self, request: HttpRequest) -> JsonResponse:
+        """
+        Responds with a page of the cached task events of the user, as `{"tasks": {...}, "next_cursor": ...}`,
+        taking the `cursor` of the page, a number, and its `limit` number of tasks, as query parameters; the first
+        page is the one of the most recently updated tasks. See :py:meth:`django_tasks.task_cache.TaskCache.get_page`.
+        """
+        try:
+            limit = int(request.GET.get('limit', settings.CHANNEL_TASKS.task_events_page_size))
+        except ValueError:
+            return JsonResponse({'detail': "The 'limit' parameter must be an integer."}, status=400)
+
+        cursor = request.GET.get('cursor', '')
+        try:
+            if cursor and not math.isfinite(float(cursor)):
+                raise ValueError(cursor)
+        except ValueError:
+            return JsonResponse({'detail': "The 'cursor' parameter must be a number."}, status=400)
+
+        page_size = min(max(1, limit), self.max_task_events_page_size)
+        task_events, next_cursor = TaskCache(getattr(request.user, 'username')).get_page(page_size, cursor)
+
+        return JsonResponse({'tasks': task_events, 'next_cursor': next_cursor})
+
 
 class ModelTask:
     """
@@ -94,13 +128,16 @@ class AdminTaskAction:
     schedule, through web-socket, background tasks that will run on the Django queryset selected by the admin user.
     """
 
-    def __init__(self, task_name: str, **kwargs):
+    def __init__(self, task_name: str, priority: int = 0, **kwargs):
         """Constructor.
 
         :param task_name: Dotted path of a registered task that must take a list of database IDs as single argument.
+        :param priority: Priority of the scheduled tasks; bulk actions may set a negative value, so that they do not
+          delay interactive tasks.
         :param kwargs: Keyword arguments that are passed directly to the `django.contrib.admin.action` decorator.
         """
         self.task_name = task_name
+        self.priority = priority
         self.kwargs = kwargs
         self.client = BackendWebSocketClient()
 
@@ -117,10 +154,12 @@ class AdminTaskAction:
         @functools.wraps(post_schedule_callable)
         def action_callable(modeladmin: admin.ModelAdmin, request: HttpRequest, queryset):
             objects_repr = str(queryset) if queryset.count() > 1 else str(queryset.first())
+            instance_ids = list(queryset.values_list('pk', flat=True))
             ws_response = self.client.perform_request('schedule', [dict(
                 registered_task=self.task_name,
-                inputs={'instance_ids': list(queryset.values_list('pk', flat=True))}
-            )], headers={'Cookie': request.headers['Cookie']})
+                inputs={'instance_ids': instance_ids},
+                priority=self.priority,
+            )], headers={'Cookie': request.headers['Cookie'], 'Request-ID': self.get_request_id(request, instance_ids)})
             description = self.kwargs.get('description', self.task_name)
             msg = f"Requested to '{description}' on {objects_repr}."
             modeladmin.message_user(request, msg, messages.INFO)
@@ -128,3 +167,16 @@ class AdminTaskAction:
             return post_schedule_callable(modeladmin, request, queryset, ws_response)
 
         return action_callable
+
+    def get_request_id(self, request: HttpRequest, instance_ids: list[Any]) -> str:
+        """
+        Returns the ID of the schedule request of an action run, derived from the CSRF token of the submitted
+        changelist form, the task and the selected instances; so that repeated submissions of the same form, as on
+        double-click, are idempotent. Returns a random ID if the form has no CSRF token.
+        """
+        csrf_token = request.POST.get('csrfmiddlewaretoken')
+
+        if not csrf_token:
+            return uuid.uuid4().hex
+
+        return uuid.uuid5(uuid.NAMESPACE_URL, f'{csrf_token}:{self.task_name}:{instance_ids}').hex
@@ -1,5 +1,6 @@
 import asyncio
 import pprint
+import threading
 
 import bs4
 import pytest
@@ -80,6 +81,10 @@ class BddTester(tester.BddTester):
         await asyncio.sleep(duration)
         return duration
 
+    async def fake_task_coro_thread_name(self, duration):
+        await asyncio.sleep(duration)
+        return threading.current_thread().name
+
     async def fake_task_coro_raise(self, duration):
         await asyncio.sleep(duration)
         raise Exception('Fake error')
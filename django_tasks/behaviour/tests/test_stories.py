@@ -1,11 +1,47 @@
 import asyncio
+import datetime
+import json
+import os
+import threading
 import time
+import uuid
 
+import pytest
+import redis
+
+from asgiref.sync import sync_to_async
+from channels.layers import InMemoryChannelLayer
+from django.contrib.auth.models import User
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.exceptions import ImproperlyConfigured
+from django.test.client import RequestFactory
 from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
 
+from django_tasks import admin, event_batcher, metrics, rate_limit
+from django_tasks.admin_tools import AdminTaskAction
+from django_tasks.consumers import TaskScheduleWebSocketConsumer
+from django_tasks.delayed_tasks import DelayedTaskHeap
+from django_tasks.durable_queue import DurableTaskQueue
+from django_tasks.local_cache import LocalTaskCache
+from django_tasks.event_batcher import TaskEventBatcher
+from django_tasks.lifespan import TaskRunnerLifespan
+from django_tasks.loop_watchdog import LoopWatchdog
+from django_tasks.periodic_scheduler import PeriodicScheduler
+from django_tasks.process_pool import TaskProcessPool
+from django_tasks.result_cache import TaskResultCache
+from django_tasks.retry_policy import RetryPolicy
+from django_tasks.scheduler import DocTaskScheduler
+from django_tasks.serializers import DocTaskSerializer
+from django_tasks.task_cache import RedisTaskEventIndex, TaskCache
+from django_tasks.task_graph import TaskGraph
+from django_tasks.task_queue import PendingTask, TaskQueue, TaskQueueClosed, TaskQueueFull
+from django_tasks.task_runner import TaskRunner, TaskTimeout, TaskWorker
 from django_tasks.typing import JSON
+from django_tasks.worker_process import TaskWorkerProcess, TaskWorkersFull
 
 from . import base
 
@@ -60,6 +96,77 @@ class TestTaskRunner(base.BddTester):
         And the different task statuses are correctly stored
         """
 
+    @base.BddTester.gherkin()
+    def test_cancellation_by_request_id(self):
+        """
+        When some `tasks` are scheduled with `request` ID $(cancel-test)
+        And the request is cancelled
+        Then $(2) cancelled $(0) error $(0) success messages are broadcasted
+        And the task futures are cancelled
+        """
+
+    @base.BddTester.gherkin()
+    def test_tasks_are_spread_over_the_worker_loops(self):
+        """
+        Given the runner has $(3) `workers` with $(least-loaded) placement
+        When some `tasks` report their worker thread
+        Then each task runs in a different worker thread
+        And the $(task-id-hash) placement keeps each task ID in one worker
+        """
+
+    @base.BddTester.gherkin()
+    def test_registered_tasks_run_in_the_process_pool(self):
+        """
+        Given a process `pool` of $(1) warm worker
+        When a `task` runs in the pool with `duration` $(0.05)
+        Then the task output is returned from a pool process
+        """
+
+    @base.BddTester.gherkin()
+    def test_tasks_exceeding_their_timeout_are_stopped(self):
+        """
+        When a `task` of $(10) seconds is scheduled with timeout $(0.1)
+        Then the task ends with timeout status within $(1) second
+        """
+
+    @base.BddTester.gherkin()
+    def test_doctask_progress_is_stored_apart_from_the_document(self):
+        """
+        Given a `doctask` of the progress test task
+        When $(2) progress statuses and the result status are stored
+        Then the progress statuses are stored in order
+        And the document holds the result status alone
+        """
+
+    @base.BddTester.gherkin()
+    def test_doctasks_rejected_by_the_task_runner_are_stored_with_error_status(self):
+        """
+        Given a closed task queue and a `doctask` of the progress test task
+        When the doc-task is scheduled and rejected
+        Then the doc-task is stored with error status and forgotten
+        """
+
+    @base.BddTester.gherkin()
+    def test_draining_awaits_and_cancels_all_the_scheduled_tasks(self):
+        """
+        Given a `short` and a `long` task are scheduled without ID
+        And a task event is buffered by the `batcher` of the running loop
+        When the runner is drained with a grace period of $(0.5) seconds
+        Then the short task finishes and the long one is cancelled
+        And the buffered task event is sent
+        And new schedule requests are rejected as the queue is closed
+        And the loop watchdog and the periodic scheduler are stopped
+        """
+
+    @base.BddTester.gherkin()
+    def test_retried_tasks_free_their_run_slot_during_the_backoff(self):
+        """
+        Given a task queue of $(1) run slot and a `retried` task failing once with backoff $(0.3)
+        When `another` task is scheduled during the backoff
+        Then the other task ends before the retried one
+        And task timeouts are not retried by default
+        """
+
     async def a_failed_a_cancelled_and_some_ok_tasks_are_scheduled(self):
         failed_task, cancelled_task, *ok_tasks = await asyncio.gather(
             self.runner.schedule(self.fake_task_coro_raise(0.1)),
@@ -77,6 +184,208 @@ class TestTaskRunner(base.BddTester):
         assert task_results == self.task_durations
         assert elapsed_time < 1
 
+    async def some_tasks_are_scheduled_with_request_id(self):
+        tasks = await asyncio.gather(*[
+            self.runner.schedule(self.fake_task_coro_ok(10), task_id=f'{self.param}.{n}') for n in range(2)])
+
+        return tasks, self.param
+
+    def the_request_is_cancelled(self):
+        request_id = self.get_output('request')
+        cancelled_ids = self.runner.cancel_tasks('', request_id=request_id)
+        assert sorted(cancelled_ids) == [f'{request_id}.0', f'{request_id}.1']
+
+    async def the_task_futures_are_cancelled(self):
+        await asyncio.gather(*self.get_output('tasks'), return_exceptions=True)
+        assert all(task.cancelled() for task in self.get_output('tasks'))
+
+    def the_runner_has_workers_with_placement(self, monkeypatch):
+        worker_count, placement = self.param
+        workers = [TaskWorker(f'TaskWorker-test-{n}') for n in range(int(worker_count))]
+        monkeypatch.setattr(self.runner, 'workers', workers)
+        monkeypatch.setattr(self.runner, 'worker_placement', placement)
+        self.runner.ensure_alive()
+
+        if self.runner.loop_watchdog:
+            for worker in workers:
+                monkeypatch.setitem(self.runner.loop_watchdog.heartbeats, worker.thread.name, time.monotonic())
+                asyncio.run_coroutine_threadsafe(self.runner.loop_watchdog.heartbeat(worker), worker.event_loop)
+
+        return workers,
+
+    async def some_tasks_report_their_worker_thread(self):
+        tasks = [await self.runner.schedule(self.fake_task_coro_thread_name(0.1)) for _ in self.get_output('workers')]
+
+        return tasks,
+
+    async def each_task_runs_in_a_different_worker_thread(self):
+        thread_names = await asyncio.gather(*self.get_output('tasks'))
+        assert sorted(thread_names) == [worker.thread.name for worker in self.get_output('workers')]
+
+    def the_placement_keeps_each_task_id_in_one_worker(self, monkeypatch):
+        monkeypatch.setattr(self.runner, 'worker_placement', self.param)
+        task_ids = [f'placement-test.{n}' for n in range(20)]
+        placed_workers = [self.runner.get_worker(task_id) for task_id in task_ids]
+
+        assert placed_workers == [self.runner.get_worker(task_id) for task_id in task_ids]
+        assert len(set(placed_workers)) == len(self.get_output('workers'))
+
+    def a_process_pool_of_warm_worker(self):
+        pool = TaskProcessPool(int(self.param))
+        pool.warm_up()
+
+        return pool,
+
+    async def a_task_runs_in_the_pool_with_duration(self):
+        task = asyncio.ensure_future(
+            self.get_output('pool').run('django_tasks.tasks.sleep_test', {'duration': float(self.param)}))
+
+        return task, float(self.param)
+
+    async def the_task_output_is_returned_from_a_pool_process(self):
+        pool = self.get_output('pool')
+        try:
+            assert await self.get_output('task') == f"Slept for {self.get_output('duration')} seconds"
+            assert os.getpid() not in {process.pid for process in pool.executor._processes.values()}
+        finally:
+            pool.executor.shutdown()
+
+    async def a_task_of_seconds_is_scheduled_with_timeout(self):
+        duration, timeout = map(float, self.param)
+        task = await self.runner.schedule(self.fake_task_coro_ok(duration), timeout=timeout)
+
+        return task,
+
+    async def the_task_ends_with_timeout_status_within_second(self):
+        await asyncio.wait([self.get_output('task')], timeout=float(self.param))
+        task_info = self.runner.get_task_status(self.get_output('task'))
+
+        assert task_info['status'] == 'Timeout'
+        assert task_info['elapsed'] < float(self.param)
+
+    def a_doctask_of_the_progress_test_task(self, monkeypatch, transactional_db):
+        registered_task, _ = self.models.RegisteredTask.objects.get_or_create(
+            dotted_path='django_tasks.tasks.progress_test')
+        doctask = self.models.DocTask.objects.create(registered_task=registered_task, inputs={'steps': 2})
+        monkeypatch.setitem(DocTaskScheduler.doctask_index, 'progress-test.0', doctask.pk)
+
+        return doctask,
+
+    async def progress_statuses_and_the_result_status_are_stored(self):
+        for step in range(1, int(self.param) + 1):
+            await DocTaskScheduler.store_doctask_status('progress-test.0', dict(
+                status='Progress', progress=step, output=f'Step {step} of {self.param}'))
+
+        await DocTaskScheduler.store_doctask_result('progress-test.0', dict(status='Success', output=None))
+
+    def the_progress_statuses_are_stored_in_order(self):
+        progress = self.models.DocTaskProgress.objects.filter(doctask=self.get_output('doctask')).order_by('pk')
+        assert [item.status_data['progress'] for item in progress] == [1, 2]
+
+    def the_document_holds_the_result_status_alone(self):
+        doctask = self.models.DocTask.objects.get(pk=self.get_output('doctask').pk)
+        assert doctask.status == 'Success'
+        assert doctask.document == [dict(status='Success', output=None)]
+
+    def a_closed_task_queue_and_a_doctask_of_the_progress_test_task(self, monkeypatch, transactional_db):
+        task_queue = TaskQueue(0, 10, lambda registered_task: 0)
+        task_queue.close()
+        monkeypatch.setattr(self.runner, 'task_queue', task_queue)
+        registered_task, _ = self.models.RegisteredTask.objects.get_or_create(
+            dotted_path='django_tasks.tasks.progress_test')
+
+        return self.models.DocTask.objects.create(registered_task=registered_task, inputs={'steps': 2}),
+
+    async def the_doctask_is_scheduled_and_rejected(self):
+        with pytest.raises(TaskQueueClosed):
+            await DocTaskScheduler.schedule_doctask('rejection-test.0', 'rejection-test', {
+                'id': self.get_output('doctask').pk, 'registered_task': 'django_tasks.tasks.progress_test',
+                'inputs': {'steps': 2}})
+
+    def the_doctask_is_stored_with_error_status_and_forgotten(self):
+        doctask = self.models.DocTask.objects.get(pk=self.get_output('doctask').pk)
+
+        assert 'rejection-test.0' not in DocTaskScheduler.doctask_index
+        assert doctask.status == 'Error' and doctask.completed_at
+        assert doctask.document[0]['http_status'] == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    async def a_short_and_a_long_task_are_scheduled_without_id(self, monkeypatch):
+        monkeypatch.setattr(self.runner, 'task_queue', TaskQueue(0, 10, lambda registered_task: 0))
+        monkeypatch.setattr(self.runner, 'loop_watchdog', LoopWatchdog(self.runner, 0.5, 0.5))
+        monkeypatch.setattr(self.runner, 'periodic_scheduler', PeriodicScheduler(self.runner, 1))
+        monkeypatch.setattr(self.runner, 'process_pool', None)
+
+        return (await self.runner.schedule(self.fake_task_coro_ok(0.1)),
+                await self.runner.schedule(self.fake_task_coro_ok(10)))
+
+    async def a_task_event_is_buffered_by_the_batcher_of_the_running_loop(self, monkeypatch):
+        loop, channel_layer = asyncio.get_running_loop(), SlowChannelLayer(0)
+        monkeypatch.setattr(event_batcher, 'get_channel_layer', lambda: channel_layer)
+        batcher = TaskEventBatcher(loop, 60, 100)
+        monkeypatch.setitem(TaskEventBatcher.instances, loop, batcher)
+        batcher.add('drain-test', {'type': 'task.started', 'content': {
+            'task_id': 'drain-test.0', 'detail': TaskRunner.get_started_status()}})
+
+        return batcher,
+
+    def the_buffered_task_event_is_sent(self):
+        batcher = self.get_output('batcher')
+
+        assert batcher.size == 0 and batcher.flush_handle is None
+        assert [[event['content']['task_id'] for event in message['content']]
+                for message in event_batcher.get_channel_layer().messages] == [['drain-test.0']]
+
+    async def the_runner_is_drained_with_a_grace_period_of_seconds(self):
+        await self.runner.drain(float(self.param))
+
+    def the_short_task_finishes_and_the_long_one_is_cancelled(self):
+        assert self.get_output('short').result() == 0.1
+        assert self.get_output('long').cancelled()
+        assert not self.runner.scheduled_futures
+
+    async def new_schedule_requests_are_rejected_as_the_queue_is_closed(self):
+        with pytest.raises(TaskQueueClosed):
+            await self.runner.schedule(self.fake_task_coro_ok(0.1), delay=1)
+
+    def the_loop_watchdog_and_the_periodic_scheduler_are_stopped(self):
+        assert self.runner.loop_watchdog and self.runner.loop_watchdog.stopping.is_set()
+        assert self.runner.periodic_scheduler and self.runner.periodic_scheduler.stopping.is_set()
+
+    async def a_task_queue_of_run_slot_and_a_retried_task_failing_once_with_backoff(self, monkeypatch):
+        run_slots, backoff = self.param
+        monkeypatch.setattr(self.runner, 'task_queue', TaskQueue(int(run_slots), 10, lambda registered_task: 0))
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'registered-tasks', {
+            'retry-test': {'retry': {'max-attempts': 2, 'backoff': float(backoff), 'jitter': False}}})
+        attempts = []
+
+        async def flaky_task():
+            attempts.append(time.monotonic())
+
+            if len(attempts) == 1:
+                raise ConnectionError('Flaky task error')
+
+            return len(attempts)
+
+        return await self.runner.schedule(flaky_task(), registered_task='retry-test', coroutine_factory=flaky_task),
+
+    async def another_task_is_scheduled_during_the_backoff(self):
+        await asyncio.sleep(0.1)
+
+        return await self.runner.schedule(self.fake_task_coro_ok(0.05)),
+
+    async def the_other_task_ends_before_the_retried_one(self):
+        done, pending = await asyncio.wait([self.get_output('retried'), self.get_output('another')],
+                                           return_when=asyncio.FIRST_COMPLETED)
+
+        assert done == {self.get_output('another')}
+        assert await self.get_output('retried') == 2
+
+    def task_timeouts_are_not_retried_by_default(self):
+        retry_policy = RetryPolicy.from_settings('retry-test')
+
+        assert retry_policy and retry_policy.should_retry(ConnectionError(), 1)
+        assert not retry_policy.should_retry(TaskTimeout(1, 1), 1)
+
     async def the_different_task_statuses_are_correctly_stored(self):
         failed_task_info = self.runner.get_task_status(self.get_output('failed'))
         assert failed_task_info['status'] == 'Error'
@@ -87,6 +396,158 @@ class TestTaskRunner(base.BddTester):
         assert cancelled_task_info['status'] == 'Cancelled'
 
 
+class TestTaskQueue(base.BddTester):
+    """
+    Tasks beyond the concurrency limits wait in a bounded priority queue for a run slot.
+    This covers:
+    * The task queue
+    """
+
+    @base.BddTester.gherkin()
+    def test_pending_tickets_are_bounded_on_push(self):
+        """
+        Given a `queue` with a per-task limit of $(1) and room for $(2) pending tickets
+        When $(3) `tickets` of the same task are pushed
+        Then $(1) tickets are admitted and $(2) are pending
+        And another push raises queue full
+        And the capacity check rejects more tasks
+        And releasing the admitted ticket admits the first pending one
+        """
+
+    @base.BddTester.gherkin()
+    def test_pending_tickets_are_admitted_by_priority(self):
+        """
+        Given a `queue` with a per-task limit of $(1) and room for $(2) pending tickets
+        When a `low` priority $(0) and a `high` priority $(5) ticket wait behind a running one
+        Then the high priority ticket is admitted first
+        And a requested priority above the maximum is rejected
+        And a priority aging interval of $(0) seconds is rejected
+        """
+
+    def a_queue_with_a_pertask_limit_of_and_room_for_pending_tickets(self):
+        task_limit, max_pending = map(int, self.param)
+
+        return TaskQueue(0, max_pending, lambda registered_task: task_limit),
+
+    async def tickets_of_the_same_task_are_pushed(self):
+        loop = asyncio.get_running_loop()
+        tickets = [PendingTask('tasks.test', loop) for _ in range(int(self.param))]
+
+        for ticket in tickets:
+            self.get_output('queue').push(ticket)
+
+        return tickets,
+
+    def tickets_are_admitted_and_are_pending(self):
+        admitted_count, pending_count = map(int, self.param)
+        queue = self.get_output('queue')
+
+        assert sum(ticket.admitted.is_set() for ticket in self.get_output('tickets')) == admitted_count
+        assert queue.running_count == admitted_count
+        assert queue.pending_count == pending_count
+
+    async def another_push_raises_queue_full(self):
+        with pytest.raises(TaskQueueFull):
+            self.get_output('queue').push(PendingTask('tasks.test', asyncio.get_running_loop()))
+
+        assert self.get_output('queue').pending_count == 2
+
+    def the_capacity_check_rejects_more_tasks(self):
+        with pytest.raises(TaskQueueFull):
+            self.get_output('queue').check_capacity(1)
+
+    async def releasing_the_admitted_ticket_admits_the_first_pending_one(self):
+        admitted_ticket, first_pending, last_pending = self.get_output('tickets')
+        self.get_output('queue').release(admitted_ticket)
+        await asyncio.sleep(0)
+
+        assert first_pending.admitted.is_set()
+        assert not last_pending.admitted.is_set()
+        assert self.get_output('queue').pending_count == 1
+
+    async def a_low_priority_and_a_high_priority_ticket_wait_behind_a_running_one(self):
+        loop = asyncio.get_running_loop()
+        queue = self.get_output('queue')
+        running_ticket = PendingTask('tasks.test', loop)
+        low_ticket, high_ticket = (PendingTask('tasks.test', loop, priority=int(p)) for p in self.param)
+
+        for ticket in (running_ticket, low_ticket, high_ticket):
+            queue.push(ticket)
+
+        queue.release(running_ticket)
+        await asyncio.sleep(0)
+
+        return low_ticket, high_ticket
+
+    def the_high_priority_ticket_is_admitted_first(self):
+        assert self.get_output('high').admitted.is_set()
+        assert not self.get_output('low').admitted.is_set()
+
+    def a_requested_priority_above_the_maximum_is_rejected(self):
+        serializer = DocTaskSerializer(data=dict(
+            registered_task='django_tasks.tasks.sleep_test', inputs={'duration': 0.1},
+            priority=self.settings.CHANNEL_TASKS.max_task_priority + 1))
+
+        assert not serializer.is_valid()
+        assert 'priority' in serializer.errors
+
+    def a_priority_aging_interval_of_seconds_is_rejected(self, monkeypatch):
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'priority-aging-interval', float(self.param))
+
+        with pytest.raises(ImproperlyConfigured):
+            self.settings.CHANNEL_TASKS.priority_aging_interval
+
+
+class SlowChannelLayer:
+    """Channel layer double recording the messages sent, where the first send takes longer than the rest."""
+
+    def __init__(self, first_send_delay):
+        self.delays = [first_send_delay]
+        self.messages = []
+
+    async def group_send(self, group, message):
+        await asyncio.sleep(self.delays.pop() if self.delays else 0)
+        self.messages.append(message)
+
+
+class TestTaskEventBatcher(base.BddTester):
+    """
+    The task events of a worker loop may be coalesced into batches per user.
+    This covers:
+    * The task event batcher
+    """
+
+    @base.BddTester.gherkin()
+    def test_overlapping_flushes_deliver_the_batches_of_a_user_in_order(self):
+        """
+        Given an event `batcher` sending through a slow `channel_layer`
+        When $(2) batches of a user are flushed while the first one is sent
+        Then the batches are delivered in order
+        """
+
+    async def an_event_batcher_sending_through_a_slow_channel_layer(self, monkeypatch):
+        channel_layer = SlowChannelLayer(0.1)
+        monkeypatch.setattr(event_batcher, 'get_channel_layer', lambda: channel_layer)
+
+        return TaskEventBatcher(asyncio.get_running_loop(), 10, 100), channel_layer
+
+    async def batches_of_a_user_are_flushed_while_the_first_one_is_sent(self):
+        batcher = self.get_output('batcher')
+
+        for n in range(int(self.param)):
+            batcher.add('batcher-test', {'type': 'task.started', 'content': {
+                'task_id': f'batcher-test.{n}', 'detail': TaskRunner.get_started_status()}})
+            batcher.schedule_flush()
+            await asyncio.sleep(0.01)
+
+        await batcher.drain()
+
+    def the_batches_are_delivered_in_order(self):
+        assert [[event['content']['task_id'] for event in message['content']]
+                for message in self.get_output('channel_layer').messages] == [['batcher-test.0'], ['batcher-test.1']]
+        assert not self.get_output('batcher').last_sends
+
+
 class TaskAdminUserCreation(base.BddTester):
     """
     As a site administrator,
@@ -121,6 +582,955 @@ class TaskAdminUserCreation(base.BddTester):
         assert logged_in
 
 
+class TestTaskMetrics(base.BddTester):
+    """
+    The runtime metrics of the task runner are rendered in the Prometheus text exposition format.
+    This covers:
+    * The metric classes and their registry
+    """
+
+    @base.BddTester.gherkin()
+    def test_metrics_are_rendered_in_the_exposition_format(self):
+        """
+        Given a metrics `registry` with a labelled counter and a histogram
+        When the metrics are observed and rendered as `text`
+        Then the counter samples carry their escaped labels
+        And the histogram bucket counts are cumulative
+        And metric classes not rendering their samples are abstract
+        """
+
+    def a_metrics_registry_with_a_labelled_counter_and_a_histogram(self):
+        registry = metrics.MetricsRegistry()
+        registry.register(metrics.Counter('test_total', 'Test counter.', ('name',)))
+        registry.register(metrics.Histogram('test_seconds', 'Test histogram.', buckets=(0.1, 1)))
+
+        return registry,
+
+    def the_metrics_are_observed_and_rendered_as_text(self):
+        counter, histogram = self.get_output('registry').metrics
+        counter.inc('a "quoted" name', amount=2)
+
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value)
+
+        return self.get_output('registry').render(),
+
+    def the_counter_samples_carry_their_escaped_labels(self):
+        lines = self.get_output('text').splitlines()
+        assert lines[:3] == ['# HELP test_total Test counter.', '# TYPE test_total counter',
+                             r'test_total{name="a \"quoted\" name"} 2.0']
+
+    def the_histogram_bucket_counts_are_cumulative(self):
+        lines = self.get_output('text').splitlines()
+        assert lines[5:] == ['test_seconds_bucket{le="0.1"} 1', 'test_seconds_bucket{le="1"} 2',
+                             'test_seconds_bucket{le="+Inf"} 3', 'test_seconds_sum 5.55', 'test_seconds_count 3']
+
+    def metric_classes_not_rendering_their_samples_are_abstract(self):
+        class UnrenderedMetric(metrics.Metric):
+            type_name = 'untyped'
+
+        with pytest.raises(TypeError):
+            UnrenderedMetric('test_untyped', 'Test metric.')  # type: ignore[abstract]
+
+
+class TestLoopWatchdog(base.BddTester):
+    """
+    The lag of the worker event loops is monitored, and the task callbacks blocking them are reported.
+    This covers:
+    * The loop watchdog
+    """
+
+    @base.BddTester.gherkin()
+    def test_blocking_task_calls_are_reported_once(self):
+        """
+        Given a loop `watchdog` of a `worker` with blocking threshold $(0.1)
+        When a task blocks the worker loop for $(0.5) seconds
+        Then the blocking task is reported once with its stack
+        """
+
+    def a_loop_watchdog_of_a_worker_with_blocking_threshold(self):
+        worker = TaskWorker('TaskWorker-watchdog-test')
+        worker.ensure_alive()
+        watchdog = LoopWatchdog(self.runner, 0.05, float(self.param))
+        watchdog.heartbeats[worker.thread.name] = time.monotonic()
+        asyncio.run_coroutine_threadsafe(watchdog.heartbeat(worker), worker.event_loop)
+
+        return watchdog, worker
+
+    async def a_task_blocks_the_worker_loop_for_seconds(self):
+        async def block_worker_loop(duration):
+            task = asyncio.current_task()
+            assert task
+            self.runner.running_tasks[task] = ('watchdog-test.0', 'django_tasks.tasks.sleep_test')
+            try:
+                time.sleep(duration)
+            finally:
+                del self.runner.running_tasks[task]
+
+        worker = self.get_output('worker')
+        future = asyncio.run_coroutine_threadsafe(block_worker_loop(float(self.param)), worker.event_loop)
+        await asyncio.sleep(float(self.param) / 2)
+
+        for _ in range(2):
+            self.get_output('watchdog').check_heartbeat(worker)
+
+        await asyncio.wrap_future(future)
+        worker.event_loop.call_soon_threadsafe(worker.event_loop.stop)
+
+    def the_blocking_task_is_reported_once_with_its_stack(self, caplog):
+        warnings = [record.getMessage() for record in caplog.records if record.levelname == 'WARNING']
+
+        assert len(warnings) == 1
+        assert 'blocked' in warnings[0] and 'watchdog-test.0' in warnings[0]
+        assert 'block_worker_loop' in warnings[0]
+
+
+class TestDurableTaskQueue(base.BddTester):
+    """
+    In durable queue mode, doc-tasks are queued in database and claimed by the task workers.
+    This covers:
+    * The durable queue worker
+    * The durable queue of the ASGI lifespan
+    """
+
+    @base.BddTester.gherkin()
+    def test_claims_are_bounded_by_the_free_run_slots(self):
+        """
+        Given $(4) queued `doctasks` and a durable `queue` worker with batch size $(3)
+        When the worker claims with $(2) free run slots
+        Then $(2) doc-tasks are claimed
+        """
+
+    @base.BddTester.gherkin()
+    def test_claims_of_running_doctasks_are_released_on_shutdown(self):
+        """
+        Given $(1) queued `doctasks` and a durable `queue` worker with batch size $(3)
+        When the claimed doc-task outlasts the shutdown grace period of $(0.2) seconds
+        Then the doc-task is released back to the queue
+        """
+
+    @base.BddTester.gherkin()
+    def test_the_asgi_lifespan_releases_the_claims_of_its_durable_queue_on_shutdown(self):
+        """
+        Given an ASGI `lifespan` with a durable queue and a shutdown grace period of $(0.2) seconds
+        When the server starts up and shuts down
+        Then the durable queue claims are released within the grace period
+        """
+
+    def queued_doctasks_and_a_durable_queue_worker_with_batch_size(self, monkeypatch, transactional_db):
+        doctask_count, batch_size = map(int, self.param)
+        registered_task, _ = self.models.RegisteredTask.objects.get_or_create(
+            dotted_path='django_tasks.tasks.sleep_test')
+        doctasks = [self.models.DocTask.objects.create(
+            registered_task=registered_task, inputs={'duration': 10}, status='Queued',
+            task_id=f'durable-test.{n}', user_name='durable-test') for n in range(doctask_count)]
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'durable-claim-batch-size', batch_size)
+
+        return doctasks, DurableTaskQueue('durable-test-worker')
+
+    def the_worker_claims_with_free_run_slots(self, monkeypatch):
+        monkeypatch.setattr(self.runner, 'task_queue', TaskQueue(int(self.param), 10, lambda registered_task: 0))
+        self.get_output('queue').claim_batch(self.get_output('queue').get_claim_size())
+
+    def doctasks_are_claimed(self):
+        assert len(self.get_output('queue').claimed_ids) == int(self.param)
+        assert self.models.DocTask.objects.filter(claimed_by='durable-test-worker').count() == int(self.param)
+
+    async def the_claimed_doctask_outlasts_the_shutdown_grace_period_of_seconds(self):
+        queue = self.get_output('queue')
+        doctasks = await sync_to_async(queue.claim_batch)(queue.get_claim_size())
+
+        for doctask in doctasks:
+            await queue.run_doctask(doctask)
+
+        task = queue.doctask_futures[doctasks[0].pk]
+        await queue.release_claims(float(self.param))
+        await asyncio.wait([task], timeout=1)
+        await asyncio.sleep(0.1)
+
+        if self.runner.pending_callbacks:
+            await asyncio.wait(set(self.runner.pending_callbacks), timeout=1)
+
+        assert task.cancelled()
+
+    def the_doctask_is_released_back_to_the_queue(self):
+        doctask = self.models.DocTask.objects.get(pk=self.get_output('doctasks')[0].pk)
+
+        assert (doctask.status, doctask.claimed_at, doctask.claimed_by, doctask.completed_at) == (
+            'Queued', None, '', None)
+        assert not self.get_output('queue').claimed_ids
+
+    def an_asgi_lifespan_with_a_durable_queue_and_a_shutdown_grace_period_of_seconds(
+            self, monkeypatch, transactional_db):
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'shutdown-grace-period', float(self.param))
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'durable-task-queue', True)
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'task-worker-channel', '')
+        monkeypatch.setattr(TaskRunner, 'instances', [])
+        self.released_claims: list[float] = []
+
+        async def release_claims(durable_queue, grace_period):
+            self.released_claims.append(grace_period)
+
+        monkeypatch.setattr(DurableTaskQueue, 'release_claims', release_claims)
+
+        return TaskRunnerLifespan(),
+
+    async def the_server_starts_up_and_shuts_down(self):
+        messages: asyncio.Queue[dict] = asyncio.Queue()
+        sent: list[dict] = []
+
+        async def send(message):
+            sent.append(message)
+
+        for message_type in ('lifespan.startup', 'lifespan.shutdown'):
+            messages.put_nowait({'type': message_type})
+
+        await self.get_output('lifespan')({'type': 'lifespan'}, messages.get, send)
+
+        assert [message['type'] for message in sent] == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+
+    def the_durable_queue_claims_are_released_within_the_grace_period(self):
+        assert self.released_claims == [self.settings.CHANNEL_TASKS.shutdown_grace_period]
+
+
+class TestTaskWorkers(base.BddTester):
+    """
+    Schedule requests may be sent to standalone task worker processes, through the channel layer.
+    This covers:
+    * The task worker channel backpressure
+    * The task worker process
+    """
+    worker_test_tasks: list[JSON] = [{'registered_task': 'django_tasks.tasks.sleep_test', 'inputs': {'duration': 0.1}}]
+
+    @base.BddTester.gherkin()
+    def test_schedule_requests_beyond_the_task_worker_channel_capacity_are_rejected(self):
+        """
+        Given a schedule `consumer` sending to a task worker channel of capacity $(1)
+        When $(1) schedule request is sent to the task workers
+        Then the next one is rejected with HTTP $(503)
+        """
+
+    @base.BddTester.gherkin()
+    def test_schedule_requests_rejected_by_a_task_worker_are_broadcasted(self):
+        """
+        Given a task worker `process` and a `channel` in the group of the user
+        When a schedule request is rejected by the closed task queue of the worker
+        Then a rejected message with HTTP $(503) is broadcasted to the user
+        """
+
+    def a_schedule_consumer_sending_to_a_task_worker_channel_of_capacity(self, monkeypatch):
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'task-worker-channel', 'worker-test')
+        consumer = TaskScheduleWebSocketConsumer()
+        consumer.scope = {'user': User(username='worker-test'), 'headers': []}
+        consumer.channel_layer = InMemoryChannelLayer(capacity=int(self.param))
+
+        return consumer,
+
+    async def schedule_request_is_sent_to_the_task_workers(self):
+        for _ in range(int(self.param)):
+            await self.get_output('consumer').send_to_task_workers('task.schedule', self.worker_test_tasks)
+
+    async def the_next_one_is_rejected_with_http(self):
+        with pytest.raises(TaskWorkersFull) as error_info:
+            await self.get_output('consumer').send_to_task_workers('task.schedule', self.worker_test_tasks)
+
+        assert error_info.value.status_code == int(self.param)
+
+    async def a_task_worker_process_and_a_channel_in_the_group_of_the_user(self):
+        process = TaskWorkerProcess('worker-test')
+        channel = await process.channel_layer.new_channel()
+        await process.channel_layer.group_add(f"worker-test_{self.settings.CHANNEL_TASKS.channel_group}", channel)
+
+        return process, channel
+
+    async def a_schedule_request_is_rejected_by_the_closed_task_queue_of_the_worker(self, monkeypatch):
+        task_queue = TaskQueue(0, 10, lambda registered_task: 0)
+        task_queue.close()
+        monkeypatch.setattr(self.runner, 'task_queue', task_queue)
+
+        await self.get_output('process').schedule({
+            'type': 'task.schedule', 'request_id': 'worker-test', 'user_name': 'worker-test',
+            'tasks': self.worker_test_tasks,
+        })
+
+    async def a_rejected_message_with_http_is_broadcasted_to_the_user(self):
+        message = await asyncio.wait_for(
+            self.get_output('process').channel_layer.receive(self.get_output('channel')), timeout=1)
+
+        assert message['type'] == 'task.rejected'
+        assert message['content']['http_status'] == int(self.param)
+        assert message['content']['request_id'] == 'worker-test'
+
+
+class TestTaskResultCache(base.BddTester):
+    """
+    The outputs of deterministic registered tasks may be cached by their inputs, so that repeated runs are
+    short-circuited.
+    This covers:
+    * The task result cache
+    """
+    run_count = 0
+
+    @base.BddTester.gherkin()
+    def test_repeated_runs_are_served_from_the_result_cache(self):
+        """
+        Given a `registered_task` with a result cache of size $(2)
+        When the `outputs` of $(2) runs with the same inputs are awaited
+        Then it runs once and the second output is served from the cache
+        And the oldest cache entries are evicted beyond the cache size
+        """
+
+    @base.BddTester.gherkin()
+    def test_tasks_may_depend_on_a_task_served_from_the_result_cache(self):
+        """
+        Given a `registered_task` with a result cache of size $(2)
+        When a task with a cached `output` and a `dependent` task taking it are scheduled
+        Then the dependent task runs with the cached output
+        """
+
+    def a_registered_task_with_a_result_cache_of_size(self, monkeypatch):
+        registered_task = f'cache-test-{uuid.uuid4().hex}'
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'registered-tasks', {
+            registered_task: {'result-cache-ttl': 60, 'result-cache-size': int(self.param)}})
+
+        return registered_task,
+
+    async def counted_task(self, value: int) -> int:
+        self.run_count += 1
+        return value
+
+    async def the_outputs_of_runs_with_the_same_inputs_are_awaited(self):
+        outputs = [await (await self.runner.schedule(
+            self.counted_task(1), registered_task=self.get_output('registered_task'), inputs={'value': 1}))
+            for _ in range(int(self.param))]
+
+        return outputs,
+
+    def it_runs_once_and_the_second_output_is_served_from_the_cache(self):
+        assert self.get_output('outputs') == [1, 1]
+        assert self.run_count == 1
+
+    async def a_task_with_a_cached_output_and_a_dependent_task_taking_it_are_scheduled(self):
+        registered_task = self.get_output('registered_task')
+        output = await (await self.runner.schedule(
+            self.counted_task(5), registered_task=registered_task, inputs={'value': 5}))
+        task_graph = TaskGraph([[], []], [{}, {'value': 0}])
+        cached_task, dependent_task = await asyncio.gather(
+            self.runner.schedule(self.counted_task(5), registered_task=registered_task, inputs={'value': 5},
+                                 task_graph=task_graph, graph_index=0),
+            self.runner.schedule(self.counted_task(0), coroutine_factory=self.counted_task,
+                                 task_graph=task_graph, graph_index=1))
+        await cached_task
+
+        return output, dependent_task
+
+    async def the_dependent_task_runs_with_the_cached_output(self):
+        assert await self.get_output('dependent') == self.get_output('output')
+        assert self.run_count == 2
+
+    def the_oldest_cache_entries_are_evicted_beyond_the_cache_size(self):
+        result_caches = [TaskResultCache.from_settings(self.get_output('registered_task'), {'value': value})
+                         for value in range(1, 4)]
+
+        for value, result_cache in enumerate(result_caches[1:], 2):
+            assert result_cache
+            result_cache.set(value)
+
+        assert [result_cache and result_cache.get() for result_cache in result_caches] == [
+            None, {'output': 2}, {'output': 3}]
+
+
+class TestIdempotentScheduleRequests(base.BddTester):
+    """
+    Schedule requests are idempotent by their request ID, within the "request-id-ttl" window.
+    This covers:
+    * The request IDs of websocket messages
+    * The repetition of requests being processed
+    * The request IDs of admin actions
+    """
+
+    @base.BddTester.gherkin()
+    def test_repeated_websocket_messages_are_answered_by_their_own_request_id(self):
+        """
+        Given a schedule `consumer` of a connection with a Request-ID header and a `channel` of its user
+        When a message with its own `request_id` repeats one being processed
+        Then it is answered with HTTP $(409)
+        And it is answered as duplicate once the tasks of the first one are recorded
+        And a message with no request ID of its own is not checked by the Request-ID header
+        """
+
+    @base.BddTester.gherkin()
+    def test_websocket_messages_failing_to_be_dispatched_may_be_repeated(self):
+        """
+        Given a schedule `consumer` of a connection with a Request-ID header and a `channel` of its user
+        When a message with its own `request_id` fails to be dispatched
+        Then its request record is discarded
+        """
+
+    @base.BddTester.gherkin()
+    def test_repeated_admin_action_submissions_have_the_same_request_id(self):
+        """
+        Given an admin `action` submitted twice with the same form
+        Then both submissions have the same request ID
+        """
+
+    async def a_schedule_consumer_of_a_connection_with_a_requestid_header_and_a_channel_of_its_user(self):
+        consumer = TaskScheduleWebSocketConsumer()
+        consumer.scope = {'user': User(username='idempotency-test'), 'headers': [(b'request-id', b'connection-id')]}
+        consumer.channel_name = 'idempotency-test'
+        consumer.channel_layer = InMemoryChannelLayer()
+        channel = await consumer.channel_layer.new_channel()
+        await consumer.channel_layer.group_add(consumer.user_group, channel)
+
+        return consumer, channel
+
+    async def a_message_with_its_own_request_id_repeats_one_being_processed(self):
+        request_id = uuid.uuid4().hex
+        await sync_to_async(TaskCache('idempotency-test').add_request)(request_id, 60)
+
+        return request_id,
+
+    async def it_is_answered_with_http(self):
+        consumer = self.get_output('consumer')
+        response_status = await consumer.receive_json({'request_id': self.get_output('request_id'), 'tasks': [
+            {'registered_task': 'django_tasks.tasks.sleep_test', 'inputs': {'duration': 0.1}}]})
+        message = await consumer.channel_layer.receive(self.get_output('channel'))
+
+        assert response_status == int(self.param)
+        assert message['type'] == 'task.rejected'
+        assert message['content']['request_id'] == self.get_output('request_id')
+
+    async def it_is_answered_as_duplicate_once_the_tasks_of_the_first_one_are_recorded(self):
+        consumer, request_id = self.get_output('consumer'), self.get_output('request_id')
+        await sync_to_async(TaskCache('idempotency-test').set_request_tasks)(request_id, [f'{request_id}.0'], 60)
+        response_status = await consumer.receive_json({'request_id': request_id, 'tasks': [
+            {'registered_task': 'django_tasks.tasks.sleep_test', 'inputs': {'duration': 0.1}}]})
+        message = await consumer.channel_layer.receive(self.get_output('channel'))
+
+        assert response_status == status.HTTP_200_OK
+        assert message['type'] == 'task.duplicate'
+        assert [task['task_id'] for task in message['content']['details']] == [f'{request_id}.0']
+
+    async def a_message_with_no_request_id_of_its_own_is_not_checked_by_the_requestid_header(
+            self, monkeypatch, transactional_db):
+        await self.models.RegisteredTask.objects.aget_or_create(dotted_path='django_tasks.tasks.sleep_test')
+        await sync_to_async(TaskCache('idempotency-test').add_request)('connection-id', 60)
+        scheduled: list[tuple] = []
+
+        async def schedule_tasks(request_id, username, *data):
+            scheduled.append((request_id, username, data))
+
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'task-worker-channel', '')
+        monkeypatch.setattr('django_tasks.consumers.schedule_tasks', schedule_tasks)
+        await self.get_output('consumer').receive(text_data=json.dumps([
+            {'registered_task': 'django_tasks.tasks.sleep_test', 'inputs': {'duration': 0.1}}]))
+
+        assert [(request_id, username) for request_id, username, _ in scheduled] == [
+            ('connection-id', 'idempotency-test')]
+
+    async def a_message_with_its_own_request_id_fails_to_be_dispatched(self, monkeypatch, transactional_db):
+        await self.models.RegisteredTask.objects.aget_or_create(dotted_path='django_tasks.tasks.sleep_test')
+
+        async def schedule_tasks(request_id, username, *data):
+            raise TaskQueueClosed()
+
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'task-worker-channel', '')
+        monkeypatch.setattr('django_tasks.consumers.schedule_tasks', schedule_tasks)
+        request_id = uuid.uuid4().hex
+        response_status = await self.get_output('consumer').receive_json({'request_id': request_id, 'tasks': [
+            {'registered_task': 'django_tasks.tasks.sleep_test', 'inputs': {'duration': 0.1}}]})
+        message = await self.get_output('consumer').channel_layer.receive(self.get_output('channel'))
+
+        assert response_status == TaskQueueClosed.status_code
+        assert message['type'] == 'task.rejected'
+
+        return request_id,
+
+    async def its_request_record_is_discarded(self):
+        assert await sync_to_async(TaskCache('idempotency-test').add_request)(self.get_output('request_id'), 60)
+
+    def an_admin_action_submitted_twice_with_the_same_form(self):
+        return AdminTaskAction('django_tasks.tasks.doctask_access_test'),
+
+    def both_submissions_have_the_same_request_id(self):
+        action = self.get_output('action')
+        requests = [RequestFactory().post('/admin/', {'csrfmiddlewaretoken': 'form-token'}) for _ in range(2)]
+        other_request = RequestFactory().post('/admin/', {'csrfmiddlewaretoken': 'other-form-token'})
+
+        assert action.get_request_id(requests[0], [1, 2]) == action.get_request_id(requests[1], [1, 2])
+        assert action.get_request_id(requests[0], [1, 2]) != action.get_request_id(other_request, [1, 2])
+
+
+class TestPeriodicTasks(base.BddTester):
+    """
+    Registered tasks may be run periodically, every given seconds or at the times of a cron expression.
+    This covers:
+    * The periodic task schedules
+    * The periodic scheduler
+    """
+
+    @base.BddTester.gherkin()
+    def test_changing_the_schedule_recomputes_the_next_run(self):
+        """
+        Given a cron `periodic_task` with expression $(*/15 * * * *)
+        And its next run is at the next quarter of an hour
+        When its schedule is changed to every $(60) seconds
+        Then its next run is recomputed from the new interval
+        """
+
+    @base.BddTester.gherkin()
+    def test_unfinished_runs_block_the_schedule_within_the_run_lease(self):
+        """
+        Given a cron `periodic_task` with expression $(*/15 * * * *)
+        And its last run started $(7200) seconds ago and never completed
+        When the due runs are claimed with a run lease of $(10800) seconds
+        Then the periodic task run is skipped
+        """
+
+    @base.BddTester.gherkin()
+    def test_unfinished_runs_stop_blocking_the_schedule_after_the_run_lease(self):
+        """
+        Given a cron `periodic_task` with expression $(*/15 * * * *)
+        And its last run started $(7200) seconds ago and never completed
+        When the due runs are claimed with a run lease of $(3600) seconds
+        Then the periodic task run is claimed
+        """
+
+    def a_cron_periodic_task_with_expression(self):
+        registered_task, _ = self.models.RegisteredTask.objects.get_or_create(
+            dotted_path='django_tasks.tasks.sleep_test')
+        periodic_task = self.models.PeriodicTask(
+            name=f'cron-test-{uuid.uuid4().hex}', registered_task=registered_task, inputs={'duration': 1},
+            cron=self.param)
+        periodic_task.full_clean()
+        periodic_task.save()
+
+        return periodic_task,
+
+    def its_next_run_is_at_the_next_quarter_of_an_hour(self):
+        next_run_at = self.get_output('periodic_task').next_run_at
+
+        assert next_run_at > timezone.now()
+        assert next_run_at - timezone.now() <= datetime.timedelta(minutes=15)
+        assert next_run_at.minute % 15 == 0 and next_run_at.second == 0
+
+    def its_schedule_is_changed_to_every_seconds(self):
+        periodic_task = self.models.PeriodicTask.objects.get(pk=self.get_output('periodic_task').pk)
+        periodic_task.cron, periodic_task.interval = '', float(self.param)
+        periodic_task.full_clean()
+        periodic_task.save()
+
+    def its_next_run_is_recomputed_from_the_new_interval(self):
+        periodic_task = self.models.PeriodicTask.objects.get(pk=self.get_output('periodic_task').pk)
+
+        assert periodic_task.next_run_at - timezone.now() <= datetime.timedelta(seconds=periodic_task.interval)
+
+    def its_last_run_started_seconds_ago_and_never_completed(self, monkeypatch):
+        now = timezone.now()
+        self.models.PeriodicTask.objects.filter(pk=self.get_output('periodic_task').pk).update(
+            next_run_at=now - datetime.timedelta(minutes=1),
+            last_run_at=now - datetime.timedelta(seconds=float(self.param)))
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'task-timeout', 0)
+
+    def the_due_runs_are_claimed_with_a_run_lease_of_seconds(self, monkeypatch):
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'periodic-run-lease', float(self.param))
+        self.claimed = PeriodicScheduler(self.runner, 1).claim_due_runs()
+
+    def the_periodic_task_run_is_skipped(self):
+        periodic_task = self.models.PeriodicTask.objects.get(pk=self.get_output('periodic_task').pk)
+
+        assert self.claimed == []
+        assert periodic_task.next_run_at > timezone.now()
+        assert timezone.now() - periodic_task.last_run_at > datetime.timedelta(hours=1)
+
+    def the_periodic_task_run_is_claimed(self):
+        periodic_task = self.models.PeriodicTask.objects.get(pk=self.get_output('periodic_task').pk)
+
+        assert [claimed_task.pk for claimed_task in self.claimed] == [periodic_task.pk]
+        assert periodic_task.next_run_at > timezone.now()
+        assert timezone.now() - periodic_task.last_run_at < datetime.timedelta(minutes=1)
+
+
+class TestDelayedTasks(base.BddTester):
+    """
+    Tasks may be scheduled to start after a delay, held meanwhile in a timer heap of their worker loop.
+    This covers:
+    * The delayed task heap
+    """
+
+    @base.BddTester.gherkin()
+    def test_delayed_tasks_start_after_their_delay_by_the_loop_clock(self):
+        """
+        Given a delayed task `heap` of a `loop` whose clock is offset by $(1000) seconds
+        When tasks are pushed with delays of $(0.3) and $(0.1) seconds, getting their `start_times`
+        Then each task starts after its delay, the shortest delay first
+        """
+
+    def a_delayed_task_heap_of_a_loop_whose_clock_is_offset_by_seconds(self):
+        clock_offset = float(self.param)
+
+        class OffsetClockEventLoop(asyncio.SelectorEventLoop):
+            def time(self):
+                return super().time() + clock_offset
+
+        loop = OffsetClockEventLoop()
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+
+        return DelayedTaskHeap(loop), loop
+
+    async def tasks_are_pushed_with_delays_of_and_seconds_getting_their_start_times(self):
+        async def get_start_time():
+            return time.monotonic()
+
+        pushed_at = time.monotonic()
+        futures = {float(delay): self.get_output('heap').push(float(delay), get_start_time()) for delay in self.param}
+        start_times = {delay: await asyncio.wrap_future(future) - pushed_at for delay, future in futures.items()}
+        loop = self.get_output('loop')
+        loop.call_soon_threadsafe(loop.stop)
+
+        return start_times,
+
+    def each_task_starts_after_its_delay_the_shortest_delay_first(self):
+        start_times = self.get_output('start_times')
+
+        assert all(start_time >= delay for delay, start_time in start_times.items())
+        assert sorted(start_times, key=start_times.get) == sorted(start_times)
+        assert max(start_times.values()) < max(start_times) + 0.1
+
+
+class TestUserRateLimit(base.BddTester):
+    """
+    The schedule requests of each user may be rate-limited, with a token bucket per user taking a token per task.
+    This covers:
+    * The token buckets
+    * The rate limit checks of the schedule consumers
+    """
+
+    @base.BddTester.gherkin()
+    def test_requests_for_more_tasks_than_the_bucket_capacity_are_rejected(self):
+        """
+        Given a schedule `consumer` and a `channel` of a user rate-limited to $(1) task per second in bursts of $(2)
+        When a request of $(3) tasks is sent, getting its `response_status`
+        Then it is answered with HTTP $(413), taking no tokens
+        """
+
+    @base.BddTester.gherkin()
+    def test_invalid_requests_take_no_tokens(self):
+        """
+        Given a schedule `consumer` and a `channel` of a user rate-limited to $(1) task per second in bursts of $(2)
+        When an invalid request of $(2) tasks is sent, getting its `response_status`
+        Then it is answered with HTTP $(400), taking no tokens
+        """
+
+    @base.BddTester.gherkin()
+    def test_token_buckets_give_their_capacity_at_once_and_then_refill_at_their_rate(self):
+        """
+        Given a token `bucket` of rate $(10) and capacity $(2)
+        Then it gives $(2) tokens at once, and then asks to wait for another one
+        And it gives another token once refilled
+        """
+
+    async def a_schedule_consumer_and_a_channel_of_a_user_ratelimited_to_task_per_second_in_bursts_of(
+            self, monkeypatch, transactional_db):
+        rate, burst = self.param
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'user-rate-limit', float(rate))
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'user-rate-burst', int(burst))
+        consumer = TaskScheduleWebSocketConsumer()
+        consumer.scope = {'user': User(username=f'rate-limit-test-{uuid.uuid4().hex}'), 'headers': []}
+        consumer.channel_name = 'rate-limit-test'
+        consumer.channel_layer = InMemoryChannelLayer()
+        channel = await consumer.channel_layer.new_channel()
+        await consumer.channel_layer.group_add(consumer.user_group, channel)
+
+        return consumer, channel
+
+    async def a_request_of_tasks_is_sent_getting_its_response_status(self):
+        await self.models.RegisteredTask.objects.aget_or_create(dotted_path='django_tasks.tasks.sleep_test')
+
+        return await self.get_output('consumer').receive_json([
+            {'registered_task': 'django_tasks.tasks.sleep_test', 'inputs': {'duration': 0.1}}
+            for _ in range(int(self.param))]),
+
+    async def an_invalid_request_of_tasks_is_sent_getting_its_response_status(self):
+        return await self.get_output('consumer').receive_json([
+            {'registered_task': 'django_tasks.tasks.no_such_task', 'inputs': {}} for _ in range(int(self.param))]),
+
+    async def it_is_answered_with_http__taking_no_tokens(self):
+        consumer = self.get_output('consumer')
+        message = await consumer.channel_layer.receive(self.get_output('channel'))
+        bucket = rate_limit.rate_limiter.buckets.get(consumer.scope['user'].username)
+
+        assert self.get_output('response_status') == message['content']['http_status'] == int(self.param)
+        assert bucket is None or bucket.tokens == bucket.capacity
+
+    def a_token_bucket_of_rate_and_capacity(self):
+        rate, capacity = self.param
+
+        return rate_limit.TokenBucket(float(rate), int(capacity)),
+
+    def it_gives_tokens_at_once_and_then_asks_to_wait_for_another_one(self):
+        bucket = self.get_output('bucket')
+
+        assert bucket.take(int(self.param)) == 0
+        assert 0 < bucket.take(1) <= 1 / bucket.rate
+
+    def it_gives_another_token_once_refilled(self):
+        bucket = self.get_output('bucket')
+        time.sleep(1 / bucket.rate)
+
+        assert bucket.take(1) == 0
+        assert bucket.take(bucket.capacity + 1) > 0
+
+
+class TestTaskEventCache(base.BddTester):
+    """
+    The events of the tasks of each user are cached, to be shown to the user later on.
+    This covers:
+    * The task event storage per task
+    * The bounds of the task event history
+    * The compact task cache mode
+    * The pages of cached task events of the admin site
+    * The process-local task cache
+    * The Redis task event storage
+    """
+
+    @base.BddTester.gherkin()
+    def test_task_events_are_stored_and_cleared_per_task(self):
+        """
+        Given a task `cache` of a new user
+        When $(3) events of each of $(2) tasks are cached, alternating the tasks
+        Then the events of each task are kept in order
+        And clearing the cache of a task leaves the other tasks
+        """
+
+    @base.BddTester.gherkin()
+    def test_the_task_event_history_is_bounded_per_task_and_per_user(self):
+        """
+        Given a task `cache` of a new user, bounded to $(2) tasks of $(3) events
+        When $(5) events of each of $(3) tasks are cached, one task after another
+        Then only the last events of the most recently updated tasks are kept
+        """
+
+    @base.BddTester.gherkin()
+    def test_the_compact_mode_keeps_a_snapshot_of_the_latest_event_of_each_task(self):
+        """
+        Given a task `cache` of a new user in $(compact) mode
+        When $(3) events of each of $(2) tasks are cached, one task after another
+        Then each task keeps a snapshot of its latest event, with its creation and update times
+        """
+
+    @base.BddTester.gherkin()
+    def test_cached_task_events_are_loaded_by_pages_in_the_admin_site(self):
+        """
+        Given a task `cache` of a new user
+        When $(1) events of each of $(5) tasks are cached, one task after another
+        Then the admin pages leave the task events to the task events view
+        And the task events view gives all the tasks by pages of $(2) tasks, most recently updated first
+        And the task events view answers HTTP $(400) to a cursor that is not a number
+        """
+
+    @base.BddTester.gherkin()
+    def test_the_local_cache_serves_repeated_reads_until_the_task_events_are_written_or_its_entries_expire(self):
+        """
+        Given a task `cache` of a new user, read through a `local_cache` of $(10) entries
+        When $(1) events of each of $(2) tasks are cached, one task after another
+        Then repeated reads of the task events are served by the local cache
+        And the task events read after a new event include it
+        And the task events written by another process are read once the local entries expire
+        """
+
+    @base.BddTester.gherkin()
+    def test_the_redis_task_event_storage_writes_to_the_first_server_of_the_cache(self):
+        """
+        Given a Redis cache `location` of servers $(redis://first:6380/2) and $(redis://second:6381)
+        Then the Redis task event storage connects to the first server, with the cache options
+        And the events of finished tasks expire after a TTL of $(0.0005) seconds, rounded up to milliseconds
+        And a TTL of $(-1) seconds is rejected
+        """
+
+    def a_task_cache_of_a_new_user(self):
+        return TaskCache(f'cache-test-{uuid.uuid4().hex}'),
+
+    def a_task_cache_of_a_new_user_bounded_to_tasks_of_events(self, monkeypatch):
+        self.max_tasks, self.max_events = map(int, self.param)
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'task-cache-max-tasks', self.max_tasks)
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'task-cache-max-events', self.max_events)
+
+        return TaskCache(f'cache-test-{uuid.uuid4().hex}'),
+
+    def a_task_cache_of_a_new_user_in_mode(self, monkeypatch):
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'task-cache-mode', self.param)
+
+        return TaskCache(f'cache-test-{uuid.uuid4().hex}'),
+
+    def events_of_each_of_tasks_are_cached_alternating_the_tasks(self):
+        self.event_count, task_count = map(int, self.param)
+        self.task_ids = [f'cache-test.{n}' for n in range(task_count)]
+        cache = self.get_output('cache')
+
+        for step in range(self.event_count - 1):
+            for task_id in self.task_ids:
+                cache.cache_task_event(task_id, {'task_id': task_id, 'detail': {'status': 'Started', 'step': step}})
+
+        cache.cache_task_events([{'task_id': task_id, 'detail': {'status': 'Success', 'step': self.event_count - 1}}
+                                 for task_id in self.task_ids])
+
+    def events_of_each_of_tasks_are_cached_one_task_after_another(self):
+        self.event_count, task_count = map(int, self.param)
+        self.task_ids = [f'cache-test.{n}' for n in range(task_count)]
+        cache = self.get_output('cache')
+
+        for task_id in self.task_ids:
+            for step in range(self.event_count):
+                cache.cache_task_event(task_id, {'task_id': task_id, 'detail': {'status': 'Started', 'step': step}})
+
+    def the_events_of_each_task_are_kept_in_order(self):
+        index = self.get_output('cache').get_index()
+
+        assert list(index) == self.task_ids
+        assert all([event['detail']['step'] for event in index[task_id]] == list(range(self.event_count))
+                   for task_id in self.task_ids)
+        assert all(index[task_id][-1]['detail']['status'] == 'Success' for task_id in self.task_ids)
+
+    def clearing_the_cache_of_a_task_leaves_the_other_tasks(self):
+        cache = self.get_output('cache')
+        cache.clear_task_cache(self.task_ids[0])
+
+        assert list(cache.get_index()) == self.task_ids[1:]
+        assert len(cache.get_index()[self.task_ids[1]]) == self.event_count
+
+    def only_the_last_events_of_the_most_recently_updated_tasks_are_kept(self):
+        index = self.get_output('cache').get_index()
+
+        assert list(index) == self.task_ids[-self.max_tasks:]
+        assert all([event['detail']['step'] for event in index[task_id]] == list(
+            range(self.event_count - self.max_events, self.event_count)) for task_id in index)
+
+    def each_task_keeps_a_snapshot_of_its_latest_event_with_its_creation_and_update_times(self):
+        cache = self.get_output('cache')
+        index = cache.get_index()
+        last_events = cache.event_index.get_last_events(self.task_ids)
+
+        assert list(index) == self.task_ids
+        assert all(len(index[task_id]) == 1 for task_id in self.task_ids)
+        assert all(index[task_id][0]['detail']['step'] == self.event_count - 1 for task_id in self.task_ids)
+        assert all(index[task_id][0]['created_at'] <= index[task_id][0]['updated_at'] for task_id in self.task_ids)
+        assert index[self.task_ids[0]][0]['updated_at'] <= index[self.task_ids[1]][0]['created_at']
+        assert all(last_events[task_id]['detail']['step'] == self.event_count - 1 for task_id in self.task_ids)
+
+    def a_task_cache_of_a_new_user_read_through_a_local_cache_of_entries(self, monkeypatch):
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'task-cache-l1-size', int(self.param))
+        monkeypatch.setattr(LocalTaskCache, 'instance', None)
+        local_cache = LocalTaskCache.get()
+
+        return TaskCache(f'cache-test-{uuid.uuid4().hex}'), local_cache
+
+    def repeated_reads_of_the_task_events_are_served_by_the_local_cache(self, monkeypatch):
+        cache, local_cache = self.get_output('cache'), self.get_output('local_cache')
+        misses = local_cache.misses
+        index, page = cache.get_index(), cache.get_page(1)
+
+        with monkeypatch.context() as patch:
+            patch.setattr('django_tasks.task_cache.cache', None)
+            patch.setattr(cache.event_index, 'get_index', lambda: pytest.fail('Task cache read.'))
+            patch.setattr(cache.event_index, 'get_page', lambda *args: pytest.fail('Task cache read.'))
+
+            assert [cache.get_index() for _ in range(3)] == [index] * 3
+            assert cache.get_page(1) == page
+
+        assert local_cache.hits == 4 and local_cache.misses == misses + 2
+        assert list(index) == self.task_ids
+
+    def the_task_events_read_after_a_new_event_include_it(self):
+        cache, task_id = self.get_output('cache'), self.task_ids[0]
+        cache.cache_task_event(task_id, {'task_id': task_id, 'detail': {'status': 'Success', 'step': 1}})
+        index = cache.get_index()
+
+        assert list(index) == self.task_ids[1:] + [task_id]
+        assert index[task_id][-1]['detail']['status'] == 'Success'
+        assert cache.get_page(1)[0] == {task_id: index[task_id]}
+
+    def the_task_events_written_by_another_process_are_read_once_the_local_entries_expire(self, monkeypatch):
+        cache, local_cache, task_id = self.get_output('cache'), self.get_output('local_cache'), self.task_ids[1]
+        index = cache.get_index()
+        cache.event_index.append_events([{'task_id': task_id, 'detail': {'status': 'Success', 'step': 1}}])
+
+        assert cache.get_index() == index
+
+        monkeypatch.setattr(local_cache, 'max_age', 0.0)
+
+        assert list(cache.get_index()) == [self.task_ids[0], task_id]
+
+    def a_redis_cache_location_of_servers_and(self, monkeypatch):
+        monkeypatch.setitem(self.settings.CACHES, DEFAULT_CACHE_ALIAS, {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': ','.join(self.param),
+            'OPTIONS': {'socket_timeout': 2.5, 'parser_class': 'redis.connection._HiredisParser'}})
+        monkeypatch.setattr(RedisTaskEventIndex, 'clients', {})
+
+        return self.settings.CACHES[DEFAULT_CACHE_ALIAS]['LOCATION'],
+
+    def the_redis_task_event_storage_connects_to_the_first_server_with_the_cache_options(self):
+        client = RedisTaskEventIndex.get_client()
+        connection_kwargs = client.connection_pool.connection_kwargs
+
+        assert (connection_kwargs['host'], connection_kwargs['port'], connection_kwargs['db']) == ('first', 6380, 2)
+        assert connection_kwargs['socket_timeout'] == 2.5
+        assert 'parser_class' not in connection_kwargs
+        assert RedisTaskEventIndex.get_client() is client
+
+    def the_events_of_finished_tasks_expire_after_a_ttl_of_seconds_rounded_up_to_milliseconds(self, monkeypatch):
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'task-cache-ttl', float(self.param))
+        commands: list[tuple] = []
+
+        def execute(pipeline, *args):
+            commands.extend(args for args, _ in pipeline.command_stack)
+            return [0] * len(pipeline.command_stack)
+
+        monkeypatch.setattr(redis.client.Pipeline, 'execute', execute)
+        event_index = RedisTaskEventIndex('ttl-test')
+        event_index.append_events([{'task_id': 'ttl-test.0', 'detail': {'status': 'Success'}}])
+
+        assert ('PEXPIRE', event_index.get_task_key('ttl-test.0'), 1) in commands
+
+    def a_ttl_of_seconds_is_rejected(self, monkeypatch):
+        monkeypatch.setitem(self.settings.CHANNEL_TASKS.jsonlike, 'task-cache-ttl', float(self.param))
+
+        with pytest.raises(ImproperlyConfigured):
+            self.settings.CHANNEL_TASKS.task_cache_ttl
+
+    def get_task_events_request(self, **params):
+        request = RequestFactory().get('/admin/task-events/', params)
+        request.user = User(username=self.get_output('cache').user_name, is_staff=True, is_superuser=True)
+
+        return request
+
+    def the_admin_pages_leave_the_task_events_to_the_task_events_view(self, monkeypatch):
+        with monkeypatch.context() as patch:
+            patch.setattr(TaskCache, 'get_page', lambda *args: pytest.fail('Task cache read.'))
+            context = admin.site.each_context(self.get_task_events_request())
+
+        assert context['task_events_url'] == reverse('admin:task_events')
+
+    def the_task_events_view_gives_all_the_tasks_by_pages_of_tasks_most_recently_updated_first(self):
+        task_ids: list[str] = []
+        cursor = ''
+
+        while cursor is not None:
+            response = admin.site.task_events_view(self.get_task_events_request(limit=self.param, cursor=cursor))
+            page = json.loads(response.content)
+            assert response.status_code == 200 and len(page['tasks']) <= int(self.param)
+            task_ids.extend(reversed(page['tasks']))
+            cursor = page['next_cursor']
+
+        assert task_ids == self.task_ids[::-1]
+
+    def the_task_events_view_answers_http_to_a_cursor_that_is_not_a_number(self):
+        for cursor in ('not-a-number', 'nan', '1) +inf'):
+            response = admin.site.task_events_view(self.get_task_events_request(cursor=cursor))
+
+            assert response.status_code == int(self.param)
+
+
 class TestRestApiWithTokenAuth(TaskAdminUserCreation):
     """
     Staff users may obtain a token through Django admin site, and use it to schedule
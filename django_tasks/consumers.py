@@ -6,51 +6,210 @@ import json
 import logging
 import uuid
 
+from typing import Any, Optional
+
 from asgiref.sync import sync_to_async
 
-from channels.exceptions import StopConsumer
+from channels.exceptions import ChannelFull, StopConsumer
 from channels.consumer import AsyncConsumer
 from channels.generic.http import AsyncHttpConsumer
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from django.conf import settings
 from rest_framework import status
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import APIException, NotFound, Throttled, ValidationError
 
+from django_tasks import metrics
+from django_tasks.rate_limit import rate_limiter
 from django_tasks.serializers import DocTaskSerializer
 from django_tasks.scheduler import DocTaskScheduler, schedule_tasks
 from django_tasks.task_cache import TaskCache
+from django_tasks.task_runner import TaskRunner
 from django_tasks.websocket.close_codes import WSCloseCode
+from django_tasks.worker_process import TaskWorkersFull, get_cancel_group
+
+from django_tasks.typing import JSON, EventJSON, DocTaskJSON, TaskJSON, TaskMessageJSON, WSResponseJSON
 
-from django_tasks.typing import JSON, EventJSON, DocTaskJSON, TaskJSON, WSResponseJSON
+
+class RequestInProgress(APIException):
+    """Raised when a schedule request repeats one that is still being processed, before its tasks are recorded."""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this ID is being processed, try again later.'
+    default_code = 'request_in_progress'
 
 
 class TaskGroupConsumer(AsyncConsumer, metaclass=abc.ABCMeta):
+    #: Will hold the request ID generated if the client gives none.
+    generated_request_id: str = ''
+
+    #: Will hold the request ID given in the content of the (websocket) message, if any.
+    message_request_id: Optional[str] = None
+
     @property
     def user_group(self) -> str:
         """The name of the group of consumers that is assigned to the user."""
         return f"{self.scope['user'].username}_{settings.CHANNEL_TASKS.channel_group}"
 
     @property
-    def request_id(self) -> str:
-        """
-        The request ID provided in the corresponding header, or a newly generated ID if the header is missing.
-        This value will be returned to clients as an identifier of the request; websocket clients must provide
-        it in the Request-ID header in order to be able to check the returned ID value in subsequent messages.
-        """
+    def request_id_header(self) -> Optional[str]:
+        """The request ID provided in the Request-ID header, if any."""
         for name, value in self.scope.get('headers', []):
             if name == b'request-id':
                 id_value: str = value.decode()
                 return id_value
 
-        return uuid.uuid4().hex
+        return None
+
+    @property
+    def client_request_id(self) -> Optional[str]:
+        """
+        The request ID given by the client, if any: in the content of the message, as websocket clients give it
+        for each message, or else in the Request-ID header.
+        """
+        return self.message_request_id if self.message_request_id is not None else self.request_id_header
+
+    @property
+    def deduplication_id(self) -> Optional[str]:
+        """The client request ID that schedule requests are deduplicated by; see :py:meth:`add_request`."""
+        return self.client_request_id
+
+    @property
+    def request_id(self) -> str:
+        """
+        The request ID given by the client, or a newly generated ID if none is given. This value will be returned
+        to clients as an identifier of the request; websocket clients must provide it, in the message content or in
+        the Request-ID header, in order to be able to check the returned ID value in subsequent messages.
+        """
+        client_value = self.client_request_id
+
+        if client_value is not None:
+            return client_value
+
+        if not self.generated_request_id:
+            self.generated_request_id = uuid.uuid4().hex
+
+        return self.generated_request_id
 
     @abc.abstractmethod
     async def receive_json(self, request_content: JSON) -> int:
         """Process the received, already parsed, JSON request content, and return an HTTP status code."""
 
     @abc.abstractmethod
-    async def send_bad_request_response(self, error: ValidationError) -> None:
-        """Send a 400 message in case of validation error."""
+    async def send_error_response(self, error: APIException) -> None:
+        """Send an error message, with the status code of the error, in case of validation error or rejection."""
+
+    async def send_duplicate_response(self, task_statuses: list[TaskMessageJSON]) -> None:
+        """Send the IDs and current statuses of the tasks of a repeated request, with HTTP 200 status."""
+
+    def unwrap_request(self, request_content: JSON) -> JSON:
+        """
+        Returns the task array of a schedule request given as `{"request_id": <ID>, "tasks": [...]}`, keeping its
+        ID as the one given by the client, or returns the request content as is.
+        """
+        if isinstance(request_content, dict) and isinstance(request_content.get('tasks'), list) and (
+                'request_id' in request_content):
+            self.message_request_id = str(request_content['request_id'])
+            return request_content['tasks']
+
+        return request_content
+
+    async def add_request(self) -> Optional[int]:
+        """
+        Records the schedule request, if its :py:attr:`deduplication_id` is given, and returns `None` if it is new.
+        Otherwise, sends the duplicate response, or a :py:class:`RequestInProgress` error if the tasks of the first
+        request are not recorded yet, and returns its HTTP status code. See the "request-id-ttl" setting.
+        """
+        if not settings.CHANNEL_TASKS.request_id_ttl or self.deduplication_id is None:
+            return None
+
+        user_task_cache = TaskCache(self.scope['user'].username)
+
+        if await sync_to_async(user_task_cache.add_request)(self.request_id, settings.CHANNEL_TASKS.request_id_ttl):
+            return None
+
+        logging.getLogger('django').info('Repeated schedule request %s.', self.request_id)
+        task_statuses = await sync_to_async(user_task_cache.get_request_statuses)(self.request_id)
+
+        if not task_statuses:
+            error = RequestInProgress()
+            await self.send_error_response(error)
+            return error.status_code
+
+        await self.send_duplicate_response(task_statuses)
+        return status.HTTP_200_OK
+
+    async def set_request_tasks(self, task_count: int) -> None:
+        """Records the IDs of the tasks scheduled by the request, if recorded; see :py:meth:`add_request`."""
+        if settings.CHANNEL_TASKS.request_id_ttl and self.deduplication_id is not None:
+            await sync_to_async(TaskCache(self.scope['user'].username).set_request_tasks)(
+                self.request_id, [f'{self.request_id}.{n}' for n in range(task_count)],
+                settings.CHANNEL_TASKS.request_id_ttl)
+
+    async def discard_request(self) -> None:
+        """Discards the record of the request, if recorded, so that the client may repeat a rejected request."""
+        if settings.CHANNEL_TASKS.request_id_ttl and self.deduplication_id is not None:
+            await sync_to_async(TaskCache(self.scope['user'].username).discard_request)(self.request_id)
+
+    @staticmethod
+    def get_error_details(error: APIException) -> list[JSON]:
+        """Returns the full details of the error, with the 'retry_after' time in seconds for throttled requests."""
+        full_details: Any = error.get_full_details()
+        details = [{**detail} for detail in full_details] if isinstance(full_details, list) else [full_details]
+        retry_after = TaskGroupConsumer.get_retry_after(error)
+
+        if retry_after is not None:
+            for detail in details:
+                detail['retry_after'] = retry_after
+
+        return details
+
+    @staticmethod
+    def get_retry_after(error: APIException) -> Optional[int]:
+        """Returns the time to wait, in seconds, before repeating a throttled request, if known."""
+        wait: Optional[int] = getattr(error, 'wait', None) if isinstance(error, Throttled) else None
+        return wait
+
+    async def send_to_task_workers(self, message_type: str, tasks: list[JSON]) -> None:
+        """
+        Sends the given array of valid task data to the standalone task workers, through the "task-worker-channel"
+        channel, as a schedule request of the given type. Raises
+        :py:class:`django_tasks.worker_process.TaskWorkersFull` (HTTP 503) if the channel is full, discarding the
+        record of the request so that it may be repeated.
+        """
+        try:
+            await self.channel_layer.send(settings.CHANNEL_TASKS.task_worker_channel, {
+                'type': message_type,
+                'request_id': self.request_id,
+                'user_name': self.scope['user'].username,
+                'tasks': tasks,
+            })
+        except ChannelFull as error:
+            await self.discard_request()
+            raise TaskWorkersFull() from error
+
+    @staticmethod
+    def check_task_capacity(request_content: JSON) -> None:
+        """
+        Raises :py:class:`django_tasks.task_queue.TaskQueueFull` if the task runner cannot take the requested
+        array of tasks, or :py:class:`django_tasks.task_queue.TaskQueueClosed` if it is shutting down. Tasks that
+        run in the standalone task workers are not checked here, as the local task runner does not run them;
+        the capacity of the "task-worker-channel" bounds them instead.
+        """
+        if settings.CHANNEL_TASKS.task_worker_channel:
+            return
+
+        TaskRunner.get().task_queue.check_capacity(len(request_content) if isinstance(request_content, list) else 1)
+
+    def check_rate_limit(self, request_content: JSON) -> None:
+        """
+        Raises :py:class:`rest_framework.exceptions.Throttled` if the user exceeds the "user-rate-limit" setting,
+        each requested task taking a token of the user's bucket, or
+        :py:class:`django_tasks.rate_limit.TooManyTasks` if the request holds more tasks than the bucket capacity.
+        Called once the request is otherwise valid, so that rejected requests take no tokens.
+        """
+        if settings.CHANNEL_TASKS.user_rate_limit > 0:
+            rate_limiter.check(self.scope['user'].username,
+                               len(request_content) if isinstance(request_content, list) else 1,
+                               settings.CHANNEL_TASKS.user_rate_limit, max(1, settings.CHANNEL_TASKS.user_rate_burst))
 
 
 class TaskScheduleConsumer(TaskGroupConsumer):
@@ -58,14 +217,31 @@ class TaskScheduleConsumer(TaskGroupConsumer):
         """Processes task schedule websocket requests."""
         logging.getLogger('django').debug(
             'Processing task schedule through channel %s. Data: %s', self.channel_name, request_content)
+        request_content = self.unwrap_request(request_content)
+
+        if (response_status := await self.add_request()) is not None:
+            return response_status
         try:
+            self.check_task_capacity(request_content)
             many_serializer = await DocTaskSerializer.get_valid_task_group_serializer(request_content)
-        except ValidationError as error:
-            await self.send_bad_request_response(error)
-            return status.HTTP_400_BAD_REQUEST
+            self.check_rate_limit(request_content)
+        except APIException as error:
+            await self.discard_request()
+            await self.send_error_response(error)
+            return error.status_code
+
+        data: list[TaskJSON] = await many_serializer.adata
+        await self.set_request_tasks(len(data))
+        try:
+            if settings.CHANNEL_TASKS.task_worker_channel:
+                await self.send_to_task_workers('task.schedule', data)  # type: ignore[arg-type]
+            else:
+                await schedule_tasks(self.request_id, self.scope['user'].username, *data)
+        except APIException as error:
+            await self.discard_request()
+            await self.send_error_response(error)
+            return error.status_code
         else:
-            data: list[TaskJSON] = await many_serializer.adata
-            await schedule_tasks(self.request_id, self.scope['user'].username, *data)
             return status.HTTP_200_OK
 
 
@@ -74,16 +250,50 @@ class DocTaskScheduleConsumer(TaskGroupConsumer):
         """Processes doc-task schedule websocket requests."""
         logging.getLogger('django').debug(
             'Processing DocTask schedule through channel %s. Data: %s', self.channel_name, request_content)
+        request_content = self.unwrap_request(request_content)
+
+        if (response_status := await self.add_request()) is not None:
+            return response_status
+        try:
+            if not settings.CHANNEL_TASKS.durable_task_queue:
+                self.check_task_capacity(request_content)
+
+            self.check_durable_dependencies(request_content)
+            many_serializer = await DocTaskSerializer.get_valid_task_group_serializer(request_content)
+            self.check_rate_limit(request_content)
+            await many_serializer.asave()
+        except APIException as error:
+            await self.discard_request()
+            await self.send_error_response(error)
+            return error.status_code
+
+        data: list[DocTaskJSON] = await many_serializer.adata
+        await self.set_request_tasks(len(data))
         try:
-            many_serializer, doctasks = await DocTaskSerializer.create_doctask_group(request_content)
-        except ValidationError as error:
-            await self.send_bad_request_response(error)
-            return status.HTTP_400_BAD_REQUEST
+            if settings.CHANNEL_TASKS.durable_task_queue:
+                await DocTaskScheduler.enqueue_doctasks(self.request_id, self.scope['user'].username, *data)
+            elif settings.CHANNEL_TASKS.task_worker_channel:
+                await self.send_to_task_workers('doctask.schedule', data)  # type: ignore[arg-type]
+            else:
+                await DocTaskScheduler.schedule_doctasks(self.request_id, self.scope['user'].username, *data)
+        except APIException as error:
+            await self.discard_request()
+            await self.send_error_response(error)
+            return error.status_code
         else:
-            data: list[DocTaskJSON] = await many_serializer.adata
-            await DocTaskScheduler.schedule_doctasks(self.request_id, self.scope['user'].username, *data)
             return status.HTTP_201_CREATED
 
+    @staticmethod
+    def check_durable_dependencies(request_content: JSON) -> None:
+        """
+        Raises a :py:class:`rest_framework.exceptions.ValidationError` if the requested doc-tasks depend on each
+        other in durable queue mode, where each doc-task is claimed on its own.
+        """
+        if settings.CHANNEL_TASKS.durable_task_queue and isinstance(request_content, list) and any(
+                isinstance(data, dict) and (data.get('depends_on') or data.get('inputs_from'))
+                for data in request_content):
+            raise ValidationError({'non_field_errors': 'Task dependencies are not supported by the durable queue.'})
+
 
 class TaskCacheClearConsumer(TaskGroupConsumer):
     async def receive_json(self, request_content: JSON) -> int:
@@ -94,15 +304,81 @@ class TaskCacheClearConsumer(TaskGroupConsumer):
         return status.HTTP_200_OK
 
 
+class TaskCancelConsumer(TaskGroupConsumer):
+    async def receive_json(self, request_content: JSON) -> int:
+        """
+        Cancels the in-flight task with the given 'task_id', or all those of the given 'request_id'. If tasks run
+        in standalone task workers, the cancel request is forwarded to them, and accepted with HTTP 202.
+        """
+        logging.getLogger('django').debug(
+            'Processing task cancel through channel %s. Data: %s', self.channel_name, request_content)
+        try:
+            if not isinstance(request_content, dict) or not (
+                    request_content.get('task_id') or request_content.get('request_id')):
+                raise ValidationError({'non_field_errors': "Expected a 'task_id' or a 'request_id'."})
+
+            if settings.CHANNEL_TASKS.task_worker_channel:
+                await self.channel_layer.group_send(get_cancel_group(settings.CHANNEL_TASKS.task_worker_channel), {
+                    'type': 'task.cancel',
+                    'user_name': self.scope['user'].username,
+                    'task_id': str(request_content.get('task_id', '')),
+                    'request_id': str(request_content.get('request_id', '')),
+                })
+                return status.HTTP_202_ACCEPTED
+
+            cancelled_ids = TaskRunner.get().cancel_tasks(
+                self.scope['user'].username,
+                task_id=str(request_content.get('task_id', '')),
+                request_id=str(request_content.get('request_id', '')),
+            )
+            if not cancelled_ids:
+                raise NotFound('No in-flight task found to cancel.')
+        except APIException as error:
+            await self.send_error_response(error)
+            return error.status_code
+        else:
+            return status.HTTP_200_OK
+
+
 class TaskWebSocketConsumer(TaskGroupConsumer, AsyncJsonWebsocketConsumer):
-    async def send_bad_request_response(self, error: ValidationError) -> None:
-        """Broadcasts an HTTP 400 message through the user's group of consumers."""
+    async def send_error_response(self, error: APIException) -> None:
+        """
+        Broadcasts an error message through the user's group of consumers; of type `task.badrequest` for HTTP 400
+        errors, or `task.rejected` otherwise.
+        """
+        content: WSResponseJSON = {
+            'http_status': error.status_code,
+            'request_id': self.request_id,
+            'details': self.get_error_details(error),
+        }
+        event_type = 'task.badrequest' if error.status_code == status.HTTP_400_BAD_REQUEST else 'task.rejected'
+        await self.group_send({'type': event_type, 'content': content})
+
+    async def send_duplicate_response(self, task_statuses: list[TaskMessageJSON]) -> None:
+        """
+        Broadcasts a `task.duplicate` message, with the IDs and current statuses of the tasks of the repeated
+        request, through the user's group of consumers.
+        """
         content: WSResponseJSON = {
-            'http_status': status.HTTP_400_BAD_REQUEST,
+            'http_status': status.HTTP_200_OK,
             'request_id': self.request_id,
-            'details': [{**detail} for detail in error.get_full_details()],
+            'details': task_statuses,  # type: ignore[typeddict-item]
         }
-        await self.group_send({'type': 'task.badrequest', 'content': content})
+        await self.group_send({'type': 'task.duplicate', 'content': content})  # type: ignore[typeddict-item]
+
+    @property
+    def deduplication_id(self) -> Optional[str]:
+        """
+        The request ID given in the content of the message, if any; not the Request-ID header, which is that of the
+        whole connection, sent with every message.
+        """
+        return self.message_request_id
+
+    async def receive(self, text_data=None, bytes_data=None, **kwargs) -> None:
+        """Takes the request ID of each message received from its content, or generates a new one if none given."""
+        self.generated_request_id = ''
+        self.message_request_id = None
+        await super().receive(text_data, bytes_data, **kwargs)
 
     async def group_send(self, event: EventJSON) -> None:
         """Distributes the given `event` through the group of the user of this instance."""
@@ -112,6 +388,14 @@ class TaskWebSocketConsumer(TaskGroupConsumer, AsyncJsonWebsocketConsumer):
         """Echoes the task.started document."""
         await self.send_json(content=event)
 
+    async def task_progress(self, event: EventJSON) -> None:
+        """Echoes the task.progress document."""
+        await self.send_json(content=event)
+
+    async def task_retry(self, event: EventJSON) -> None:
+        """Echoes the task.retry document."""
+        await self.send_json(content=event)
+
     async def task_success(self, event: EventJSON) -> None:
         """Echoes the task.success document."""
         await self.send_json(content=event)
@@ -124,10 +408,39 @@ class TaskWebSocketConsumer(TaskGroupConsumer, AsyncJsonWebsocketConsumer):
         """Echoes the task.error document."""
         await self.send_json(content=event)
 
+    async def task_timeout(self, event: EventJSON) -> None:
+        """Echoes the task.timeout document."""
+        await self.send_json(content=event)
+
+    async def task_skipped(self, event: EventJSON) -> None:
+        """Echoes the task.skipped document."""
+        await self.send_json(content=event)
+
+    async def task_scheduled(self, event: EventJSON) -> None:
+        """Echoes the task.scheduled document."""
+        await self.send_json(content=event)
+
+    async def task_queued(self, event: EventJSON) -> None:
+        """Echoes the task.queued document."""
+        await self.send_json(content=event)
+
+    async def task_batch(self, event: EventJSON) -> None:
+        """Echoes each of the task event documents in the task.batch document."""
+        for task_event in event['content']:  # type: ignore[union-attr]
+            await self.send_json(content=task_event)
+
     async def task_badrequest(self, event: EventJSON) -> None:
         """Echoes the task.badrequest document."""
         await self.send_json(content=event)
 
+    async def task_rejected(self, event: EventJSON) -> None:
+        """Echoes the task.rejected document."""
+        await self.send_json(content=event)
+
+    async def task_duplicate(self, event: EventJSON) -> None:
+        """Echoes the task.duplicate document."""
+        await self.send_json(content=event)
+
     async def stop_unauthorized(self) -> None:
         """Stops the consumer if the user is not authenticated."""
         if not self.scope['user'].is_authenticated:
@@ -164,24 +477,40 @@ class CacheClearWebSocketConsumer(TaskCacheClearConsumer, TaskWebSocketConsumer)
     """The websocket consumer for cache-clear requests."""
 
 
+class TaskCancelWebSocketConsumer(TaskCancelConsumer, TaskWebSocketConsumer):
+    """The websocket consumer for task cancel requests."""
+
+
 class TaskHttpConsumer(TaskGroupConsumer, AsyncHttpConsumer):
+    #: Whether a response has been sent by the request processing.
+    responded: bool = False
+
     async def handle(self, body: bytes):
         try:
             request_content: JSON = json.loads(body)
         except json.JSONDecodeError as error:
-            await self.send_bad_request_response(ValidationError({'non_field_errors': repr(error)}))
+            await self.send_error_response(ValidationError({'non_field_errors': repr(error)}))
         else:
             http_status = await self.receive_json(request_content)
-            if http_status < 400:
+            if http_status < 400 and not self.responded:
                 await self.send_response(http_status, json.dumps({'request_id': self.request_id}).encode())
 
-    async def send_bad_request_response(self, error: ValidationError) -> None:
-        """Broadcasts an HTTP 400 message through the user's group of consumers."""
+    async def send_duplicate_response(self, task_statuses: list[TaskMessageJSON]) -> None:
+        """Responds with the IDs and current statuses of the tasks of the repeated request."""
+        self.responded = True
+        await self.send_response(status.HTTP_200_OK, json.dumps({
+            'request_id': self.request_id, 'details': task_statuses,
+        }).encode())
+
+    async def send_error_response(self, error: APIException) -> None:
+        """Responds with the status code of the error and its details, and a Retry-After header if throttled."""
         content: WSResponseJSON = {
             'request_id': self.request_id,
-            'details': [{**detail} for detail in error.get_full_details()],
+            'details': self.get_error_details(error),
         }
-        await self.send_response(status.HTTP_400_BAD_REQUEST, json.dumps(content).encode())
+        retry_after = self.get_retry_after(error)
+        headers = [(b'Retry-After', str(retry_after).encode())] if retry_after is not None else []
+        await self.send_response(error.status_code, json.dumps(content).encode(), headers=headers)
 
 
 class TaskScheduleHttpConsumer(TaskScheduleConsumer, TaskHttpConsumer):
@@ -190,3 +519,16 @@ class TaskScheduleHttpConsumer(TaskScheduleConsumer, TaskHttpConsumer):
 
 class DocTaskScheduleHttpConsumer(DocTaskScheduleConsumer, TaskHttpConsumer):
     """The HTTP consumer for doc-task schedule requests."""
+
+
+class TaskCancelHttpConsumer(TaskCancelConsumer, TaskHttpConsumer):
+    """The HTTP consumer for task cancel requests."""
+
+
+class MetricsHttpConsumer(AsyncHttpConsumer):
+    """The HTTP consumer serving the task runner metrics, in the Prometheus text exposition format."""
+
+    async def handle(self, body: bytes):
+        await self.send_response(status.HTTP_200_OK, metrics.registry.render().encode(), headers=[
+            (b'Content-Type', b'text/plain; version=0.0.4; charset=utf-8'),
+        ])
@@ -0,0 +1,90 @@
+"""
+This module provides the :py:class:`django_tasks.cron.CronExpression` class, a minimal parser and evaluator of
+cron expressions, employed by the periodic tasks; see :py:class:`django_tasks.models.PeriodicTask`.
+"""
+import datetime
+
+
+class CronExpression:
+    """
+    Cron expression with the 5 standard fields: minute, hour, day of month, month, and day of week (0-7, both
+    0 and 7 being Sunday). Each field may be `*`, a value, a range `a-b`, or a comma-separated list of these,
+    each one optionally with a step as in `*/15` or `8-18/2`. Month and weekday names are not supported.
+
+    As in cron, if both the day of month and the day of week are restricted, a day matching either one matches.
+    """
+
+    #: Ranges of values of the fields, in order.
+    field_ranges = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression: str):
+        """Raises `ValueError` on invalid expressions."""
+        fields = expression.split()
+
+        if len(fields) != len(self.field_ranges):
+            raise ValueError(f'Cron expression {expression!r} must have {len(self.field_ranges)} fields.')
+
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            self.parse_field(field, low, high) for field, (low, high) in zip(fields, self.field_ranges))
+        self.weekdays = {weekday % 7 for weekday in weekdays}
+        self.any_day, self.any_weekday = fields[2] == '*', fields[4] == '*'
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: {self.expression}>'
+
+    @staticmethod
+    def parse_field(field: str, low: int, high: int) -> set[int]:
+        """Returns the set of values of the given field, in the range from `low` to `high`."""
+        values: set[int] = set()
+
+        for part in field.split(','):
+            range_part, _, step_part = part.partition('/')
+
+            if range_part == '*':
+                start, end = low, high
+            elif '-' in range_part:
+                start, end = map(int, range_part.split('-', 1))
+            else:
+                start = int(range_part)
+                end = high if step_part else start
+
+            step = int(step_part) if step_part else 1
+
+            if not low <= start <= end <= high or step < 1:
+                raise ValueError(f'Invalid cron field {field!r}, out of range {low}-{high}.')
+
+            values.update(range(start, end + 1, step))
+
+        return values
+
+    def matches_day(self, moment: datetime.datetime) -> bool:
+        day_matches = moment.day in self.days
+        weekday_matches = moment.isoweekday() % 7 in self.weekdays
+
+        if self.any_day or self.any_weekday:
+            return day_matches and weekday_matches
+
+        return day_matches or weekday_matches
+
+    def get_next(self, after: datetime.datetime) -> datetime.datetime:
+        """
+        Returns the first time, to the minute, strictly after the given one that matches the expression, in the
+        (wall-clock) time zone of the given time. Raises `ValueError` if there is none within 5 years.
+        """
+        moment = after.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = moment + datetime.timedelta(days=5 * 366)
+
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + datetime.timedelta(days=32)).replace(day=1)
+            elif not self.matches_day(moment):
+                moment = moment.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + datetime.timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += datetime.timedelta(minutes=1)
+            else:
+                return moment
+
+        raise ValueError(f'Cron expression {self.expression!r} matches no time within 5 years.')
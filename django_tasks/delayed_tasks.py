@@ -0,0 +1,152 @@
+"""
+This module provides the :py:class:`django_tasks.delayed_tasks.DelayedTaskHeap` class, which holds the tasks
+scheduled to run later in a worker loop of the task runner.
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import heapq
+import itertools
+import math
+
+from typing import Coroutine, Optional
+
+
+class DelayedTask:
+    """Entry of the delayed task heap: the coroutine to run when due, and its future."""
+
+    def __init__(self, coroutine: Coroutine):
+        self.coroutine = coroutine
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self.task: Optional[asyncio.Task] = None
+        self.in_heap = False
+        self.discarded = False
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: {self.coroutine}, task={self.task}>'
+
+
+class DelayedTaskHeap:
+    """
+    Timer heap of a worker loop: a binary heap of the delayed tasks by due time, with a single loop timer armed
+    for the earliest one, so that pushing and firing take O(log n) time, and pending tasks take no loop resources
+    but their heap entry. Cancelled entries are deleted lazily, and the heap is compacted when most of its entries
+    are cancelled.
+
+    Delayed tasks are pushed thread-safe, getting a `concurrent.futures.Future` as
+    `asyncio.run_coroutine_threadsafe` does; cancelling this future discards the pending task, or cancels the
+    running one.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.heap: list[tuple[float, int, DelayedTask]] = []
+        self.sequence = itertools.count()
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.timer_due_at = math.inf
+        self.cancelled_count = 0
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: size={len(self.heap)}, cancelled={self.cancelled_count}>'
+
+    def __len__(self) -> int:
+        return len(self.heap) - self.cancelled_count
+
+    def push(self, delay: float, coroutine: Coroutine) -> concurrent.futures.Future:
+        """
+        Schedules, thread-safe, the given coroutine to run in the loop after `delay` seconds, as measured by the
+        loop clock from the time it gets the task.
+        """
+        entry = DelayedTask(coroutine)
+        self.loop.call_soon_threadsafe(self.add, delay, entry)
+        entry.future.add_done_callback(lambda future: self.on_future_done(entry))
+
+        return entry.future
+
+    def on_future_done(self, entry: DelayedTask) -> None:
+        if entry.future.cancelled():
+            self.loop.call_soon_threadsafe(self.cancel, entry)
+
+    def add(self, delay: float, entry: DelayedTask) -> None:
+        if entry.future.cancelled():
+            return
+
+        heapq.heappush(self.heap, (self.loop.time() + delay, next(self.sequence), entry))
+        entry.in_heap = True
+        self.arm()
+
+    def cancel(self, entry: DelayedTask) -> None:
+        """Cancels the task of the given entry, if running, or discards it."""
+        if entry.task:
+            entry.task.cancel()
+            return
+
+        entry.coroutine.close()
+
+        if not entry.in_heap:
+            return
+
+        entry.discarded = True
+        self.cancelled_count += 1
+
+        if self.cancelled_count > len(self.heap) / 2:
+            self.compact()
+
+    def compact(self) -> None:
+        """Removes the cancelled entries from the heap."""
+        heap = []
+
+        for item in self.heap:
+            if item[2].future.cancelled():
+                item[2].in_heap = False
+            else:
+                heap.append(item)
+
+        heapq.heapify(heap)
+        self.heap, self.cancelled_count = heap, 0
+
+    def arm(self) -> None:
+        """Arms the loop timer for the earliest entry, if earlier than the armed one."""
+        if not self.heap or self.heap[0][0] >= self.timer_due_at:
+            return
+
+        if self.timer:
+            self.timer.cancel()
+
+        self.timer_due_at = self.heap[0][0]
+        self.timer = self.loop.call_at(self.timer_due_at, self.fire)
+
+    def fire(self) -> None:
+        """Starts the tasks that are due, and re-arms the loop timer."""
+        self.timer, self.timer_due_at = None, math.inf
+        now = self.loop.time()
+
+        while self.heap and self.heap[0][0] <= now:
+            _, _, entry = heapq.heappop(self.heap)
+            entry.in_heap = False
+
+            if entry.discarded:
+                self.cancelled_count -= 1
+            elif not entry.future.cancelled():
+                self.start(entry)
+
+        self.arm()
+
+    def start(self, entry: DelayedTask) -> None:
+        entry.task = self.loop.create_task(entry.coroutine)
+        entry.task.add_done_callback(lambda task: self.set_future_state(entry.future, task))
+
+    @staticmethod
+    def set_future_state(future: concurrent.futures.Future, task: asyncio.Task) -> None:
+        """Copies the final state of the given task into its future, unless this was cancelled."""
+        if task.cancelled():
+            future.cancel()
+
+        if not future.set_running_or_notify_cancel():
+            return
+
+        if task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
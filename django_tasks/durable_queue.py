@@ -0,0 +1,173 @@
+"""
+This module provides the :py:class:`django_tasks.durable_queue.DurableTaskQueue` class, the worker side of the
+durable queue mode, in which the :py:class:`django_tasks.models.DocTask` rows are the source of truth of the
+scheduled work.
+"""
+import asyncio
+import datetime
+import logging
+import os
+import socket
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+
+from django_tasks import models
+from django_tasks.scheduler import DocTaskScheduler
+from django_tasks.task_runner import TaskRunner
+from django_tasks.typing import DocTaskJSON
+
+
+class DurableTaskQueue:
+    """
+    Claims batches of queued doc-tasks from database, and runs them on the task runner, which records their
+    completion as usual. Any number of workers, in any number of nodes, may share the database.
+
+    Doc-tasks are claimed with `SELECT ... FOR UPDATE SKIP LOCKED` where the database supports it, so that
+    concurrent workers skip each other's rows instead of waiting; otherwise (SQLite) each row is claimed with a
+    compare-and-set `UPDATE`. Claims are leases, renewed while the doc-task runs, so that the doc-tasks of a
+    crashed worker are claimed again once their lease expires.
+
+    Each worker has up to "durable-claim-batch-size" doc-tasks claimed at a time, within the free run slots of
+    its task runner, and claims once per "durable-poll-interval". On shutdown, the claims of the doc-tasks still
+    running after the grace period are released; see :py:meth:`DurableTaskQueue.release_claims`.
+    """
+    model = models.DocTask
+
+    #: Status of the doc-tasks waiting in the durable queue.
+    queued_status = 'Queued'
+
+    def __init__(self, worker_name: str = ''):
+        self.worker_name = worker_name or f'{socket.gethostname()}:{os.getpid()}'
+        self.batch_size: int = settings.CHANNEL_TASKS.durable_claim_batch_size
+        self.poll_interval = settings.CHANNEL_TASKS.durable_poll_interval
+        self.lease_time = settings.CHANNEL_TASKS.durable_lease_time
+        self.claimed_ids: set[int] = set()
+        self.doctask_futures: dict[int, asyncio.Future] = {}
+        self.stopping = False
+        self.renewed_at = time.monotonic()
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: {self.worker_name}, claimed={len(self.claimed_ids)}>'
+
+    def stop(self) -> None:
+        """Stops claiming doc-tasks; those already claimed keep running."""
+        self.stopping = True
+
+    async def run(self) -> None:
+        """Claims and runs batches of queued doc-tasks, until stopped."""
+        logging.getLogger('django').info('Started durable queue worker %s.', self)
+
+        while not self.stopping:
+            claim_size = self.get_claim_size()
+            doctasks = await sync_to_async(self.claim_batch)(claim_size) if claim_size > 0 else []
+
+            for doctask in doctasks:
+                await self.run_doctask(doctask)
+
+            if time.monotonic() - self.renewed_at > self.lease_time / 3:
+                await sync_to_async(self.renew_leases)()
+
+            await asyncio.sleep(self.poll_interval)
+
+        logging.getLogger('django').info('Stopped durable queue worker %s.', self)
+
+    def get_claim_size(self) -> int:
+        """
+        Returns the number of doc-tasks to claim: the batch size minus the doc-tasks of this worker in flight,
+        bounded by the free run slots of the task runner if there is a global concurrency limit.
+        """
+        claim_size = self.batch_size - len(self.claimed_ids)
+        task_queue = TaskRunner.get().task_queue
+
+        if task_queue.max_running:
+            claim_size = min(claim_size, task_queue.max_running - task_queue.running_count - task_queue.pending_count)
+
+        return claim_size
+
+    def get_claimable(self, now: datetime.datetime):
+        """
+        Returns the queryset of queued doc-tasks not claimed, or whose claim has expired, by priority; delayed
+        doc-tasks are claimable from their run time on.
+        """
+        lease_start = now - datetime.timedelta(seconds=self.lease_time)
+
+        return self.model.objects.filter(
+            Q(claimed_at__isnull=True) | Q(claimed_at__lt=lease_start),
+            Q(run_at__isnull=True) | Q(run_at__lte=now),
+            status=self.queued_status, completed_at__isnull=True,
+        ).order_by('-priority', 'scheduled_at')
+
+    def claim_batch(self, size: int) -> list[models.DocTask]:
+        """Claims, and returns, up to `size` queued doc-tasks."""
+        now = timezone.now()
+        claimable = self.get_claimable(now)
+
+        with transaction.atomic():
+            if connection.features.has_select_for_update_skip_locked:
+                claimed_ids = list(claimable.select_for_update(skip_locked=True).values_list('pk', flat=True)[:size])
+                self.model.objects.filter(pk__in=claimed_ids).update(claimed_at=now, claimed_by=self.worker_name)
+            else:
+                claimed_ids = [pk for pk in claimable.values_list('pk', flat=True)[:size]
+                               if claimable.filter(pk=pk).update(claimed_at=now, claimed_by=self.worker_name)]
+
+        self.claimed_ids.update(claimed_ids)
+
+        return list(self.model.objects.filter(pk__in=claimed_ids).select_related('registered_task'))
+
+    def renew_leases(self) -> None:
+        """Renews the claims of the doc-tasks of this worker that are still running."""
+        self.model.objects.filter(pk__in=list(self.claimed_ids), claimed_by=self.worker_name).update(
+            claimed_at=timezone.now())
+        self.renewed_at = time.monotonic()
+
+    async def run_doctask(self, doctask: models.DocTask) -> None:
+        """Schedules the given claimed doc-task, or records its failure to schedule."""
+        valid_data: DocTaskJSON = {
+            'id': doctask.pk,
+            'registered_task': doctask.registered_task.dotted_path,
+            'inputs': doctask.inputs,
+            'priority': doctask.priority,
+            'timeout': doctask.timeout,
+        }
+        try:
+            task = await DocTaskScheduler.schedule_doctask(doctask.task_id, doctask.user_name, valid_data)
+        except APIException as error:
+            self.claimed_ids.discard(doctask.pk)
+            DocTaskScheduler.doctask_index.pop(doctask.task_id, None)
+            await doctask.on_completion({'status': 'Error', 'http_status': error.status_code,
+                                         'exception-repr': repr(error)})
+        else:
+            self.doctask_futures[doctask.pk] = task
+            task.add_done_callback(lambda tk: self.claimed_ids.discard(doctask.pk))
+            task.add_done_callback(lambda tk: self.doctask_futures.pop(doctask.pk, None))
+
+    async def release_claims(self, grace_period: float) -> None:
+        """
+        Waits up to `grace_period` seconds for the claimed doc-tasks to finish, then cancels the rest without
+        storing their cancellation, and releases their claims back to 'Queued' status, so that they run again in
+        another worker. Called on shutdown, once stopped, before the task runner drains.
+        """
+        doctask_futures = dict(self.doctask_futures)
+
+        if doctask_futures:
+            await asyncio.wait(doctask_futures.values(), timeout=grace_period)
+
+        released_ids = {pk for pk, future in doctask_futures.items() if not future.done()}
+
+        for task_id, doctask_id in list(DocTaskScheduler.doctask_index.items()):
+            if doctask_id in released_ids:
+                del DocTaskScheduler.doctask_index[task_id]
+
+        for pk in released_ids:
+            doctask_futures[pk].cancel()
+
+        await self.model.objects.filter(pk__in=released_ids, claimed_by=self.worker_name).aupdate(
+            claimed_at=None, claimed_by='', status=self.queued_status)
+        self.claimed_ids.difference_update(released_ids)
+        logging.getLogger('django').info('Released the claims of doc-tasks %s of %s.', sorted(released_ids), self)
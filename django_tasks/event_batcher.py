@@ -0,0 +1,125 @@
+"""
+This module provides the :py:class:`django_tasks.event_batcher.TaskEventBatcher` class, which coalesces
+the task events broadcasted by the task runner.
+"""
+from __future__ import annotations
+
+import asyncio
+import collections
+import logging
+import weakref
+
+from typing import Any, Optional
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from django_tasks import metrics
+from django_tasks.task_cache import TaskCache
+from django_tasks.typing import TaskMessageJSON
+
+
+class TaskEventBatcher:
+    """
+    Gathers the task events produced in an event loop within a short time window, and then sends them per user
+    group as a single `task.batch` message, caching them with a single cache write per user.
+
+    The window starts with the first event added, and the batch is flushed earlier if it reaches its maximum size;
+    these are the "broadcast-batch-window" and "broadcast-batch-size" settings, which trade latency for throughput.
+    Flushes may overlap, so the sends of each user are chained, each one waiting for the previous one of the same
+    user; thus the batches of a user are delivered in order.
+    """
+
+    #: Will hold the batcher of each event loop.
+    instances: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, TaskEventBatcher] = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def get(cls) -> TaskEventBatcher:
+        """Returns the batcher of the running event loop, creating it if necessary."""
+        loop = asyncio.get_running_loop()
+
+        if loop not in cls.instances:
+            cls.instances[loop] = cls(loop, settings.CHANNEL_TASKS.broadcast_batch_window,
+                                      settings.CHANNEL_TASKS.broadcast_batch_size)
+
+        return cls.instances[loop]
+
+    @classmethod
+    async def drain_running_loop(cls) -> None:
+        """Drains the batcher of the running event loop, if any."""
+        batcher = cls.instances.get(asyncio.get_running_loop())
+
+        if batcher:
+            await batcher.drain()
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, window: float, max_size: int):
+        self.loop = loop
+        self.window = window
+        self.max_size = max_size
+        self.events: collections.defaultdict[str, list[dict[str, Any]]] = collections.defaultdict(list)
+        self.size = 0
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.flush_tasks: set[asyncio.Task] = set()
+        self.last_sends: dict[str, asyncio.Task] = {}
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: window={self.window}s, max_size={self.max_size}, size={self.size}>'
+
+    def add(self, user_name: str, task_event: dict[str, Any]) -> None:
+        """Adds the given event to the batch of the user, and schedules the flush of the batches."""
+        self.events[user_name].append(task_event)
+        self.size += 1
+
+        if self.size >= self.max_size:
+            self.schedule_flush()
+        elif self.flush_handle is None:
+            self.flush_handle = self.loop.call_later(self.window, self.schedule_flush)
+
+    def schedule_flush(self) -> None:
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+
+        flush_task = self.loop.create_task(self.flush())
+        self.flush_tasks.add(flush_task)
+        flush_task.add_done_callback(self.flush_tasks.discard)
+
+    async def drain(self) -> None:
+        """Flushes the events gathered so far, and waits for all the ongoing flushes."""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+
+        await self.flush()
+        await asyncio.gather(*self.flush_tasks)
+
+    async def flush(self) -> None:
+        """Caches and sends the batches of events gathered so far, each one after the previous one of its user."""
+        events, self.events, self.size = self.events, collections.defaultdict(list), 0
+        await asyncio.gather(*[self.chain_send(user_name, user_events) for user_name, user_events in events.items()])
+
+        logging.getLogger('django').debug('Flushed %s task events of %s users.', sum(map(len, events.values())),
+                                          len(events))
+
+    def chain_send(self, user_name: str, user_events: list[dict[str, Any]]) -> asyncio.Task:
+        """Starts the send of the given batch of the user, after the previous one, and returns its task."""
+        send_task = self.loop.create_task(self.send(user_name, user_events, self.last_sends.get(user_name)))
+        self.last_sends[user_name] = send_task
+        send_task.add_done_callback(lambda task: self.discard_last_send(user_name, task))
+
+        return send_task
+
+    def discard_last_send(self, user_name: str, send_task: asyncio.Task) -> None:
+        if self.last_sends.get(user_name) is send_task:
+            del self.last_sends[user_name]
+
+    async def send(self, user_name: str, user_events: list[dict[str, Any]], previous: Optional[asyncio.Task]) -> None:
+        """Caches and sends the given batch of events of the user, once the previous send, if any, is done."""
+        if previous:
+            await asyncio.wait([previous])
+
+        with metrics.broadcast_latency.time():
+            task_infos: list[TaskMessageJSON] = [event['content'] for event in user_events]
+            TaskCache(user_name).cache_task_events(task_infos)
+            await get_channel_layer().group_send(f'{user_name}_{settings.CHANNEL_TASKS.channel_group}',
+                                                 {'type': 'task.batch', 'content': user_events})
@@ -0,0 +1,54 @@
+"""
+This module provides the :py:class:`django_tasks.lifespan.TaskRunnerLifespan` ASGI application, which handles
+the ASGI lifespan protocol in order to drain the task runner on shutdown.
+"""
+import asyncio
+import logging
+
+from typing import Optional
+
+from django.conf import settings
+
+from django_tasks.durable_queue import DurableTaskQueue
+from django_tasks.task_runner import TaskRunner
+
+
+class TaskRunnerLifespan:
+    """
+    ASGI application for the `lifespan` scope: on server startup, starts a durable queue worker if the
+    "durable-task-queue" setting is on and there are no standalone task workers. On server shutdown, stops it,
+    releasing its claims of the doc-tasks still running, and drains the task runner within the
+    "shutdown-grace-period" setting before the process exits, so that no task ends without its final status being
+    broadcasted, cached and stored.
+    See :py:meth:`django_tasks.task_runner.TaskRunner.drain`.
+    """
+
+    def __init__(self):
+        self.durable_queue: Optional[DurableTaskQueue] = None
+        self.durable_queue_task: Optional[asyncio.Task] = None
+
+    async def __call__(self, scope, receive, send):
+        while True:
+            message = await receive()
+
+            if message['type'] == 'lifespan.startup':
+                if settings.CHANNEL_TASKS.durable_task_queue and not settings.CHANNEL_TASKS.task_worker_channel:
+                    self.durable_queue = DurableTaskQueue()
+                    self.durable_queue_task = asyncio.create_task(self.durable_queue.run())
+
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                try:
+                    if self.durable_queue and self.durable_queue_task:
+                        self.durable_queue.stop()
+                        await self.durable_queue_task
+                        await self.durable_queue.release_claims(settings.CHANNEL_TASKS.shutdown_grace_period)
+
+                    if TaskRunner.instances:
+                        await TaskRunner.instances[-1].drain(settings.CHANNEL_TASKS.shutdown_grace_period)
+                except Exception as error:
+                    logging.getLogger('django').exception('Task runner drain failed.')
+                    await send({'type': 'lifespan.shutdown.failed', 'message': repr(error)})
+                else:
+                    await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -0,0 +1,90 @@
+"""
+This module provides the :py:class:`django_tasks.local_cache.LocalTaskCache` class, the process-local layer in
+front of the task event cache; see :py:class:`django_tasks.task_cache.TaskCache`.
+"""
+from __future__ import annotations
+
+import collections
+import threading
+import time
+
+from typing import Any, Hashable, Optional
+
+from django.conf import settings
+
+from django_tasks import metrics
+
+
+class LocalTaskCache:
+    """
+    Thread-safe, size-bounded LRU cache of the task event reads of this process, of up to "task-cache-l1-size"
+    entries, keyed by user name first. Entries are hit with no cache round trip until they expire, after
+    "task-cache-l1-max-age" seconds, or are invalidated by a write of the task events of their user in this
+    process; so that the writes of other processes, and the expiry of finished tasks, are seen within that time.
+
+    The hits and misses are counted, as the hit rate here and as the `channel_tasks_task_cache_l1_lookups_total`
+    metric. Cached values are shared, and must not be modified.
+    """
+
+    #: Will hold the instance of the process, if enabled.
+    instance: Optional[LocalTaskCache] = None
+
+    @classmethod
+    def get(cls) -> Optional[LocalTaskCache]:
+        """Returns the local cache of this process, creating it if necessary, or `None` if it is disabled."""
+        if settings.CHANNEL_TASKS.task_cache_l1_size <= 0:
+            return None
+
+        if cls.instance is None:
+            cls.instance = cls(settings.CHANNEL_TASKS.task_cache_l1_size, settings.CHANNEL_TASKS.task_cache_l1_max_age)
+
+        return cls.instance
+
+    def __init__(self, max_size: int, max_age: float):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.entries: collections.OrderedDict[tuple[Hashable, ...], tuple[float, Any]] = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return (f'<{self.__class__.__name__}: size={len(self.entries)}/{self.max_size}, '
+                f'hit_rate={self.hit_rate:.2f}>')
+
+    @property
+    def hit_rate(self) -> float:
+        """The ratio of hits to lookups, 0 if there were no lookups."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def lookup(self, key: tuple[Hashable, ...]) -> Optional[Any]:
+        """Returns the value of the given key if cached and not expired, or `None`."""
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry and time.monotonic() - entry[0] < self.max_age:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            else:
+                entry = None
+                self.misses += 1
+
+        metrics.task_cache_l1_lookups.inc('hit' if entry else 'miss')
+
+        return entry[1] if entry else None
+
+    def store(self, key: tuple[Hashable, ...], value: Any) -> None:
+        """Caches the given value, evicting the least recently used entries if full."""
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_name: str) -> None:
+        """Drops the entries of the given user."""
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == user_name]:
+                del self.entries[key]
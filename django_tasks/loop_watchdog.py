@@ -0,0 +1,98 @@
+"""
+This module provides the :py:class:`django_tasks.loop_watchdog.LoopWatchdog` class, which monitors the lag of
+the worker event loops of the task runner, and detects the task callbacks that block them.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from typing import TYPE_CHECKING
+
+from django_tasks import metrics
+
+if TYPE_CHECKING:
+    from django_tasks.task_runner import TaskRunner, TaskWorker
+
+
+class LoopWatchdog:
+    """
+    Runs a heartbeat coroutine in each worker loop, which measures the loop lag as the delay of its periodic
+    wake-up, and a watchdog thread that checks the heartbeats.
+
+    When a worker loop misses its heartbeat for longer than `threshold` seconds, a single callback is blocking it;
+    the stack of the worker thread is then captured and logged as a warning, together with the ID and dotted path
+    of the task running, once per blocking call. This does not require the debug mode of the loops.
+    """
+
+    def __init__(self, runner: TaskRunner, interval: float, threshold: float):
+        """
+        :param runner: The task runner whose worker loops are monitored.
+        :param interval: Period of the heartbeats, in seconds.
+        :param threshold: Blocking time, in seconds, above which a blocking call is reported.
+        """
+        self.runner = runner
+        self.interval = interval
+        self.threshold = threshold
+        self.heartbeats: dict[str, float] = {}
+        self.reported_heartbeats: dict[str, float] = {}
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.watch, name='LoopWatchdog', daemon=True)
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: interval={self.interval}s, threshold={self.threshold}s>'
+
+    def start(self) -> None:
+        """Schedules the heartbeats in the worker loops, and starts the watchdog thread."""
+        for worker in self.runner.workers:
+            self.heartbeats[worker.thread.name] = time.monotonic()
+            asyncio.run_coroutine_threadsafe(self.heartbeat(worker), worker.event_loop)
+
+        self.thread.start()
+        logging.getLogger('django').debug('Started %s.', self)
+
+    def stop(self) -> None:
+        """Stops the heartbeats and the watchdog thread, at their next wake-up."""
+        self.stopping.set()
+        logging.getLogger('django').debug('Stopped %s.', self)
+
+    async def heartbeat(self, worker: TaskWorker) -> None:
+        """Measures the lag of the running loop continuously, exporting it as the `loop_lag` metric."""
+        while not self.stopping.is_set():
+            expected_at = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            metrics.loop_lag.set(worker.thread.name, value=now - expected_at)
+            self.heartbeats[worker.thread.name] = now
+
+    def watch(self) -> None:
+        while not self.stopping.wait(self.interval):
+            for worker in self.runner.workers:
+                if worker.thread.is_alive():
+                    self.check_heartbeat(worker)
+
+    def check_heartbeat(self, worker: TaskWorker) -> None:
+        """Reports the callback blocking the loop of the given worker, if any, once per blocking call."""
+        last_heartbeat = self.heartbeats[worker.thread.name]
+        blocked_time = time.monotonic() - last_heartbeat - self.interval
+
+        if blocked_time <= self.threshold:
+            return
+
+        metrics.loop_lag.set(worker.thread.name, value=blocked_time)
+
+        if self.reported_heartbeats.get(worker.thread.name) == last_heartbeat:
+            return
+
+        self.reported_heartbeats[worker.thread.name] = last_heartbeat
+        frame = sys._current_frames().get(worker.thread.ident or 0)
+        stack = ''.join(traceback.format_stack(frame)) if frame else '<no stack found>\n'
+        task = asyncio.current_task(worker.event_loop)
+        task_id, registered_task = self.runner.running_tasks.get(task, ('', '')) if task else ('', '')
+        logging.getLogger('django').warning(
+            'Worker loop of %s blocked for %.3fs by task %s (%s), of %s:\n%s',
+            worker.thread.name, blocked_time, task_id, registered_task, task, stack)
@@ -0,0 +1,55 @@
+import asyncio
+import multiprocessing
+import signal
+
+import django
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def run_worker_process(worker_channel: str) -> None:
+    """Target of the task worker processes, which are started with the 'spawn' method."""
+    django.setup()
+
+    from django_tasks.worker_process import TaskWorkerProcess
+
+    asyncio.run(TaskWorkerProcess(worker_channel).run())
+
+
+class Command(BaseCommand):
+    help = ('Runs the given number of standalone task worker processes, consuming the schedule requests sent '
+            'through the "task-worker-channel" channel.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Number of worker processes.')
+
+    def handle(self, *args, **options):
+        worker_channel = settings.CHANNEL_TASKS.task_worker_channel
+
+        if not worker_channel:
+            raise CommandError('The "task-worker-channel" setting is required to run task workers.')
+
+        if options['processes'] < 1:
+            raise CommandError('At least 1 worker process is required.')
+
+        if options['processes'] == 1:
+            run_worker_process(worker_channel)
+            return
+
+        context = multiprocessing.get_context('spawn')
+        processes = [context.Process(target=run_worker_process, args=(worker_channel,), name=f'TaskWorkerProcess-{n}')
+                     for n in range(options['processes'])]
+
+        for process in processes:
+            process.start()
+
+        def terminate_processes(signal_number, frame):
+            for process in processes:
+                process.terminate()
+
+        signal.signal(signal.SIGTERM, terminate_processes)
+        self.stdout.write(f'Started {len(processes)} task worker processes on channel {worker_channel}.')
+
+        for process in processes:
+            process.join()
@@ -0,0 +1,181 @@
+"""
+This module provides the runtime metrics of the task runner, and their rendering in the Prometheus text
+exposition format; see the :py:class:`django_tasks.consumers.MetricsHttpConsumer`.
+"""
+from __future__ import annotations
+
+import abc
+import bisect
+import collections
+import threading
+import time
+
+from typing import Iterator, Optional, TypeVar
+
+
+class Metric(metaclass=abc.ABCMeta):
+    """Base class of the metrics, which hold their values per tuple of label values, thread-safe."""
+    type_name = 'untyped'
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: {self.name}>'
+
+    def format_labels(self, label_values: tuple[str, ...], **extra_labels: str) -> str:
+        labels = {**dict(zip(self.label_names, label_values)), **extra_labels}
+
+        if not labels:
+            return ''
+
+        return '{' + ','.join(f'{name}="{escape_label_value(value)}"' for name, value in labels.items()) + '}'
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.type_name}'
+        yield from self.render_samples()
+
+    @abc.abstractmethod
+    def render_samples(self) -> Iterator[str]:
+        """Yield the sample lines of this metric, one per tuple of label values, or more for histograms."""
+
+
+class Counter(Metric):
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        super().__init__(name, documentation, label_names)
+        self.values: collections.defaultdict[tuple[str, ...], float] = collections.defaultdict(float)
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self.lock:
+            self.values[label_values] += amount
+
+    def render_samples(self) -> Iterator[str]:
+        with self.lock:
+            values = list(self.values.items())
+
+        for label_values, value in values:
+            yield f'{self.name}{self.format_labels(label_values)} {value}'
+
+
+class Gauge(Counter):
+    type_name = 'gauge'
+
+    def set(self, *label_values: str, value: float) -> None:
+        with self.lock:
+            self.values[label_values] = value
+
+
+class Histogram(Metric):
+    """Cumulative histogram metric, with the given upper bounds of its buckets, in seconds by default."""
+    type_name = 'histogram'
+
+    #: Default bucket upper bounds, for latencies in seconds.
+    default_buckets: tuple[float, ...] = (.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 300)
+
+    def __init__(self,
+                 name: str,
+                 documentation: str,
+                 label_names: tuple[str, ...] = (),
+                 buckets: Optional[tuple[float, ...]] = None):
+        super().__init__(name, documentation, label_names)
+        self.buckets = buckets or self.default_buckets
+        self.counts: dict[tuple[str, ...], list[int]] = {}
+        self.sums: collections.defaultdict[tuple[str, ...], float] = collections.defaultdict(float)
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self.lock:
+            if label_values not in self.counts:
+                self.counts[label_values] = [0] * (len(self.buckets) + 1)
+
+            self.counts[label_values][index] += 1
+            self.sums[label_values] += value
+
+    def time(self, *label_values: str) -> Timer:
+        """Returns a context manager that observes the duration of its block."""
+        return Timer(self, label_values)
+
+    def render_samples(self) -> Iterator[str]:
+        with self.lock:
+            samples = [(label_values, list(counts), self.sums[label_values])
+                       for label_values, counts in self.counts.items()]
+
+        for label_values, counts, total in samples:
+            cumulative_count = 0
+
+            for upper_bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative_count += count
+                labels = self.format_labels(label_values, le=str(upper_bound))
+                yield f'{self.name}_bucket{labels} {cumulative_count}'
+
+            yield f'{self.name}_sum{self.format_labels(label_values)} {total}'
+            yield f'{self.name}_count{self.format_labels(label_values)} {cumulative_count}'
+
+
+class Timer:
+    def __init__(self, histogram: Histogram, label_values: tuple[str, ...]):
+        self.histogram = histogram
+        self.label_values = label_values
+        self.started_at = 0.0
+
+    def __enter__(self) -> Timer:
+        self.started_at = time.monotonic()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.monotonic() - self.started_at, *self.label_values)
+
+
+MetricType = TypeVar('MetricType', bound=Metric)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: MetricType) -> MetricType:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Returns all the metrics in the Prometheus text exposition format."""
+        return '\n'.join(line for metric in self.metrics for line in metric.render()) + '\n'
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+registry = MetricsRegistry()
+
+queue_wait = registry.register(Histogram(
+    'channel_tasks_queue_wait_seconds', 'Time from schedule to task start.', ('registered_task',)))
+run_duration = registry.register(Histogram(
+    'channel_tasks_run_duration_seconds', 'Run time of the tasks.', ('registered_task',)))
+completed_tasks = registry.register(Counter(
+    'channel_tasks_completed_total', 'Count of finished tasks, by final status.', ('registered_task', 'status')))
+in_flight_tasks = registry.register(Gauge(
+    'channel_tasks_in_flight', 'Count of scheduled tasks not yet finished, per worker thread.', ('worker',)))
+loop_lag = registry.register(Gauge(
+    'channel_tasks_loop_lag_seconds', 'Last measured lag of the worker event loop, per worker thread.', ('worker',)))
+broadcast_latency = registry.register(Histogram(
+    'channel_tasks_broadcast_seconds', 'Time to cache and send a task event, or a batch of them.'))
+cache_write_latency = registry.register(Histogram(
+    'channel_tasks_cache_write_seconds', 'Time to write task events in the task cache.'))
+doctask_store_latency = registry.register(Histogram(
+    'channel_tasks_doctask_store_seconds', 'Time to store a doc-task progress or result in database.'))
+result_cache_lookups = registry.register(Counter(
+    'channel_tasks_result_cache_lookups_total', 'Count of task result cache lookups, by result (hit or miss).',
+    ('registered_task', 'result')))
+throttled_requests = registry.register(Counter(
+    'channel_tasks_throttled_requests_total', 'Count of schedule requests rejected by the user rate limit.'))
+task_cache_l1_lookups = registry.register(Counter(
+    'channel_tasks_task_cache_l1_lookups_total', 'Count of process-local task cache lookups, by result (hit or miss).',
+    ('result',)))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctask',
+            name='priority',
+            field=models.IntegerField(default=0),
+        ),
+    ]
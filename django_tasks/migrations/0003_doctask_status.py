@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_tasks', '0002_doctask_priority'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctask',
+            name='status',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_tasks', '0003_doctask_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctask',
+            name='timeout',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_tasks', '0004_doctask_timeout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctask',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctask',
+            name='claimed_by',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='doctask',
+            name='task_id',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='doctask',
+            name='user_name',
+            field=models.CharField(blank=True, default='', max_length=150),
+        ),
+        migrations.AddIndex(
+            model_name='doctask',
+            index=models.Index(fields=['status', 'claimed_at'], name='doctask_claim_idx'),
+        ),
+    ]
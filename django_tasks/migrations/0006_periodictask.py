@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:22
+
+import django.db.models.deletion
+import django_tasks.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_tasks', '0005_doctask_durable_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodicTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('inputs', models.JSONField(default=dict, encoder=django_tasks.models.DefensiveJsonEncoder)),
+                ('interval', models.FloatField(blank=True, help_text='Seconds between runs.', null=True)),
+                ('cron', models.CharField(blank=True, default='', help_text='Cron expression of the runs.', max_length=100)),
+                ('user_name', models.CharField(blank=True, default='', help_text='User notified of the runs.', max_length=150)),
+                ('priority', models.IntegerField(default=0)),
+                ('timeout', models.FloatField(blank=True, null=True)),
+                ('enabled', models.BooleanField(default=True)),
+                ('catch_up', models.BooleanField(default=False)),
+                ('allow_overlap', models.BooleanField(default=False)),
+                ('next_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('last_status', models.CharField(blank=True, default='', max_length=16)),
+                ('registered_task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='django_tasks.registeredtask')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['enabled', 'next_run_at'], name='periodictask_due_idx')],
+            },
+        ),
+    ]
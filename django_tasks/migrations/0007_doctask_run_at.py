@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_tasks', '0006_periodictask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctask',
+            name='run_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:48
+
+import django.db.models.deletion
+import django.utils.timezone
+import django_tasks.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_tasks', '0007_doctask_run_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocTaskProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('status_data', models.JSONField(default=dict, encoder=django_tasks.models.DefensiveJsonEncoder)),
+                ('doctask', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='django_tasks.doctask')),
+            ],
+            options={
+                'verbose_name_plural': 'doc-task progress',
+            },
+        ),
+    ]
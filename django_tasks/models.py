@@ -1,12 +1,17 @@
+import datetime
 import inspect
 import json
 import logging
 
 from typing import Callable
 
-from django.db.models import Model, CharField, DateTimeField, JSONField, ForeignKey, CASCADE
+from django.core.exceptions import ValidationError
+from django.db.models import (
+    Model, BooleanField, CharField, DateTimeField, FloatField, IntegerField, JSONField, ForeignKey, Index, CASCADE)
 from django.utils import timezone
 
+from django_tasks.cron import CronExpression
+
 
 class DefensiveJsonEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -26,7 +31,7 @@ class RegisteredTask(Model):
     @classmethod
     def register(cls, callable: Callable) -> Callable:
         """
-        Registers the given coroutine function in database.
+        Registers the given coroutine (or async-generator) function in database.
 
         Usage is as follows::
 
@@ -35,13 +40,15 @@ class RegisteredTask(Model):
 
         after Django model setup.
 
-        Raises `AssertionError` if `callable` is not a coroutine function.
+        Raises `AssertionError` if `callable` is not a coroutine or async-generator function.
         """
-        assert inspect.iscoroutinefunction(callable), 'The function must be a coroutine'
+        assert inspect.iscoroutinefunction(callable) or inspect.isasyncgenfunction(callable), (
+            'The function must be a coroutine or an async generator')
+
+        module_spec = getattr(inspect.getmodule(callable), '__spec__', None)
+        assert module_spec, 'The function must be defined in an importable module'
 
-        instance, created = cls.objects.get_or_create(
-            dotted_path=f'{inspect.getmodule(callable).__spec__.name}.{callable.__name__}'
-        )
+        instance, created = cls.objects.get_or_create(dotted_path=f'{module_spec.name}.{callable.__name__}')
         msg = 'Registered new task %s' if created else 'Task %s already registered'
         logging.getLogger('django').info(msg, instance)
 
@@ -55,10 +62,21 @@ class DocTask(Model):
     completed_at: DateTimeField = DateTimeField(null=True)
     inputs: JSONField = JSONField(default=dict, encoder=DefensiveJsonEncoder)
     document: JSONField = JSONField(default=list, encoder=DefensiveJsonEncoder)
+    priority: IntegerField = IntegerField(default=0)
+    status: CharField = CharField(max_length=16, blank=True, default='')
+    timeout: FloatField = FloatField(null=True, blank=True)
+    task_id: CharField = CharField(max_length=200, blank=True, default='')
+    user_name: CharField = CharField(max_length=150, blank=True, default='')
+    claimed_at: DateTimeField = DateTimeField(null=True, blank=True)
+    claimed_by: CharField = CharField(max_length=100, blank=True, default='')
+    run_at: DateTimeField = DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [Index(fields=['status', 'claimed_at'], name='doctask_claim_idx')]
 
     def __str__(self):
         return f'Doc-task {self.pk}, ' + (
-            f'completed at {self.completed_at}, took {self.duration}' if self.completed_at
+            f'completed ({self.status}) at {self.completed_at}, took {self.duration}' if self.completed_at
             else f'running for {self.duration}')
 
     @property
@@ -66,6 +84,102 @@ class DocTask(Model):
         return (self.completed_at if self.completed_at else timezone.now()) - self.scheduled_at
 
     async def on_completion(self, task_info):
+        """Marks this doc-task as completed with the final status in `task_info`, and documents it."""
         self.completed_at = timezone.now()
+        self.status = task_info.get('status', '')
         self.document.append(task_info)
         await self.asave()
+
+
+class DocTaskProgress(Model):
+    """
+    Intermediate status data of a doc-task run, of task progress or retry, stored as a row of its own when it
+    happens; so that the outputs streamed by async-generator tasks are not buffered in the doc-task document.
+    """
+    doctask: ForeignKey = ForeignKey(DocTask, on_delete=CASCADE, related_name='progress')
+    created_at: DateTimeField = DateTimeField(default=timezone.now)
+    status_data: JSONField = JSONField(default=dict, encoder=DefensiveJsonEncoder)
+
+    class Meta:
+        verbose_name_plural = 'doc-task progress'
+
+    def __str__(self):
+        return f'Doc-task progress {self.pk} ({self.status_data.get("status", "")}) at {self.created_at}'
+
+
+class PeriodicTask(Model):
+    """
+    Schedule of the periodic runs of a registered task, every `interval` seconds or at the times matching the
+    `cron` expression (see :py:class:`django_tasks.cron.CronExpression`), with the given inputs. The runs are fired
+    by the task runner; see :py:class:`django_tasks.periodic_scheduler.PeriodicScheduler`.
+
+    With `catch_up`, the runs missed while no task runner was firing are fired one by one afterwards; otherwise,
+    a single run is fired for them. Unless `allow_overlap` is set, a run is skipped while the previous one is still
+    running.
+    """
+    name: CharField = CharField(max_length=100, unique=True)
+    registered_task: ForeignKey = ForeignKey(RegisteredTask, on_delete=CASCADE)
+    inputs: JSONField = JSONField(default=dict, encoder=DefensiveJsonEncoder)
+    interval: FloatField = FloatField(null=True, blank=True, help_text='Seconds between runs.')
+    cron: CharField = CharField(max_length=100, blank=True, default='', help_text='Cron expression of the runs.')
+    user_name: CharField = CharField(max_length=150, blank=True, default='', help_text='User notified of the runs.')
+    priority: IntegerField = IntegerField(default=0)
+    timeout: FloatField = FloatField(null=True, blank=True)
+    enabled: BooleanField = BooleanField(default=True)
+    catch_up: BooleanField = BooleanField(default=False)
+    allow_overlap: BooleanField = BooleanField(default=False)
+    next_run_at: DateTimeField = DateTimeField(null=True, blank=True)
+    last_run_at: DateTimeField = DateTimeField(null=True, blank=True)
+    last_completed_at: DateTimeField = DateTimeField(null=True, blank=True)
+    last_status: CharField = CharField(max_length=16, blank=True, default='')
+
+    class Meta:
+        indexes = [Index(fields=['enabled', 'next_run_at'], name='periodictask_due_idx')]
+
+    def __str__(self):
+        return f'Periodic task {self.name} ({self.cron or f"every {self.interval}s"}), next run at {self.next_run_at}'
+
+    def clean(self):
+        if (self.interval is None) == (not self.cron):
+            raise ValidationError('Exactly one of interval and cron must be set.')
+
+        if self.interval is not None and self.interval <= 0:
+            raise ValidationError({'interval': 'The interval must be positive.'})
+
+        if self.cron:
+            try:
+                CronExpression(self.cron)
+            except ValueError as error:
+                raise ValidationError({'cron': str(error)})
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.saved_schedule = (self.interval, self.cron)
+
+    def save(self, *args, **kwargs):
+        """
+        Sets the next run time as the next one from now, if not set or if the `interval` or `cron` schedule
+        has changed since loaded.
+        """
+        if self.next_run_at is None or (self.pk and (self.interval, self.cron) != self.saved_schedule):
+            self.next_run_at = self.get_next_run_at(timezone.now())
+
+        super().save(*args, **kwargs)
+        self.saved_schedule = (self.interval, self.cron)
+
+    def get_next_run_at(self, after: datetime.datetime) -> datetime.datetime:
+        """Returns the time of the run that follows the given time."""
+        if self.cron:
+            return CronExpression(self.cron).get_next(timezone.localtime(after))
+
+        return after + datetime.timedelta(seconds=self.interval)
+
+    def is_running(self, now: datetime.datetime, lease: float) -> bool:
+        """
+        Whether the last run is still running at `now`, as recorded in database; runs older than the given
+        `lease`, in seconds, are taken as finished, so that a crashed task runner does not block the schedule.
+        """
+        if self.last_run_at is None or (self.last_completed_at and self.last_completed_at >= self.last_run_at):
+            return False
+
+        return bool(now - self.last_run_at < datetime.timedelta(seconds=lease))
@@ -0,0 +1,116 @@
+"""
+This module provides the :py:class:`django_tasks.periodic_scheduler.PeriodicScheduler` class, the timer of the
+task runner that fires the runs of the :py:class:`django_tasks.models.PeriodicTask` schedules.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import threading
+import uuid
+
+from typing import TYPE_CHECKING
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+
+from django_tasks import models
+from django_tasks.task_inspector import get_task_coro
+from django_tasks.typing import TaskStatusJSON
+
+if TYPE_CHECKING:
+    from django_tasks.task_runner import TaskRunner
+
+
+class PeriodicScheduler:
+    """
+    Evaluates the enabled periodic tasks every `interval` seconds, in a worker loop of the task runner, and runs
+    those due in-process, notifying their user as usual.
+
+    Each run is claimed with a compare-and-set `UPDATE` of the next run time of its periodic task, so that only
+    one of the task runners sharing the database (as those of several ASGI units) fires it.
+    """
+    model = models.PeriodicTask
+
+    def __init__(self, runner: TaskRunner, interval: float):
+        self.runner = runner
+        self.interval = interval
+        self.stopping = threading.Event()
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: interval={self.interval}s>'
+
+    def start(self) -> None:
+        """Schedules the timer in the first worker loop of the task runner."""
+        asyncio.run_coroutine_threadsafe(self.run(), self.runner.worker_event_loop)
+        logging.getLogger('django').debug('Started %s.', self)
+
+    def stop(self) -> None:
+        """Stops the timer, so that no more runs are fired; the runs already fired go on."""
+        self.stopping.set()
+        logging.getLogger('django').debug('Stopped %s.', self)
+
+    async def run(self) -> None:
+        while not self.stopping.is_set():
+            try:
+                for periodic_task in await sync_to_async(self.claim_due_runs)():
+                    await self.fire(periodic_task)
+            except Exception as error:
+                logging.getLogger('django').exception('Failed to fire periodic task runs: %s', error)
+
+            await asyncio.sleep(self.interval)
+
+    def claim_due_runs(self) -> list[models.PeriodicTask]:
+        """
+        Advances the next run time of the due periodic tasks, and returns those whose run this task runner has
+        claimed. The runs that would overlap a running one are skipped, unless overlap is allowed.
+        """
+        now = timezone.now()
+        claimed = []
+
+        for periodic_task in self.model.objects.filter(enabled=True, next_run_at__lte=now).select_related(
+                'registered_task'):
+            next_run_at = periodic_task.get_next_run_at(periodic_task.next_run_at if periodic_task.catch_up else now)
+            lease = self.runner.get_task_timeout(periodic_task.registered_task.dotted_path, periodic_task.timeout)
+            overlaps = not periodic_task.allow_overlap and periodic_task.is_running(
+                now, settings.CHANNEL_TASKS.periodic_run_lease if lease is None else lease)
+            updates = {'next_run_at': next_run_at} if overlaps else {'next_run_at': next_run_at, 'last_run_at': now}
+
+            if not self.model.objects.filter(pk=periodic_task.pk, next_run_at=periodic_task.next_run_at).update(
+                    **updates):
+                continue
+
+            if overlaps:
+                logging.getLogger('django').info('Skipped run of %s, overlapping a running one.', periodic_task)
+            else:
+                claimed.append(periodic_task)
+
+        return claimed
+
+    async def fire(self, periodic_task: models.PeriodicTask) -> None:
+        """Schedules a run of the given periodic task, or records its failure to schedule."""
+        registered_task = periodic_task.registered_task.dotted_path
+        task_id = f'{uuid.uuid4().hex}.0'
+        on_completion = functools.partial(self.on_completion, periodic_task.pk)
+        try:
+            task_coro = get_task_coro(registered_task, periodic_task.inputs)
+            await self.runner.schedule(
+                self.runner.get_coroutine(task_coro), on_completion,
+                task_id=task_id, user_name=periodic_task.user_name, registered_task=registered_task,
+                priority=periodic_task.priority, timeout=periodic_task.timeout,
+                coroutine_factory=functools.partial(self.runner.get_coroutine, task_coro), inputs=task_coro.inputs,
+            )
+        except APIException as error:
+            logging.getLogger('django').error('Failed to schedule run of %s: %r', periodic_task, error)
+            await on_completion(task_id, {'status': 'Error', 'http_status': error.status_code,
+                                          'exception-repr': repr(error)})
+        else:
+            logging.getLogger('django').info('Fired run %s of %s.', task_id, periodic_task)
+
+    async def on_completion(self, periodic_task_id: int, task_id: str, task_info: TaskStatusJSON) -> None:
+        """Records the completion of a run of the periodic task with the given database ID."""
+        await self.model.objects.filter(pk=periodic_task_id).aupdate(
+            last_completed_at=timezone.now(), last_status=task_info.get('status', ''))
@@ -0,0 +1,58 @@
+"""
+This module provides the :py:class:`django_tasks.process_pool.TaskProcessPool` class, a pool of warm worker
+processes where CPU-bound registered tasks run, so that they do not hold the GIL of the task runner.
+"""
+import asyncio
+import concurrent.futures
+import inspect
+import logging
+import multiprocessing
+import os
+
+import django
+
+from django_tasks.task_inspector import get_task_coro
+from django_tasks.typing import JSON
+
+
+def setup_process() -> None:
+    """Initializer of the pool processes, performing the Django setup."""
+    django.setup()
+
+
+def run_task(registered_task: str, inputs: dict[str, JSON]) -> JSON:
+    """Runs the specified task coroutine to completion in a new event loop of the current process."""
+    coroutine = get_task_coro(registered_task, inputs).coroutine
+    assert inspect.iscoroutine(coroutine), 'Async-generator tasks cannot run in the process pool'
+    output: JSON = asyncio.run(coroutine)
+    return output
+
+
+class TaskProcessPool:
+    """
+    Wraps a :py:class:`concurrent.futures.ProcessPoolExecutor` whose processes are started with the 'spawn' method,
+    since the task runner process is multi-threaded, and are started up front so that tasks find them warm.
+
+    Task outputs must be picklable; note that cancelling a task does not interrupt its run in the pool process.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=size, mp_context=multiprocessing.get_context('spawn'), initializer=setup_process)
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: size={self.size}>'
+
+    def warm_up(self) -> None:
+        """Starts all the pool processes, without waiting for them."""
+        for _ in range(self.size):
+            self.executor.submit(os.getpid)
+
+        logging.getLogger('django').debug('Warming up %s.', self)
+
+    async def run(self, registered_task: str, inputs: dict[str, JSON]) -> JSON:
+        """Runs the specified task in a pool process, and returns its output."""
+        output: JSON = await asyncio.get_running_loop().run_in_executor(
+            self.executor, run_task, registered_task, inputs)
+        return output
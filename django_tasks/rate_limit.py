@@ -0,0 +1,103 @@
+"""
+This module provides the :py:class:`django_tasks.rate_limit.UserRateLimiter` class, which throttles the schedule
+requests of each user at the consumers; see the "user-rate-limit" setting.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled
+
+from django_tasks import metrics
+
+
+class TooManyTasks(APIException):
+    """Raised when a request holds more tasks than the bucket capacity of its user, so that it could never pass."""
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Too many tasks in one request for the rate limit.'
+    default_code = 'too_many_tasks'
+
+
+class TokenBucket:
+    """Token bucket refilled with `rate` tokens per second, up to its `capacity`; starts full."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: {self.tokens:.1f}/{self.capacity}, rate={self.rate}/s>'
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def take(self, count: int) -> float:
+        """
+        Takes `count` tokens, up to the capacity, and returns 0, if available; otherwise, takes none and returns
+        the time, in seconds, to wait for them.
+        """
+        self.refill(time.monotonic())
+
+        if self.tokens >= count:
+            self.tokens -= count
+            return 0.0
+
+        return (count - self.tokens) / self.rate
+
+    def is_idle(self, now: float) -> bool:
+        """Whether the bucket would be full at the given time, so that it may be dropped."""
+        return self.tokens + (now - self.updated_at) * self.rate >= self.capacity
+
+
+class UserRateLimiter:
+    """
+    Thread-safe registry of the token buckets of the users, in this process. Each scheduled task takes a token of
+    its user, so that arrays of tasks are charged by their length. Full buckets are dropped once there are more
+    than `max_idle_buckets`, to bound memory.
+    """
+    max_idle_buckets = 1000
+
+    def __init__(self):
+        self.buckets: dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: {len(self.buckets)} buckets>'
+
+    def check(self, user_name: str, count: int, rate: float, capacity: int) -> None:
+        """
+        Takes `count` tokens from the bucket of the given user, or raises
+        :py:class:`rest_framework.exceptions.Throttled` (HTTP 429) with the time to wait for them, or
+        :py:class:`TooManyTasks` (HTTP 413) if `count` exceeds the capacity.
+        """
+        if count > capacity:
+            raise TooManyTasks(f'A request may hold up to {capacity} tasks.')
+
+        with self.lock:
+            bucket = self.buckets.get(user_name)
+
+            if bucket is None or (bucket.rate, bucket.capacity) != (rate, capacity):
+                bucket = self.buckets[user_name] = TokenBucket(rate, capacity)
+
+            wait = bucket.take(count)
+
+            if len(self.buckets) > self.max_idle_buckets:
+                self.drop_idle_buckets()
+
+        if wait > 0:
+            metrics.throttled_requests.inc()
+            raise Throttled(wait=math.ceil(wait))
+
+    def drop_idle_buckets(self) -> None:
+        now = time.monotonic()
+        self.buckets = {name: bucket for name, bucket in self.buckets.items() if not bucket.is_idle(now)}
+
+
+#: The rate limiter of the schedule consumers of this process.
+rate_limiter = UserRateLimiter()
@@ -0,0 +1,87 @@
+"""
+This module provides the :py:class:`django_tasks.result_cache.TaskResultCache` class, which memoizes the outputs
+of the deterministic registered tasks in the configured Django cache.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from django_tasks import metrics
+from django_tasks.typing import JSON
+
+
+class TaskResultCache:
+    """
+    Result cache of a registered task run with the given inputs, for tasks that opt in with the
+    "result-cache-ttl" option in "registered-tasks", in seconds. Entries are keyed by the dotted path of the
+    task and a digest of its canonical JSON inputs, and expire after that time.
+
+    At most "result-cache-size" entries (option of the task, 100 by default) are kept per task; the oldest ones are
+    evicted on insertion beyond this bound. Note that the eviction index is shared, without locking, by all the
+    processes using the cache, so that the bound is approximate under concurrent insertions.
+    """
+    key_prefix = 'task_results'
+
+    @classmethod
+    def from_settings(cls, registered_task: str, inputs: dict[str, JSON]) -> Optional[TaskResultCache]:
+        """Returns the result cache of the given task run, or `None` if result caching is not enabled for it."""
+        if not registered_task:
+            return None
+
+        ttl = settings.CHANNEL_TASKS.get_task_float(registered_task, 'result-cache-ttl', 0)
+
+        if ttl <= 0:
+            return None
+
+        return cls(registered_task, inputs, ttl, max(1, settings.CHANNEL_TASKS.get_task_int(
+            registered_task, 'result-cache-size', 100)))
+
+    def __init__(self, registered_task: str, inputs: dict[str, JSON], ttl: float, max_size: int):
+        self.registered_task = registered_task
+        self.ttl = ttl
+        self.max_size = max_size
+        self.digest = hashlib.sha256(self.canonicalize(inputs).encode()).hexdigest()
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: {self.cache_key}, ttl={self.ttl}s, max_size={self.max_size}>'
+
+    @staticmethod
+    def canonicalize(inputs: dict[str, JSON]) -> str:
+        """Returns the canonical JSON representation of the given task inputs, with sorted keys."""
+        return json.dumps(inputs, sort_keys=True, separators=(',', ':'), default=str)
+
+    @property
+    def index_key(self) -> str:
+        return f'{self.key_prefix}.{self.registered_task}'
+
+    @property
+    def cache_key(self) -> str:
+        return f'{self.index_key}.{self.digest}'
+
+    def get(self) -> Optional[dict[str, Any]]:
+        """
+        Returns the cache entry of the task run, as a dictionary holding its 'output', or `None` on cache miss.
+        """
+        entry: Optional[dict[str, Any]] = cache.get(self.cache_key)
+        metrics.result_cache_lookups.inc(self.registered_task, 'hit' if entry is not None else 'miss')
+
+        return entry
+
+    def set(self, output: Any) -> None:
+        """Stores the given task output, and evicts the oldest entries of the task beyond the size bound."""
+        with metrics.cache_write_latency.time():
+            cache.set(self.cache_key, {'output': output}, timeout=self.ttl)
+            index = [digest for digest in cache.get(self.index_key, []) if digest != self.digest]
+            index.append(self.digest)
+            evicted, index = index[:-self.max_size], index[-self.max_size:]
+
+            if evicted:
+                cache.delete_many([f'{self.index_key}.{digest}' for digest in evicted])
+
+            cache.set(self.index_key, index, timeout=None)
@@ -0,0 +1,100 @@
+"""
+This module provides the :py:class:`django_tasks.retry_policy.RetryPolicy` class, which decides the automatic
+retries of the failed task runs.
+"""
+from __future__ import annotations
+
+import random
+
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+
+class RetryPolicy:
+    """
+    Retry policy of a registered task, as specified by its "retry" option in "registered-tasks", e.g.::
+
+        "retry": {"max-attempts": 3, "backoff": 1, "max-backoff": 60, "jitter": true,
+                  "retry-on": ["django.db.utils.OperationalError", "ConnectionError"]}
+
+    The delay before the n-th retry is `backoff * 2 ** (n - 1)` seconds, up to `max-backoff`, and with "full
+    jitter" (uniformly random between 0 and the computed delay) unless `jitter` is false. Only the exceptions of
+    the "retry-on" types, given by dotted path or builtin name, are retried; all of them by default, except the
+    :py:class:`django_tasks.task_runner.TaskTimeout` of the runs that exceed their timeout.
+    """
+    #: Exception types not retried unless "retry-on" is given, by dotted path.
+    default_skip_on: tuple[str, ...] = ('django_tasks.task_runner.TaskTimeout',)
+
+    def __init__(self,
+                 max_attempts: int = 1,
+                 backoff: float = 1.0,
+                 max_backoff: float = 60.0,
+                 jitter: bool = True,
+                 retry_on: tuple[type[BaseException], ...] = (Exception,),
+                 skip_on: tuple[type[BaseException], ...] = ()):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_on = retry_on
+        self.skip_on = skip_on
+
+    def __repr__(self) -> str:
+        return (f'<{self.__class__.__name__}: max_attempts={self.max_attempts}, backoff={self.backoff}s, '
+                f'max_backoff={self.max_backoff}s, jitter={self.jitter}, retry_on={self.retry_on}, '
+                f'skip_on={self.skip_on}>')
+
+    @classmethod
+    def from_settings(cls, registered_task: str) -> Optional[RetryPolicy]:
+        """
+        Returns the retry policy of the given registered task, or `None` if it has no "retry" option. Raises
+        :py:class:`django.core.exceptions.ImproperlyConfigured` on wrong option values.
+        """
+        options = settings.CHANNEL_TASKS.get_task_dict(registered_task, 'retry', {})
+
+        if not options:
+            return None
+
+        option_key = f'registered-tasks.{registered_task}.retry'
+        max_attempts, backoff = options.get('max-attempts', 3), options.get('backoff', 1.0)
+        max_backoff, jitter = options.get('max-backoff', 60.0), options.get('jitter', True)
+        retry_on = options.get('retry-on', ['Exception'])
+        skip_on = [] if 'retry-on' in options else list(cls.default_skip_on)
+
+        if not isinstance(max_attempts, int) or isinstance(max_attempts, bool) or max_attempts < 1:
+            raise settings.CHANNEL_TASKS.wrong_type_error(f'{option_key}.max-attempts', 'positive int')
+
+        for key, value in (('backoff', backoff), ('max-backoff', max_backoff)):
+            if not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+                raise settings.CHANNEL_TASKS.wrong_type_error(f'{option_key}.{key}', 'non-negative float')
+
+        if not isinstance(jitter, bool):
+            raise settings.CHANNEL_TASKS.wrong_type_error(f'{option_key}.jitter', 'bool')
+
+        if not isinstance(retry_on, list) or not all(isinstance(name, str) for name in retry_on):
+            raise settings.CHANNEL_TASKS.wrong_type_error(f'{option_key}.retry-on', 'list[str]')
+
+        return cls(max_attempts, float(backoff), float(max_backoff), jitter,  # type: ignore[arg-type]
+                   tuple(map(cls.import_exception_type, retry_on)), tuple(map(cls.import_exception_type, skip_on)))
+
+    @staticmethod
+    def import_exception_type(name: str) -> type[BaseException]:
+        exception_type = import_string(name if '.' in name else f'builtins.{name}')
+
+        if not isinstance(exception_type, type) or not issubclass(exception_type, BaseException):
+            raise ImproperlyConfigured(f"Retry-on value '{name}' is not an exception type.")
+
+        return exception_type
+
+    def should_retry(self, error: BaseException, attempt: int) -> bool:
+        """Whether to retry the task run that raised `error` at the given `attempt`, counting from 1."""
+        return attempt < self.max_attempts and isinstance(error, self.retry_on) and not isinstance(error, self.skip_on)
+
+    def get_delay(self, attempt: int) -> float:
+        """Returns the delay, in seconds, before the retry that follows the given `attempt`."""
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+
+        return random.uniform(0, delay) if self.jitter else delay
@@ -6,15 +6,18 @@ from channels.security.websocket import AllowedHostsOriginValidator
 
 from django_tasks.authentication import DRFTokenAuthMiddleware
 from django_tasks import urls
+from django_tasks.lifespan import TaskRunnerLifespan
 
 
 adrf_application = get_asgi_application()
 
 application = ProtocolTypeRouter({
     'http': URLRouter([
+        *urls.get_metrics_urls(),
         urls.re_path(r'^adrf/', adrf_application),
         urls.re_path(r'^api/', DRFTokenAuthMiddleware(AuthMiddlewareStack(URLRouter(list(urls.get_http_channels_urls()))))),
     ]),
+    'lifespan': TaskRunnerLifespan(),
     'websocket': AllowedHostsOriginValidator(
         DRFTokenAuthMiddleware(AuthMiddlewareStack(URLRouter(list(urls.get_websocket_urls()))))
     ),
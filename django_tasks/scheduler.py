@@ -2,12 +2,17 @@
 This module provides the tools for scheduling arrays of tasks, with or without task result storage.
 """
 import asyncio
+import functools
 import logging
 
 from asgiref.sync import sync_to_async
-from typing import Optional
+from django.db import IntegrityError
+from django.utils import dateparse, timezone
+from rest_framework.exceptions import APIException
+from typing import Optional, Union
 
-from django_tasks import models
+from django_tasks import metrics, models
+from django_tasks.task_graph import TaskGraph
 from django_tasks.task_runner import TaskRunner
 from django_tasks.task_inspector import get_task_coro
 from django_tasks.typing import TaskStatusJSON, TaskJSON, DocTaskJSON
@@ -37,38 +42,114 @@ class DocTaskScheduler:
 
     @classmethod
     async def store_doctask_result(cls, task_id: str, task_info: TaskStatusJSON) -> None:
-        doctask = await sync_to_async(cls.retrieve_doctask)(task_id)
+        with metrics.doctask_store_latency.time():
+            doctask = await sync_to_async(cls.retrieve_doctask)(task_id)
+
+            if doctask:
+                await doctask.on_completion(task_info)
 
         if doctask:
-            await doctask.on_completion(task_info)
             del cls.doctask_index[task_id]
             logging.getLogger('django').info('Stored %s.', repr(doctask))
 
     @classmethod
-    async def schedule_doctask(cls, task_id: str, user_name: str, valid_data: DocTaskJSON) -> asyncio.Future:
-        """Schedules a single task, and stores results in DB."""
-        task_coro = get_task_coro(valid_data['registered_task'], valid_data['inputs'])
+    async def store_doctask_status(cls, task_id: str, task_info: TaskStatusJSON) -> None:
+        """
+        Stores the intermediate status data of a doc-task as a :py:class:`django_tasks.models.DocTaskProgress` row,
+        by its memorized ID, without fetching or rewriting the doc-task.
+        """
+        if task_id not in cls.doctask_index:
+            return
+
+        doctask_id = cls.doctask_index[task_id]
+
+        with metrics.doctask_store_latency.time():
+            try:
+                await models.DocTaskProgress.objects.acreate(doctask_id=doctask_id, status_data=task_info)
+            except IntegrityError:
+                logging.getLogger('django').error('Memorized doctask ID %s not found in DB.', doctask_id)
+
+    @classmethod
+    async def schedule_doctask(cls,
+                               task_id: str,
+                               user_name: str,
+                               valid_data: DocTaskJSON,
+                               task_graph: Optional[TaskGraph] = None,
+                               graph_index: int = 0) -> asyncio.Future:
+        """
+        Schedules a single task, and stores results in DB. The task may depend on earlier tasks of its array,
+        as given by the task graph; see :py:class:`django_tasks.task_graph.TaskGraph`. If the task runner rejects
+        the task, the doc-task is stored with 'Error' status, and the error is raised.
+        """
+        task_coro = get_task_coro(valid_data['registered_task'], TaskGraph.get_placeholder_inputs(
+            valid_data['inputs'], valid_data.get('inputs_from', {})))
         runner = TaskRunner.get()
-        task = await runner.schedule(
-            task_coro.coroutine, cls.store_doctask_result, task_id=task_id, user_name=user_name
-        )
         cls.doctask_index[task_id] = valid_data['id']
+        try:
+            task = await runner.schedule(
+                runner.get_coroutine(task_coro), cls.store_doctask_result,
+                task_id=task_id, user_name=user_name, registered_task=valid_data['registered_task'],
+                priority=valid_data.get('priority', 0), timeout=valid_data.get('timeout'),
+                status_callback=cls.store_doctask_status,
+                coroutine_factory=functools.partial(runner.get_coroutine, task_coro), inputs=task_coro.inputs,
+                task_graph=task_graph, graph_index=graph_index, delay=get_delay(valid_data),
+            )
+        except APIException as error:
+            await cls.store_doctask_result(task_id, {'status': 'Error', 'http_status': error.status_code,
+                                                     'exception-repr': repr(error)})
+            raise
         logging.getLogger('django').info('Scheduled doc-task %s callable=%s.', valid_data, task_coro.callable)
         return task
 
+    @classmethod
+    async def enqueue_doctasks(cls, request_id: str, user_name: str, *valid_data: DocTaskJSON) -> None:
+        """
+        Queues an array of doc-tasks in database, to be claimed and run by the durable queue workers, and notifies
+        the user of their 'Queued' status. See :py:class:`django_tasks.durable_queue.DurableTaskQueue`.
+        """
+        doctasks = [cls.model(pk=data['id'], task_id=f'{request_id}.{n}', user_name=user_name, status='Queued')
+                    for n, data in enumerate(valid_data)]
+        await cls.model.objects.abulk_update(doctasks, ['task_id', 'user_name', 'status'])
+
+        for doctask, data in zip(doctasks, valid_data):
+            delay = get_delay(data)
+            await TaskRunner.broadcast_status(data['registered_task'].rsplit('.', 1)[-1], doctask.task_id, user_name,
+                                              TaskRunner.get_scheduled_status(delay) if delay > 0
+                                              else TaskRunner.get_queued_status())
+
+        logging.getLogger('django').info('Queued %s doc-tasks of request %s.', len(doctasks), request_id)
+
     @classmethod
     async def schedule_doctasks(cls, request_id: str, user_name: str, *valid_data: DocTaskJSON) -> list[asyncio.Future]:
+        task_graph = TaskGraph.from_data(valid_data)
         futures = await asyncio.gather(*[
-            cls.schedule_doctask(f'{request_id}.{n}', user_name, data) for n, data in enumerate(valid_data)
+            cls.schedule_doctask(f'{request_id}.{n}', user_name, data, task_graph, n)
+            for n, data in enumerate(valid_data)
         ])
         return futures
 
 
 async def schedule_tasks(request_id: str, user_name: str, *valid_data: TaskJSON) -> list[asyncio.Future]:
-    """Schedules an array of tasks as requested by a Django user."""
+    """
+    Schedules an array of tasks as requested by a Django user, which may depend on earlier tasks of the array;
+    see :py:class:`django_tasks.task_graph.TaskGraph`.
+    """
     runner = TaskRunner.get()
+    task_graph = TaskGraph.from_data(valid_data)
+    task_coros = [get_task_coro(dat['registered_task'], TaskGraph.get_placeholder_inputs(
+        dat['inputs'], dat.get('inputs_from', {}))) for dat in valid_data]
     futures = await asyncio.gather(*[runner.schedule(
-        get_task_coro(dat['registered_task'], dat['inputs']).coroutine,
-        task_id=f'{request_id}.{n}', user_name=user_name,
-    ) for n, dat in enumerate(valid_data)])
+        runner.get_coroutine(task_coro),
+        task_id=f'{request_id}.{n}', user_name=user_name, registered_task=dat['registered_task'],
+        priority=dat.get('priority', 0), timeout=dat.get('timeout'),
+        coroutine_factory=functools.partial(runner.get_coroutine, task_coro), inputs=task_coro.inputs,
+        task_graph=task_graph, graph_index=n, delay=get_delay(dat),
+    ) for n, (dat, task_coro) in enumerate(zip(valid_data, task_coros))])
     return futures
+
+
+def get_delay(valid_data: Union[TaskJSON, DocTaskJSON]) -> float:
+    """Returns the time, in seconds, to wait until the requested run time of the given task data, if any."""
+    run_at = dateparse.parse_datetime(valid_data.get('run_at') or '')
+
+    return max(0.0, (run_at - timezone.now()).total_seconds()) if run_at else 0.0
@@ -1,29 +1,67 @@
 """This module provides the DRF serializers, which are employed in web-socket and HTTP endpoints."""
 from __future__ import annotations
 
+import datetime
 import logging
 
 from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
 from typing import Any
 
-from adrf.serializers import ModelSerializer
-from rest_framework.serializers import SlugRelatedField
+from adrf.serializers import ListSerializer, ModelSerializer
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import DictField, FloatField, IntegerField, ListField, SlugRelatedField
 
 from django_tasks import models
 
+from django_tasks.task_graph import TaskGraph
 from django_tasks.task_inspector import get_task_coro
 from django_tasks.typing import JSON, TaskJSON
 
 
+class DocTaskListSerializer(ListSerializer):
+    """List serializer for arrays of tasks, which validates the dependencies between them."""
+
+    def validate(self, attrs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Checks that each task depends on earlier tasks of the array only, which ensures that the task graph has no
+        cycles. Raises a :py:class:`rest_framework.exceptions.ValidationError` on failure.
+        """
+        errors = {}
+
+        for n, data in enumerate(attrs):
+            if any(index >= n for index in (*data.get('depends_on', []), *data.get('inputs_from', {}).values())):
+                errors[str(n)] = {'depends_on': ['Tasks may only depend on earlier tasks of the array.']}
+
+        if errors:
+            raise ValidationError(errors)
+
+        return attrs
+
+
 class DocTaskSerializer(ModelSerializer):
     """Model serializer for the :py:class:`django_tasks.models.DocTask` model."""
     registered_task = SlugRelatedField(
         slug_field='dotted_path', queryset=models.RegisteredTask.objects.all())
+    depends_on = ListField(child=IntegerField(min_value=0), required=False)
+    inputs_from = DictField(child=IntegerField(min_value=0), required=False)
+    countdown = FloatField(min_value=0, required=False, write_only=True)
+
+    #: Task graph fields, which are not stored in database; see :py:class:`django_tasks.task_graph.TaskGraph`.
+    graph_fields = ('depends_on', 'inputs_from')
 
     class Meta:
         model = models.DocTask
-        read_only_fields = ('id', 'scheduled_at', 'completed_at', 'document')
-        fields = ('registered_task', 'inputs', *read_only_fields)
+        read_only_fields = ('id', 'scheduled_at', 'completed_at', 'status', 'document')
+        fields = ('registered_task', 'inputs', 'priority', 'timeout', 'depends_on', 'inputs_from', 'run_at',
+                  'countdown', *read_only_fields)
+        extra_kwargs = {
+            'timeout': {'min_value': 0},
+            'priority': {'min_value': -settings.CHANNEL_TASKS.max_task_priority,
+                         'max_value': settings.CHANNEL_TASKS.max_task_priority},
+        }
+        list_serializer_class = DocTaskListSerializer
 
     @classmethod
     async def get_valid_task_group_serializer(cls, json_content: JSON, *args, **kwargs) -> DocTaskSerializer:
@@ -67,12 +105,31 @@ class DocTaskSerializer(ModelSerializer):
         data: list[TaskJSON] = await many_serializer.adata
         return data
 
+    async def acreate(self, validated_data: dict[str, Any]) -> models.DocTask:
+        """Creates the doc-task, keeping its task graph fields as (non-stored) instance attributes."""
+        graph_data = {key: validated_data.pop(key) for key in self.graph_fields if key in validated_data}
+        doctask: models.DocTask = await super().acreate(validated_data)
+
+        for key, value in graph_data.items():
+            setattr(doctask, key, value)
+
+        return doctask
+
     def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
         """
         Performs the validation of the task coroutine function of the specified
-        :py:class:`django_tasks.models.RegisteredTask` with the given input parameters.
-        Raises a :py:class:`rest_framework.exceptions.ValidationError` on failure.
+        :py:class:`django_tasks.models.RegisteredTask` with the given input parameters, including those taken
+        from the outputs of earlier tasks. Raises a :py:class:`rest_framework.exceptions.ValidationError` on failure.
+
+        A requested `countdown`, in seconds, is converted into the equivalent `run_at` time.
         """
-        self.context['task_coro'] = get_task_coro(str(attrs['registered_task']), attrs['inputs'])
+        self.context['task_coro'] = get_task_coro(str(attrs['registered_task']), TaskGraph.get_placeholder_inputs(
+            attrs['inputs'], attrs.get('inputs_from', {})))
+
+        if 'countdown' in attrs:
+            if attrs.get('run_at'):
+                raise ValidationError({'countdown': 'Only one of run_at and countdown may be given.'})
+
+            attrs['run_at'] = timezone.now() + datetime.timedelta(seconds=attrs.pop('countdown'))
 
         return attrs
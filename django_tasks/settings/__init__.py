@@ -8,6 +8,8 @@ import importlib.util
 import json
 import os
 
+from typing import Any
+
 from django.core.exceptions import ImproperlyConfigured
 
 from django_tasks.typing import JSON, is_string_key_dict, is_string_key_dict_list, is_string_list
@@ -206,6 +208,18 @@ class SettingsJson:
 
         return value
 
+    def get_float(self, key: str, default: float) -> float:
+        """
+        Returns a type-checked number from the `key` entry, as float,
+        or raises :py:class:`django.core.exceptions.ImproperlyConfigured`.
+        """
+        value = self.jsonlike.get(key, default)
+
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise self.wrong_type_error(key, 'float')
+
+        return float(value)
+
     def get_string(self, key: str, default: str) -> str:
         """
         Returns a type-checked string from the `key` entry,
@@ -254,6 +268,80 @@ class SettingsJson:
 
         return value
 
+    def get_task_options(self, dotted_path: str) -> dict[str, JSON]:
+        """
+        Returns the type-checked string-key dictionary of options of the registered task at `dotted_path`,
+        from the "registered-tasks" entry, or raises :py:class:`django.core.exceptions.ImproperlyConfigured`.
+        """
+        value: Any = self.registered_tasks.get(dotted_path, {})
+
+        if not is_string_key_dict(value):
+            raise self.wrong_type_error(f'registered-tasks.{dotted_path}', 'dict[str]')
+
+        options: dict[str, JSON] = value
+        return options
+
+    def get_task_string(self, dotted_path: str, key: str, default: str) -> str:
+        """
+        Returns a type-checked string from the `key` option of the registered task at `dotted_path`,
+        or raises :py:class:`django.core.exceptions.ImproperlyConfigured`.
+        """
+        value = self.get_task_options(dotted_path).get(key, default)
+
+        if not isinstance(value, str):
+            raise self.wrong_type_error(f'registered-tasks.{dotted_path}.{key}', 'str')
+
+        return value
+
+    def get_task_float(self, dotted_path: str, key: str, default: float) -> float:
+        """
+        Returns a type-checked number, as float, from the `key` option of the registered task at `dotted_path`,
+        or raises :py:class:`django.core.exceptions.ImproperlyConfigured`.
+        """
+        value = self.get_task_options(dotted_path).get(key, default)
+
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise self.wrong_type_error(f'registered-tasks.{dotted_path}.{key}', 'float')
+
+        return float(value)
+
+    def get_task_int(self, dotted_path: str, key: str, default: int) -> int:
+        """
+        Returns a type-checked integer from the `key` option of the registered task at `dotted_path`,
+        or raises :py:class:`django.core.exceptions.ImproperlyConfigured`.
+        """
+        value = self.get_task_options(dotted_path).get(key, default)
+
+        if not isinstance(value, int):
+            raise self.wrong_type_error(f'registered-tasks.{dotted_path}.{key}', 'int')
+
+        return value
+
+    def get_task_dict(self, dotted_path: str, key: str, default: dict[str, JSON]) -> dict[str, JSON]:
+        """
+        Returns a type-checked string-key dictionary from the `key` option of the registered task at `dotted_path`,
+        or raises :py:class:`django.core.exceptions.ImproperlyConfigured`.
+        """
+        value: Any = self.get_task_options(dotted_path).get(key, default)
+
+        if not is_string_key_dict(value):
+            raise self.wrong_type_error(f'registered-tasks.{dotted_path}.{key}', 'dict[str]')
+
+        options: dict[str, JSON] = value
+        return options
+
+    def get_user_weight(self, user_name: str) -> float:
+        """
+        Returns the type-checked, positive, fair-share weight of the given user from the "user-weights" entry,
+        1 by default, or raises :py:class:`django.core.exceptions.ImproperlyConfigured`.
+        """
+        value = self.user_weights.get(user_name, 1.0)
+
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+            raise self.wrong_type_error(f'user-weights.{user_name}', 'positive float')
+
+        return float(value)
+
     @property
     def allowed_hosts(self) -> list[str]:
         """Will be set as the Django ALLOWED_HOSTS setting value.
@@ -448,3 +536,313 @@ class SettingsJson:
 
         Defaults to `False`."""
         return self.get_boolean('expose-rest-api', False)
+
+    @property
+    def expose_metrics(self) -> bool:
+        """Channel-tasks setting: whether to deploy the `metrics` HTTP route, serving the task runner metrics
+        in the Prometheus text format, without authentication.
+
+        Defaults to `False`."""
+        return self.get_boolean('expose-metrics', False)
+
+    @property
+    def registered_tasks(self) -> dict[str, JSON]:
+        """Channel-tasks setting: options of the registered tasks, keyed by their dotted path. Failed runs are
+        retried with exponential backoff according to the "retry" option; see
+        :py:class:`django_tasks.retry_policy.RetryPolicy`. Outputs of deterministic tasks may be cached with the
+        "result-cache-ttl" and "result-cache-size" options; see :py:class:`django_tasks.result_cache.TaskResultCache`.
+
+        Defaults to empty object (default options for all tasks)."""
+        return self.get_dict('registered-tasks', {})
+
+    @property
+    def max_concurrent_tasks(self) -> int:
+        """Channel-tasks setting: maximum number of tasks running at once in the task runner. A value of 0
+        sets no limit. Per-task limits may be set with the "max-concurrency" option in "registered-tasks".
+
+        Defaults to 0."""
+        return self.get_int('max-concurrent-tasks', 0)
+
+    @property
+    def max_pending_tasks(self) -> int:
+        """Channel-tasks setting: maximum number of tasks waiting for a run slot in the task runner; schedule
+        requests beyond this bound are rejected.
+
+        Defaults to 1000."""
+        return self.get_int('max-pending-tasks', 1000)
+
+    @property
+    def worker_threads(self) -> int:
+        """Channel-tasks setting: number of worker threads of the task runner, each one running its own event loop.
+
+        Defaults to 1."""
+        return self.get_int('worker-threads', 1)
+
+    @property
+    def worker_placement(self) -> str:
+        """Channel-tasks setting: how the task runner places each task in a worker, either 'least-loaded' (the worker
+        with fewest in-flight tasks) or 'task-id-hash'.
+
+        Defaults to 'least-loaded'."""
+        value = self.get_string('worker-placement', 'least-loaded')
+
+        if value not in ('least-loaded', 'task-id-hash'):
+            raise ImproperlyConfigured(
+                f"Setting value for 'worker-placement' must be 'least-loaded' or 'task-id-hash' in {self.json_path}")
+
+        return value
+
+    @property
+    def process_pool_size(self) -> int:
+        """Channel-tasks setting: number of worker processes of the pool where the tasks with "execution-mode"
+        'process' run, in "registered-tasks". A value of 0 disables the pool.
+
+        Defaults to 0."""
+        return self.get_int('process-pool-size', 0)
+
+    @property
+    def priority_aging_interval(self) -> float:
+        """Channel-tasks setting: time, in seconds, that a task waits in the task queue to gain one priority level,
+        so that low priority tasks do not starve. It must be positive.
+
+        Defaults to 5."""
+        value = self.get_float('priority-aging-interval', 5.0)
+
+        if value <= 0:
+            raise ImproperlyConfigured(
+                f"Setting value for 'priority-aging-interval' must be positive in {self.json_path}")
+
+        return value
+
+    @property
+    def max_task_priority(self) -> int:
+        """Channel-tasks setting: maximum absolute value of the priority requested for a task, so that a user may
+        only move their tasks by a bounded number of levels in the task queue.
+
+        Defaults to 10."""
+        return self.get_int('max-task-priority', 10)
+
+    @property
+    def fair_share_quantum(self) -> float:
+        """Channel-tasks setting: virtual time, in seconds, that each queued task of a user adds to the place in
+        the task queue of the next ones of the same user, divided by the user weight (see "user-weights"); so that
+        the tasks of different users are admitted in weighted fair order, and a burst of one user does not delay
+        the others. A value of 0 disables the fair queueing.
+
+        Defaults to 0.1."""
+        return self.get_float('fair-share-quantum', 0.1)
+
+    @property
+    def user_weights(self) -> dict[str, JSON]:
+        """Channel-tasks setting: fair-share weights of the users, keyed by user name, whose queued tasks are
+        admitted at a rate proportional to their weight; see "fair-share-quantum".
+
+        Defaults to empty object (weight 1 for all users)."""
+        return self.get_dict('user-weights', {})
+
+    @property
+    def user_rate_limit(self) -> float:
+        """Channel-tasks setting: sustained number of tasks per second that each user may schedule, enforced by
+        the schedule consumers with a token bucket per user and process; requests beyond this rate are rejected
+        with HTTP 429 and the time to wait. A value of 0 disables the rate limit.
+
+        Defaults to 0."""
+        return self.get_float('user-rate-limit', 0.0)
+
+    @property
+    def user_rate_burst(self) -> int:
+        """Channel-tasks setting: capacity of the token bucket of each user, as the number of tasks that may be
+        scheduled at once; see "user-rate-limit". A request for more tasks is rejected with HTTP 413.
+
+        Defaults to 100."""
+        return self.get_int('user-rate-burst', 100)
+
+    @property
+    def task_timeout(self) -> float:
+        """Channel-tasks setting: default maximum run time of a task, in seconds, after which the task runner cancels
+        it with 'Timeout' status. A value of 0 sets no limit. Per-task values may be set with the "timeout" option in
+        "registered-tasks".
+
+        Defaults to 0."""
+        return self.get_float('task-timeout', 0.0)
+
+    @property
+    def broadcast_batch_window(self) -> float:
+        """Channel-tasks setting: time window, in seconds, within which the task events of each worker loop are
+        gathered and sent per user as a single `task.batch` message. A value of 0 disables the batching.
+
+        Defaults to 0."""
+        return self.get_float('broadcast-batch-window', 0.0)
+
+    @property
+    def broadcast_batch_size(self) -> int:
+        """Channel-tasks setting: maximum number of task events in a batch, which is sent as soon as it is full.
+
+        Defaults to 100."""
+        return self.get_int('broadcast-batch-size', 100)
+
+    @property
+    def loop_watchdog_interval(self) -> float:
+        """Channel-tasks setting: period, in seconds, of the heartbeats that measure the lag of the worker loops.
+        A value of 0 disables the loop watchdog.
+
+        Defaults to 0.5."""
+        return self.get_float('loop-watchdog-interval', 0.5)
+
+    @property
+    def blocking_call_threshold(self) -> float:
+        """Channel-tasks setting: time, in seconds, that a single callback may block a worker loop before the loop
+        watchdog logs its stack, with the task ID and dotted path.
+
+        Defaults to 1."""
+        return self.get_float('blocking-call-threshold', 1.0)
+
+    @property
+    def shutdown_grace_period(self) -> float:
+        """Channel-tasks setting: time, in seconds, that the task runner waits on shutdown for its in-flight tasks
+        to finish, before cancelling the rest.
+
+        Defaults to 30."""
+        return self.get_float('shutdown-grace-period', 30.0)
+
+    @property
+    def durable_task_queue(self) -> bool:
+        """Channel-tasks setting: whether doc-task schedule requests are queued in database, as the source of truth
+        from which the durable queue workers claim them; see :py:class:`django_tasks.durable_queue.DurableTaskQueue`.
+
+        Defaults to `False`."""
+        return self.get_boolean('durable-task-queue', False)
+
+    @property
+    def durable_claim_batch_size(self) -> int:
+        """Channel-tasks setting: maximum number of doc-tasks that a durable queue worker has claimed and in flight
+        at a time, within the free run slots of its task runner.
+
+        Defaults to 10."""
+        return self.get_int('durable-claim-batch-size', 10)
+
+    @property
+    def durable_poll_interval(self) -> float:
+        """Channel-tasks setting: time, in seconds, that a durable queue worker waits between claims of queued
+        doc-tasks.
+
+        Defaults to 1."""
+        return self.get_float('durable-poll-interval', 1.0)
+
+    @property
+    def durable_lease_time(self) -> float:
+        """Channel-tasks setting: time, in seconds, after which the claim of an unfinished doc-task expires unless
+        renewed by its worker, so that the doc-task of a crashed worker is claimed again.
+
+        Defaults to 60."""
+        return self.get_float('durable-lease-time', 60.0)
+
+    @property
+    def task_worker_channel(self) -> str:
+        """Channel-tasks setting: name of the channel-layer channel through which the ASGI application sends the
+        schedule requests to the standalone task workers (see the `run_task_workers` management command). If empty,
+        tasks run in the ASGI process.
+
+        Defaults to ''."""
+        return self.get_string('task-worker-channel', '')
+
+    @property
+    def request_id_ttl(self) -> float:
+        """Channel-tasks setting: idempotency window of the schedule requests, in seconds. A schedule request
+        repeating, within this time, the Request-ID header of a previous one of the same user, schedules nothing
+        and gets the IDs and current statuses of the tasks of the previous one. Websocket messages are only checked
+        by the `request_id` given in their content, as the header is sent with every message of the connection. A
+        value of 0 disables this check.
+
+        Defaults to 300."""
+        return self.get_float('request-id-ttl', 300.0)
+
+    @property
+    def task_cache_l1_size(self) -> int:
+        """Channel-tasks setting: maximum number of task event reads held in the process-local cache in front of
+        the task cache, which skips the cache round trips of repeated reads, for up to "task-cache-l1-max-age"
+        seconds; see :py:class:`django_tasks.local_cache.LocalTaskCache`. A value of 0 disables it.
+
+        Defaults to 0."""
+        return self.get_int('task-cache-l1-size', 0)
+
+    @property
+    def task_cache_l1_max_age(self) -> float:
+        """Channel-tasks setting: time, in seconds, after which the entries of the process-local task cache
+        expire. The writes of the same process invalidate them at once; this bounds the time that the writes of
+        other processes take to be read.
+
+        Defaults to 5."""
+        return self.get_float('task-cache-l1-max-age', 5.0)
+
+    @property
+    def task_events_page_size(self) -> int:
+        """Channel-tasks setting: number of most recently updated tasks whose cached events are loaded by the
+        admin pages, from the task events admin view; older ones are loaded on demand, by pages of this size.
+
+        Defaults to 20."""
+        return self.get_int('task-events-page-size', 20)
+
+    @property
+    def task_cache_mode(self) -> str:
+        """Channel-tasks setting: how the task events are cached per user, either 'full' (all the events of each
+        task) or 'compact' (a snapshot of the latest event of each task, with its creation and update timestamps).
+        The full history of doc-tasks is kept in their document anyway.
+
+        Defaults to 'full'."""
+        value = self.get_string('task-cache-mode', 'full')
+
+        if value not in ('full', 'compact'):
+            raise ImproperlyConfigured(
+                f"Setting value for 'task-cache-mode' must be 'full' or 'compact' in {self.json_path}")
+
+        return value
+
+    @property
+    def task_cache_ttl(self) -> float:
+        """Channel-tasks setting: time, in seconds, that the cached events of a finished task are kept, with the
+        Redis cache, down to the millisecond. A value of 0 keeps them for the default cache timeout; it must not be
+        negative.
+
+        Defaults to 86400."""
+        value = self.get_float('task-cache-ttl', 86400.0)
+
+        if value < 0:
+            raise ImproperlyConfigured(
+                f"Setting value for 'task-cache-ttl' must not be negative in {self.json_path}")
+
+        return value
+
+    @property
+    def task_cache_max_tasks(self) -> int:
+        """Channel-tasks setting: maximum number of tasks whose events are cached per user; the least recently
+        updated tasks are evicted beyond this bound. A value of 0 sets no limit.
+
+        Defaults to 1000."""
+        return self.get_int('task-cache-max-tasks', 1000)
+
+    @property
+    def task_cache_max_events(self) -> int:
+        """Channel-tasks setting: maximum number of cached events per task; the oldest events of a task are dropped
+        beyond this bound. A value of 0 sets no limit.
+
+        Defaults to 100."""
+        return self.get_int('task-cache-max-events', 100)
+
+    @property
+    def periodic_check_interval(self) -> float:
+        """Channel-tasks setting: time, in seconds, between the evaluations of the periodic task schedules by the
+        task runner, which fires their due runs; see :py:class:`django_tasks.models.PeriodicTask`. A value of 0
+        disables the periodic tasks in this process.
+
+        Defaults to 0."""
+        return self.get_float('periodic-check-interval', 0.0)
+
+    @property
+    def periodic_run_lease(self) -> float:
+        """Channel-tasks setting: time, in seconds, after which an unfinished run of a periodic task with no
+        timeout is taken as finished, so that a run lost with a crashed task runner does not block the later runs
+        of its schedule forever.
+
+        Defaults to 3600."""
+        return self.get_float('periodic-run-lease', 3600.0)
@@ -1,38 +1,409 @@
 """This module provides the :py:class:`django_tasks.task_cache.TaskCache` class."""
-from collections import defaultdict
+from __future__ import annotations
 
+import functools
 import logging
+import math
+import pickle
+import time
+
+from collections import defaultdict
+from typing import Any, Callable, Hashable, Optional
+
+import redis
 
-from django.core.cache import cache
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.redis import RedisCache
 
+from django_tasks import metrics
+from django_tasks.local_cache import LocalTaskCache
 from django_tasks.typing import TaskMessageJSON
 
 
-class TaskCache:
-    """Handles the task event cache of a user, using the configured Django cache."""
+class TaskEventIndex:
+    """
+    Task event storage of a user as a single cache entry, holding the whole index of task events by task ID; each
+    write rewrites the whole index. This is the fallback for cache backends other than Redis.
+
+    The index is bounded by the "task-cache-max-tasks" and "task-cache-max-events" settings: the oldest events of
+    a task are dropped, and the least recently updated tasks are evicted.
+    """
+    #: Statuses of the finished tasks.
+    final_statuses = frozenset({'Success', 'Error', 'Cancelled', 'Timeout', 'Skipped'})
 
     def __init__(self, user_name: str):
         self.user_name = user_name
+        self.max_tasks = settings.CHANNEL_TASKS.task_cache_max_tasks
+        self.max_events = settings.CHANNEL_TASKS.task_cache_max_events
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: {self.user_name}>'
 
     @property
     def cache_key(self) -> str:
         return f'{self.user_name}.task_events'
 
-    def get_index(self):
-        return cache.get_or_set(self.cache_key, defaultdict(list))
+    def get_index(self) -> dict[str, list[TaskMessageJSON]]:
+        empty_index: dict[str, list[TaskMessageJSON]] = defaultdict(list)
+        index: dict[str, list[TaskMessageJSON]] = cache.get_or_set(self.cache_key, empty_index) or empty_index
+        return index
+
+    def get_page(self, limit: int, cursor: str = '') -> tuple[dict[str, list[TaskMessageJSON]], Optional[str]]:
+        """
+        Returns the `limit` most recently updated tasks, before the given cursor position (from the least recently
+        updated task) if any, in update order, and the cursor of the next (older) page, or `None` if this is the
+        last one. Tasks updated meanwhile shift the positions down, so that later pages may repeat tasks, not miss
+        them.
+        """
+        index = self.get_index()
+        task_ids = list(index)
+        end = min(max(0, int(float(cursor))), len(task_ids)) if cursor else len(task_ids)
+        start = max(0, end - limit)
+
+        return {task_id: index[task_id] for task_id in task_ids[start:end]}, str(start) if start else None
+
+    def get_last_events(self, task_ids: list[str]) -> dict[str, TaskMessageJSON]:
+        index = self.get_index()
+        return {task_id: index[task_id][-1] for task_id in task_ids if index.get(task_id)}
+
+    def append_events(self, events_content: list[TaskMessageJSON]) -> None:
+        index = self.get_index()
+        now = time.time()
+
+        for event_content in events_content:
+            self.add_event(index, event_content, now)
+
+        while self.max_tasks and len(index) > self.max_tasks:
+            del index[next(iter(index))]
+
+        cache.set(self.cache_key, index)
+
+    def add_event(self, index: dict[str, list[TaskMessageJSON]], event_content: TaskMessageJSON, now: float) -> None:
+        """Appends the given event to its task in the index, moving the task to the end, as most recently updated."""
+        task_events = index.pop(event_content['task_id'], [])
+        task_events.append(event_content)
+        index[event_content['task_id']] = task_events[-self.max_events:] if self.max_events else task_events
+
+    def clear_task(self, task_id: str) -> bool:
+        index = self.get_index()
+
+        if task_id not in index:
+            return False
+
+        del index[task_id]
+        cache.set(self.cache_key, index)
+        return True
+
+
+class RedisTaskEventIndex(TaskEventIndex):
+    """
+    Task event storage of a user in Redis, with a list of pickled events per task, and a sorted set of the task
+    IDs of the user scored by the time of their last event. Appends are single `RPUSH` commands, clears single
+    `DEL` commands, and reads are pipelined; so that writes take constant time, and concurrent events of a user
+    do not overwrite each other.
+
+    Keys are made by the Django cache, with its prefix and version, and all the keys are handled by the Redis client
+    of the write server of the cache; see :py:meth:`get_client`. Keys expire after the default cache timeout from
+    their last write, and the events of finished tasks after the "task-cache-ttl" setting. Lists are trimmed with
+    `LTRIM` to the "task-cache-max-events" setting, and the least recently updated tasks beyond the
+    "task-cache-max-tasks" setting are evicted; the IDs of expired tasks are removed from the set on read. The
+    scores of the events written at once are spaced by a microsecond, so that they may be used as page cursors.
+    """
+    #: Redis clients by server URL; see :py:meth:`get_client`.
+    clients: dict[str, Any] = {}
+
+    @staticmethod
+    def is_supported() -> bool:
+        """Whether the default Django cache is the Redis one."""
+        return isinstance(caches[DEFAULT_CACHE_ALIAS], RedisCache)
+
+    def __init__(self, user_name: str):
+        super().__init__(user_name)
+        self.task_ids_key = cache.make_and_validate_key(f'{user_name}.task_ids')
+        self.timeout: Optional[float] = cache.get_backend_timeout()
+        self.ttl = settings.CHANNEL_TASKS.task_cache_ttl
+
+    @classmethod
+    def get_client(cls) -> Any:
+        """
+        Returns the Redis client of the write server of the default cache, the first of its LOCATION setting, with
+        the connection options of its OPTIONS setting as Django's Redis cache takes them; kept per server URL.
+        """
+        cache_settings = settings.CACHES[DEFAULT_CACHE_ALIAS]
+        location = cache_settings['LOCATION']
+        url = (location.split(',') if isinstance(location, str) else location)[0]
+
+        if url not in cls.clients:
+            options = {name: value for name, value in cache_settings.get('OPTIONS', {}).items()
+                       if name not in ('parser_class', 'pool_class', 'serializer')}
+            cls.clients[url] = redis.Redis.from_url(url, **options)
+
+        return cls.clients[url]
+
+    def get_task_key(self, task_id: str) -> str:
+        task_key: str = cache.make_and_validate_key(f'{self.cache_key}.{task_id}')
+        return task_key
+
+    def get_task_ids(self, client: Any) -> list[str]:
+        return self.get_task_ids_by_rank(client, 0, -1)
+
+    def get_task_ids_by_rank(self, client: Any, start: int, end: int) -> list[str]:
+        return [task_id.decode() for task_id in client.zrange(self.task_ids_key, start, end)]
+
+    def get_index(self) -> dict[str, list[TaskMessageJSON]]:
+        client = self.get_client()
+        return self.read_tasks(client, self.get_task_ids(client))
+
+    def get_page(self, limit: int, cursor: str = '') -> tuple[dict[str, list[TaskMessageJSON]], Optional[str]]:
+        """
+        Returns the `limit` most recently updated tasks, updated before the given cursor time if any, in update
+        order, and the cursor of the next (older) page, or `None` if this is the last one.
+        """
+        client = self.get_client()
+        scored_ids = client.zrevrangebyscore(
+            self.task_ids_key, f'({cursor}' if cursor else '+inf', '-inf', start=0, num=limit, withscores=True)
+        task_ids = [task_id.decode() for task_id, _ in reversed(scored_ids)]
+        next_cursor = repr(scored_ids[-1][1]) if len(scored_ids) == limit else None
+
+        return self.read_tasks(client, task_ids), next_cursor
+
+    def read_tasks(self, client: Any, task_ids: list[str]) -> dict[str, list[TaskMessageJSON]]:
+        """Reads the events of the given tasks, in a pipeline, removing the IDs of those expired from the set."""
+        pipeline = client.pipeline(transaction=False)
+
+        for task_id in task_ids:
+            self.read_events(pipeline, self.get_task_key(task_id))
+
+        task_events = dict(zip(task_ids, pipeline.execute()))
+        expired_ids = [task_id for task_id, events in task_events.items() if not events]
+
+        if expired_ids:
+            client.zrem(self.task_ids_key, *expired_ids)
+
+        return {task_id: self.load_events(events) for task_id, events in task_events.items() if events}
+
+    def get_last_events(self, task_ids: list[str]) -> dict[str, TaskMessageJSON]:
+        pipeline = self.get_client().pipeline(transaction=False)
+
+        for task_id in task_ids:
+            self.read_last_event(pipeline, self.get_task_key(task_id))
+
+        return {task_id: pickle.loads(event) for task_id, event in zip(task_ids, pipeline.execute()) if event}
+
+    @staticmethod
+    def read_events(pipeline: Any, task_key: str) -> None:
+        pipeline.lrange(task_key, 0, -1)
+
+    @staticmethod
+    def read_last_event(pipeline: Any, task_key: str) -> None:
+        pipeline.lindex(task_key, -1)
+
+    @staticmethod
+    def load_events(events: Any) -> list[TaskMessageJSON]:
+        return [pickle.loads(event) for event in events]
+
+    def push_event(self, pipeline: Any, task_key: str, event_content: TaskMessageJSON, now: float) -> None:
+        pipeline.rpush(task_key, pickle.dumps(event_content, pickle.HIGHEST_PROTOCOL))
+
+        if self.max_events:
+            pipeline.ltrim(task_key, -self.max_events, -1)
+
+    def append_events(self, events_content: list[TaskMessageJSON]) -> None:
+        client = self.get_client()
+        pipeline = client.pipeline(transaction=False)
+        now = time.time()
+
+        for n, event_content in enumerate(events_content):
+            task_key = self.get_task_key(event_content['task_id'])
+            self.push_event(pipeline, task_key, event_content, now)
+            pipeline.zadd(self.task_ids_key, {event_content['task_id']: now + n * 1e-6})
+
+            if self.ttl and event_content['detail'].get('status') in self.final_statuses:
+                pipeline.pexpire(task_key, math.ceil(self.ttl * 1000))
+            elif self.timeout is not None:
+                pipeline.expire(task_key, int(self.timeout))
+
+        if self.timeout is not None:
+            pipeline.expire(self.task_ids_key, int(self.timeout))
+
+        if self.max_tasks:
+            pipeline.zcard(self.task_ids_key)
+
+        results = pipeline.execute()
+
+        if self.max_tasks and results[-1] > self.max_tasks:
+            self.evict(client, results[-1] - self.max_tasks)
+
+    def evict(self, client: Any, count: int) -> None:
+        """Evicts the given number of least recently updated tasks."""
+        task_ids = self.get_task_ids_by_rank(client, 0, count - 1)
+
+        if task_ids:
+            pipeline = client.pipeline(transaction=False)
+            pipeline.delete(*[self.get_task_key(task_id) for task_id in task_ids])
+            pipeline.zrem(self.task_ids_key, *task_ids)
+            pipeline.execute()
+
+    def clear_task(self, task_id: str) -> bool:
+        pipeline = self.get_client().pipeline(transaction=False)
+        pipeline.delete(self.get_task_key(task_id))
+        pipeline.zrem(self.task_ids_key, task_id)
+
+        return any(pipeline.execute()[:2])
+
+
+class TaskSnapshotIndex(TaskEventIndex):
+    """
+    Compacted variant of :py:class:`TaskEventIndex`, keeping a single snapshot per task: its latest event, with
+    the `created_at` and `updated_at` timestamps of the task entry.
+    """
+
+    def add_event(self, index: dict[str, list[TaskMessageJSON]], event_content: TaskMessageJSON, now: float) -> None:
+        """Replaces the snapshot of the task of the given event, moving the task to the end."""
+        previous_events = index.pop(event_content['task_id'], [])
+        created_at = previous_events[0].get('created_at', now) if previous_events else now
+        index[event_content['task_id']] = [{**event_content, 'created_at': created_at, 'updated_at': now}]
+
+
+class RedisTaskSnapshotIndex(RedisTaskEventIndex):
+    """
+    Compacted variant of :py:class:`RedisTaskEventIndex`, keeping a single snapshot per task in a Redis hash: its
+    latest event, pickled, with the `created_at` and `updated_at` timestamps of the task entry.
+    """
+
+    @staticmethod
+    def read_events(pipeline: Any, task_key: str) -> None:
+        pipeline.hgetall(task_key)
+
+    @staticmethod
+    def read_last_event(pipeline: Any, task_key: str) -> None:
+        pipeline.hget(task_key, 'event')
+
+    @staticmethod
+    def load_events(events: Any) -> list[TaskMessageJSON]:
+        snapshot: TaskMessageJSON = pickle.loads(events[b'event'])
+        snapshot['created_at'] = float(events.get(b'created_at', events[b'updated_at']))
+        snapshot['updated_at'] = float(events[b'updated_at'])
+
+        return [snapshot]
+
+    def push_event(self, pipeline: Any, task_key: str, event_content: TaskMessageJSON, now: float) -> None:
+        pipeline.hset(task_key, mapping={'event': pickle.dumps(event_content, pickle.HIGHEST_PROTOCOL),
+                                         'updated_at': now})
+        pipeline.hsetnx(task_key, 'created_at', now)
+
+
+class TaskCache:
+    """
+    Handles the task event cache of a user, using the configured Django cache, and the record of the schedule
+    requests of the user within the idempotency window; see the "request-id-ttl" setting.
+
+    Task events are stored per task in Redis if the default cache is the Redis one, or in a single cache entry
+    otherwise; see :py:class:`RedisTaskEventIndex` and :py:class:`TaskEventIndex`. With the 'compact'
+    "task-cache-mode" setting, only the latest event of each task is kept, as a snapshot with timestamps; see
+    :py:class:`RedisTaskSnapshotIndex` and :py:class:`TaskSnapshotIndex`.
+
+    Reads go through the process-local cache, if enabled by the "task-cache-l1-size" setting, whose entries of the
+    user are invalidated by the writes of this process; see :py:class:`django_tasks.local_cache.LocalTaskCache`.
+    """
+
+    def __init__(self, user_name: str):
+        self.user_name = user_name
+        self.event_index = self.get_index_class()(user_name)
+
+    @staticmethod
+    def get_index_class() -> type[TaskEventIndex]:
+        """Returns the task event storage class, for the cache backend and the "task-cache-mode" setting."""
+        if settings.CHANNEL_TASKS.task_cache_mode == 'compact':
+            return RedisTaskSnapshotIndex if RedisTaskEventIndex.is_supported() else TaskSnapshotIndex
+
+        return RedisTaskEventIndex if RedisTaskEventIndex.is_supported() else TaskEventIndex
+
+    def get_request_key(self, request_id: str) -> str:
+        return f'{self.user_name}.requests.{request_id}'
+
+    def add_request(self, request_id: str, timeout: float) -> bool:
+        """
+        Records, atomically, the schedule request with the given ID for `timeout` seconds, and returns whether it
+        is new; `False` means that it repeats a recorded request.
+        """
+        is_new: bool = cache.add(self.get_request_key(request_id), [], timeout=timeout)
+        return is_new
+
+    def set_request_tasks(self, request_id: str, task_ids: list[str], timeout: float):
+        """Records the IDs of the tasks scheduled by the given request, for `timeout` seconds."""
+        cache.set(self.get_request_key(request_id), task_ids, timeout=timeout)
+
+    def discard_request(self, request_id: str):
+        """Discards the record of the given request, so that it may be repeated."""
+        cache.delete(self.get_request_key(request_id))
+
+    def get_request_statuses(self, request_id: str) -> list[TaskMessageJSON]:
+        """Returns the last cached status of each of the tasks scheduled by the given recorded request."""
+        task_ids = cache.get(self.get_request_key(request_id)) or []
+        last_events = self.event_index.get_last_events(task_ids)
+
+        return [{'task_id': task_id, 'detail': last_events[task_id]['detail'] if task_id in last_events else {}}
+                for task_id in task_ids]
+
+    def get_index(self) -> dict[str, list[TaskMessageJSON]]:
+        """Returns the cached task events of the user, by task ID."""
+        index: dict[str, list[TaskMessageJSON]] = self.read_through(('index',), self.event_index.get_index)
+        return index
+
+    def get_page(self, limit: int, cursor: str = '') -> tuple[dict[str, list[TaskMessageJSON]], Optional[str]]:
+        """
+        Returns the cached task events of the `limit` most recently updated tasks of the user, by task ID in update
+        order, older than the given page cursor if any; and the cursor of the next (older) page, or `None`. Cursors
+        are numbers, as strings.
+        """
+        page: tuple[dict[str, list[TaskMessageJSON]], Optional[str]] = self.read_through(
+            ('page', limit, cursor), functools.partial(self.event_index.get_page, limit, cursor))
+        return page
+
+    def read_through(self, key: tuple[Hashable, ...], read: Callable[[], Any]) -> Any:
+        """
+        Returns the value read by the given function, from the local cache under the given key, if enabled and
+        cached; otherwise, reads it and caches it locally.
+        """
+        local_cache = LocalTaskCache.get()
+
+        if local_cache is None:
+            return read()
+
+        value = local_cache.lookup((self.user_name, *key))
+
+        if value is None:
+            value = read()
+            local_cache.store((self.user_name, *key), value)
+
+        return value
+
+    def invalidate_local_cache(self) -> None:
+        """Drops the entries of the user from the local cache, if enabled, after a write of the task events."""
+        local_cache = LocalTaskCache.get()
+
+        if local_cache is not None:
+            local_cache.invalidate(self.user_name)
 
     def clear_task_cache(self, task_id: str):
         """Clears a specific task cache, or logs a warning if not found."""
-        current_index = self.get_index()
-
-        if task_id in current_index:
-            del current_index[task_id]
-            cache.set(self.cache_key, current_index)
-        else:
+        if not self.event_index.clear_task(task_id):
             logging.getLogger('django').warning('No cache found for %s.', task_id)
 
+        self.invalidate_local_cache()
+
     def cache_task_event(self, task_id: str, event_content: TaskMessageJSON):
         """Stores the given task event data in the user's cache."""
-        current_index = self.get_index()
-        current_index[task_id].append(event_content)
-        cache.set(self.cache_key, current_index)
+        with metrics.cache_write_latency.time():
+            self.event_index.append_events([{**event_content, 'task_id': task_id}])
+
+        self.invalidate_local_cache()
+
+    def cache_task_events(self, events_content: list[TaskMessageJSON]):
+        """Stores the given sequence of task event data in the user's cache, with a single cache write."""
+        with metrics.cache_write_latency.time():
+            self.event_index.append_events(events_content)
+
+        self.invalidate_local_cache()
@@ -0,0 +1,82 @@
+"""
+This module provides the :py:class:`django_tasks.task_graph.TaskGraph` class, which holds the dependencies
+between the tasks of a schedule request array.
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+
+from typing import Any, Optional, Sequence, Union
+
+from django_tasks.typing import JSON, DocTaskJSON, TaskJSON
+
+
+class TaskSkipped(Exception):
+    """Raised by the task runner on a task that is not run because some task it depends on did not succeed."""
+
+    def __init__(self, failed_indices: list[int]):
+        super().__init__(f'Task skipped, since the tasks {failed_indices} it depends on did not succeed.')
+        self.failed_indices = failed_indices
+
+
+class TaskGraph:
+    """
+    Directed acyclic graph of the tasks in a schedule request array, where each task may declare, by array index,
+    the earlier tasks it depends on, as `depends_on`, and the inputs taken from the outputs of earlier tasks, as
+    `inputs_from` (which are dependencies too), e.g.::
+
+        [{"registered_task": "app.tasks.fetch", "inputs": {"url": "..."}},
+         {"registered_task": "app.tasks.parse", "inputs": {}, "inputs_from": {"text": 0}},
+         {"registered_task": "app.tasks.notify", "inputs": {}, "depends_on": [0, 1]}]
+
+    Since only earlier tasks may be referenced, the graph has no cycles. The task runner holds each dependent task
+    in its worker loop until the tasks it depends on are done, then runs it, or skips it if any of them did not
+    succeed; see :py:meth:`TaskGraph.wait_predecessors`.
+    """
+
+    def __init__(self, depends_on: Sequence[Sequence[int]], inputs_from: Sequence[dict[str, int]]):
+        self.inputs_from = list(inputs_from)
+        self.depends_on = [sorted({*indices, *sources.values()}) for indices, sources in zip(depends_on, inputs_from)]
+        self.futures: dict[int, concurrent.futures.Future] = {}
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: depends_on={self.depends_on}>'
+
+    @classmethod
+    def from_data(cls, valid_data: Sequence[Union[TaskJSON, DocTaskJSON]]) -> Optional[TaskGraph]:
+        """Returns the graph of the given array of valid task data, or `None` if there are no dependencies."""
+        graph = cls([data.get('depends_on', []) for data in valid_data],
+                    [data.get('inputs_from', {}) for data in valid_data])
+
+        return graph if any(graph.depends_on) else None
+
+    @staticmethod
+    def get_placeholder_inputs(inputs: dict[str, JSON], inputs_from: dict[str, int]) -> dict[str, JSON]:
+        """Returns the given inputs completed with `None` placeholders for those taken from earlier tasks."""
+        return {**inputs, **dict.fromkeys(inputs_from)}
+
+    def add_future(self, index: int, future: concurrent.futures.Future) -> None:
+        """Registers the future of the task at the given array index, on schedule."""
+        self.futures[index] = future
+
+    def has_inputs_from(self, index: int) -> bool:
+        return bool(self.inputs_from[index])
+
+    async def wait_predecessors(self, index: int) -> dict[str, Any]:
+        """
+        Awaits, in the running worker loop, the tasks that the task at the given array index depends on, and
+        returns the inputs taken from their outputs; raises :py:class:`TaskSkipped` if any of them did not succeed.
+        Note that the awaited tasks are not cancelled if this one is.
+        """
+        futures = {n: asyncio.wrap_future(self.futures[n]) for n in self.depends_on[index]}
+
+        if futures:
+            await asyncio.wait(futures.values())
+
+        failed_indices = [n for n, future in futures.items() if future.cancelled() or future.exception()]
+
+        if failed_indices:
+            raise TaskSkipped(failed_indices)
+
+        return {name: futures[n].result() for name, n in self.inputs_from[index].items()}
@@ -1,6 +1,6 @@
 """
-This module provides the tools to import and validate task coroutine functions specified by their
-dotted path. See its main function :py:func:`django_tasks.task_inspector.get_task_coro`.
+This module provides the tools to import and validate task coroutine (or async-generator) functions
+specified by their dotted path. See its main function :py:func:`django_tasks.task_inspector.get_task_coro`.
 """
 from __future__ import annotations
 
@@ -8,7 +8,7 @@ import collections
 import inspect
 import importlib
 
-from typing import Callable, Coroutine
+from typing import AsyncGenerator, Callable, Coroutine, Union
 
 from rest_framework import exceptions
 
@@ -17,15 +17,23 @@ from django_tasks.typing import JSON
 
 class TaskCoroutine:
     def __init__(self, registered_task: str, **inputs: JSON):
+        self.registered_task = registered_task.strip()
         self.inputs = inputs
         self.errors: dict[str, list[str]] = collections.defaultdict(list)
         self.set_callable(registered_task)
 
     @property
-    def coroutine(self) -> Coroutine:
-        """The coroutine instance ready to run in event loop."""
+    def coroutine(self) -> Union[Coroutine, AsyncGenerator]:
+        """
+        The coroutine instance ready to run in event loop, or the async generator instance for
+        async-generator functions, whose yielded items are broadcasted as task progress.
+        """
         return self.callable(**self.inputs)
 
+    @property
+    def is_generator(self) -> bool:
+        return inspect.isasyncgenfunction(self.callable)
+
     def set_callable(self, registered_task: str) -> None:
         if '.' not in registered_task:
             self.errors['registered_task'].append(f"Missing module name in import path '{registered_task}'.")
@@ -38,11 +46,12 @@ class TaskCoroutine:
                 self.errors['registered_task'].append(f"Cannot import module '{module_path}'.")
             else:
                 callable = getattr(module, name, None)
-                if inspect.iscoroutinefunction(callable):
+                if inspect.iscoroutinefunction(callable) or inspect.isasyncgenfunction(callable):
                     self.check_inputs(callable)
-                    self.callable: Callable[..., Coroutine] = callable
+                    self.callable: Callable[..., Union[Coroutine, AsyncGenerator]] = callable
                 else:
-                    self.errors['registered_task'].append(f"Referenced object {callable} is not a coroutine function.")
+                    self.errors['registered_task'].append(
+                        f"Referenced object {callable} is not a coroutine or async-generator function.")
 
     def check_inputs(self, callable: Callable):
         params = inspect.signature(callable).parameters
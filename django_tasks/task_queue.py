@@ -0,0 +1,241 @@
+"""
+This module provides the :py:class:`django_tasks.task_queue.TaskQueue` class, in charge of the admission
+control of the tasks scheduled in the :py:class:`django_tasks.task_runner.TaskRunner`.
+"""
+from __future__ import annotations
+
+import asyncio
+import collections
+import heapq
+import itertools
+import threading
+import time
+
+from typing import Callable, Optional
+
+from rest_framework import exceptions, status
+
+
+class TaskQueueFull(exceptions.APIException):
+    """Raised when a schedule request would overflow the bounded queue of pending tasks."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The task queue is full, try again later.'
+    default_code = 'task_queue_full'
+
+
+class TaskQueueClosed(exceptions.APIException):
+    """Raised when a schedule request arrives after the task queue was closed, on shutdown."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The task runner is shutting down, try again later.'
+    default_code = 'task_queue_closed'
+
+
+class PendingTask:
+    """Admission ticket of a scheduled task, which may have to wait in the queue for a run slot."""
+
+    def __init__(self, registered_task: str, loop: asyncio.AbstractEventLoop, priority: int = 0, user_name: str = ''):
+        """
+        :param registered_task: The dotted path of the task, to which per-task limits apply.
+        :param loop: The event loop that will run the task, where `admitted` is awaited.
+        :param priority: Tickets of higher priority are admitted first.
+        :param user_name: The user of the task, whose tickets share the user's fair share of the run slots.
+        """
+        self.registered_task = registered_task
+        self.loop = loop
+        self.priority = priority
+        self.user_name = user_name
+        self.admitted = asyncio.Event()
+        self.queued = False
+        self.running = False
+        self.discarded = False
+        self.sort_key: tuple[float, int] = (0.0, 0)
+        self.created_at = time.monotonic()
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: {self.registered_task}, priority={self.priority}, queued={self.queued}>'
+
+    def __lt__(self, other: PendingTask) -> bool:
+        return self.sort_key < other.sort_key
+
+
+class TaskQueue:
+    """
+    Thread-safe admission control: keeps the counts of running tasks, globally and per registered task,
+    and a bounded priority queue (a heap) of the tasks waiting for a run slot.
+
+    Tickets are pushed from the scheduling thread, and released from the worker threads when the task is done;
+    pending tickets are admitted by priority, skipping those blocked by their per-task limit. There is a heap per
+    registered task, so that admitting a ticket takes the heads of the heaps not blocked, rather than popping the
+    blocked tickets. Pushing a ticket that cannot run raises :py:class:`TaskQueueFull` if there are already
+    `max_pending` tickets waiting. Pending tickets
+    gain one priority level per `aging_interval` seconds waited, so that low priority tasks do not starve; since
+    all tickets age at the same rate, this is implemented with a sort key fixed on push.
+
+    Pending tickets are also ordered by weighted fair queueing across users: the sort key of a queued ticket
+    counts from the virtual time of its user, rather than from the current time, and each queued ticket advances
+    this virtual time by `fair_share_quantum` divided by the user weight. So a burst of one user is interleaved
+    with the tickets of the others, instead of delaying them all.
+    """
+    #: Maximum number of user virtual times kept before dropping those past.
+    max_virtual_times = 1000
+
+    def __init__(self,
+                 max_running: int,
+                 max_pending: int,
+                 get_task_limit: Callable[[str], int],
+                 aging_interval: float = 5.0,
+                 fair_share_quantum: float = 0.0,
+                 get_user_weight: Callable[[str], float] = lambda user_name: 1.0):
+        """
+        :param max_running: Maximum number of tasks running at once, or 0 for no limit.
+        :param max_pending: Maximum number of tasks waiting for a run slot.
+        :param get_task_limit: Returns the maximum number of running tasks for a given dotted path, or 0 for no limit.
+        :param aging_interval: Time, in seconds, for a pending ticket to gain one priority level.
+        :param fair_share_quantum: Virtual time, in seconds, that each queued ticket of a user adds to its next ones,
+            divided by the user weight; 0 disables the fair queueing.
+        :param get_user_weight: Returns the positive fair-share weight of a given user name.
+        """
+        self.max_running = max_running
+        self.max_pending = max_pending
+        self.get_task_limit = get_task_limit
+        self.aging_interval = aging_interval
+        self.fair_share_quantum = fair_share_quantum
+        self.get_user_weight = get_user_weight
+        self.virtual_times: dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.running: collections.Counter[str] = collections.Counter()
+        self.running_count = 0
+        self.pending: collections.defaultdict[str, list[PendingTask]] = collections.defaultdict(list)
+        self.pending_count = 0
+        self.sequence = itertools.count()
+        self.closed = False
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: running={self.running_count}, pending={self.pending_count}>'
+
+    def close(self) -> None:
+        """Closes the queue to new schedule requests."""
+        with self.lock:
+            self.closed = True
+
+    def check_capacity(self, count: int) -> None:
+        """
+        Raises :py:class:`TaskQueueClosed` if the queue is closed, or :py:class:`TaskQueueFull` if scheduling `count`
+        more tasks could overflow the queue of pending tasks. Without a global limit, tasks only wait behind their
+        per-task limits, so all of them are taken as overflowing once some tickets are pending. This is a check
+        ahead of the schedule of an array of tasks; the bound is enforced by :py:meth:`TaskQueue.push`.
+        """
+        with self.lock:
+            if self.closed:
+                raise TaskQueueClosed()
+
+            if self.max_running:
+                overflow = max(0, count - self.max_running + self.running_count)
+            else:
+                overflow = count if self.pending_count else 0
+
+            if self.pending_count + overflow > self.max_pending:
+                raise TaskQueueFull()
+
+    def can_run(self, ticket: PendingTask) -> bool:
+        if self.max_running and self.running_count >= self.max_running:
+            return False
+
+        task_limit = self.get_task_limit(ticket.registered_task)
+
+        return not task_limit or self.running[ticket.registered_task] < task_limit
+
+    def admit(self, ticket: PendingTask) -> None:
+        self.running[ticket.registered_task] += 1
+        self.running_count += 1
+        ticket.running = True
+
+    def push(self, ticket: PendingTask, bounded: bool = True) -> bool:
+        """
+        Admits the given ticket if there is a free run slot, and returns whether it was admitted, or queues it;
+        raises :py:class:`TaskQueueFull` if the queue of pending tickets is full, unless not `bounded`, as for
+        the retries of tasks admitted already.
+        """
+        with self.lock:
+            if self.can_run(ticket):
+                self.admit(ticket)
+                ticket.admitted.set()
+                return True
+
+            if bounded and self.pending_count >= self.max_pending:
+                raise TaskQueueFull()
+
+            ticket.queued = True
+            ticket.sort_key = (self.get_virtual_time(ticket) / self.aging_interval - ticket.priority,
+                               next(self.sequence))
+            heapq.heappush(self.pending[ticket.registered_task], ticket)
+            self.pending_count += 1
+            return False
+
+    def get_virtual_time(self, ticket: PendingTask) -> float:
+        """
+        Returns the virtual start time of the given ticket, being queued: the current time, or the later virtual
+        time of its user, which is then advanced by the ticket's fair share quantum.
+        """
+        now = time.monotonic()
+
+        if not self.fair_share_quantum:
+            return now
+
+        start = max(now, self.virtual_times.get(ticket.user_name, now))
+        self.virtual_times[ticket.user_name] = start + self.fair_share_quantum / self.get_user_weight(ticket.user_name)
+
+        if len(self.virtual_times) > self.max_virtual_times:
+            self.virtual_times = {name: vtime for name, vtime in self.virtual_times.items() if vtime > now}
+
+        return start
+
+    def release(self, ticket: PendingTask) -> None:
+        """
+        Frees the run slot of the given ticket, or discards it from the queue, and admits pending tickets. Tickets
+        never pushed, as those of the tasks skipped by the task graph, or released already, are ignored.
+        """
+        with self.lock:
+            if not ticket.running and not ticket.queued:
+                return
+
+            if not ticket.running:
+                ticket.discarded = True
+                ticket.queued = False
+                self.pending_count -= 1
+                return
+
+            ticket.running = False
+            self.running[ticket.registered_task] -= 1
+            self.running_count -= 1
+
+            while not (self.max_running and self.running_count >= self.max_running):
+                pending_ticket = self.pop_next()
+
+                if pending_ticket is None:
+                    break
+
+                self.pending_count -= 1
+                self.admit(pending_ticket)
+                pending_ticket.loop.call_soon_threadsafe(pending_ticket.admitted.set)
+
+    def pop_next(self) -> Optional[PendingTask]:
+        """
+        Pops the first pending ticket, by sort key, among the heads of the heaps of the registered tasks not blocked
+        by their per-task limit, or returns `None` if there is none; discarded tickets are dropped on the way.
+        """
+        heads = []
+
+        for registered_task, heap in list(self.pending.items()):
+            while heap and heap[0].discarded:
+                heapq.heappop(heap)
+
+            if not heap:
+                del self.pending[registered_task]
+            elif self.can_run(heap[0]):
+                heads.append(heap[0])
+
+        if not heads:
+            return None
+
+        return heapq.heappop(self.pending[min(heads).registered_task])
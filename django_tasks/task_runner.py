@@ -2,28 +2,88 @@
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
+import datetime
+import functools
 import inspect
 import logging
 import time
 import threading
+import zlib
 
-from typing import Callable, Coroutine
+from typing import Any, AsyncGenerator, Callable, Coroutine, NamedTuple, Optional, Union
 
 from channels.layers import get_channel_layer
 from rest_framework import status
 from django.conf import settings
 
+from django_tasks import metrics
+from django_tasks.delayed_tasks import DelayedTaskHeap
+from django_tasks.event_batcher import TaskEventBatcher
+from django_tasks.loop_watchdog import LoopWatchdog
+from django_tasks.periodic_scheduler import PeriodicScheduler
+from django_tasks.process_pool import TaskProcessPool
+from django_tasks.result_cache import TaskResultCache
+from django_tasks.retry_policy import RetryPolicy
 from django_tasks.task_cache import TaskCache
-from django_tasks.typing import TaskStatusJSON, TaskMessageJSON
+from django_tasks.task_graph import TaskGraph, TaskSkipped
+from django_tasks.task_inspector import TaskCoroutine
+from django_tasks.task_queue import PendingTask, TaskQueue, TaskQueueClosed, TaskQueueFull
+from django_tasks.typing import JSON, TaskStatusJSON, TaskMessageJSON
+
+
+class TaskTimeout(Exception):
+    """Raised by the task runner on a task that exceeds its maximum run time."""
+
+    def __init__(self, timeout: float, elapsed: float):
+        super().__init__(f'Task timed out after {elapsed:.3f}s (timeout={timeout}s).')
+        self.timeout = timeout
+        self.elapsed = elapsed
+
+
+class InFlightTask(NamedTuple):
+    """Record of a scheduled task that is not done yet, indexed by task ID in the task runner."""
+    future: concurrent.futures.Future
+    user_name: str
+    registered_task: str
+
+
+class TaskWorker:
+    """
+    A daemon (worker) thread running a separate (worker) event loop, with its count of in-flight tasks, and its
+    heap of delayed tasks.
+    """
+
+    def __init__(self, name: str):
+        self.event_loop = asyncio.new_event_loop()
+        self.event_loop.set_debug(settings.DEBUG)
+        self.delayed_tasks = DelayedTaskHeap(self.event_loop)
+        self.thread = threading.Thread(target=self.event_loop.run_forever, name=name, daemon=True)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+
+    def __str__(self) -> str:
+        return f'loop={self.event_loop}, thread={self.thread}, in_flight={self.in_flight}'
+
+    def ensure_alive(self):
+        """Ensures the worker thread is alive."""
+        if not self.thread.is_alive():
+            self.thread.start()
+
+    def add_in_flight(self, count: int):
+        with self.lock:
+            self.in_flight += count
+            metrics.in_flight_tasks.set(self.thread.name, value=self.in_flight)
 
 
 class TaskRunner:
     """
-    Singleton class in charge of scheduling background task runs with `asyncio`, in a dedicated (worker) thread,
+    Singleton class in charge of scheduling background task runs with `asyncio`, in dedicated (worker) threads,
     and of broadcasting the task states and results through a configured channel layer.
 
-    The worker thread is a daemon thread running a separate (worker) event loop; that worker loop runs
-    all the scheduled background tasks concurrently.
+    Each worker thread is a daemon thread running a separate (worker) event loop, that runs concurrently
+    the scheduled background tasks placed in it. The number of workers is set by the "worker-threads" setting,
+    and the placement of tasks by the "worker-placement" setting; see :py:meth:`TaskRunner.get_worker`.
 
     Usage, in async context, is as follows::
 
@@ -39,7 +99,7 @@ class TaskRunner:
     @classmethod
     def get(cls) -> TaskRunner:
         """
-        Returns the last instance created, a new one if necessary, and ensures that its worker thread is alive.
+        Returns the last instance created, a new one if necessary, and ensures that its worker threads are alive.
         """
         if not cls.instances:
             cls()
@@ -56,64 +116,497 @@ class TaskRunner:
         assert caller_name == 'TaskRunner.get', (
                 f"TaskRunner instances must be created by its 'get' classmethod (so not by '{caller_name}')")
 
-        self.worker_event_loop = asyncio.new_event_loop()
-        self.worker_event_loop.set_debug(settings.DEBUG)
-        self.worker_thread = threading.Thread(target=self.worker_event_loop.run_forever, daemon=True)
+        self.workers = [TaskWorker(f'TaskWorker-{n}') for n in range(max(1, settings.CHANNEL_TASKS.worker_threads))]
+        self.worker_placement = settings.CHANNEL_TASKS.worker_placement
+        self.in_flight_tasks: dict[str, InFlightTask] = {}
+        self.scheduled_futures: set[concurrent.futures.Future] = set()
+        self.running_tasks: dict[asyncio.Task, tuple[str, str]] = {}
+        self.pending_callbacks: set[asyncio.Future] = set()
+        self.task_queue = TaskQueue(settings.CHANNEL_TASKS.max_concurrent_tasks,
+                                    settings.CHANNEL_TASKS.max_pending_tasks,
+                                    self.get_task_concurrency_limit,
+                                    settings.CHANNEL_TASKS.priority_aging_interval,
+                                    settings.CHANNEL_TASKS.fair_share_quantum,
+                                    settings.CHANNEL_TASKS.get_user_weight)
+        self.process_pool = (TaskProcessPool(settings.CHANNEL_TASKS.process_pool_size)
+                             if settings.CHANNEL_TASKS.process_pool_size > 0 else None)
+
+        if self.process_pool:
+            self.process_pool.warm_up()
+
+        self.loop_watchdog = (LoopWatchdog(self, settings.CHANNEL_TASKS.loop_watchdog_interval,
+                                           settings.CHANNEL_TASKS.blocking_call_threshold)
+                              if settings.CHANNEL_TASKS.loop_watchdog_interval > 0 else None)
+
+        if self.loop_watchdog:
+            self.loop_watchdog.start()
+
+        self.periodic_scheduler = (PeriodicScheduler(self, settings.CHANNEL_TASKS.periodic_check_interval)
+                                   if settings.CHANNEL_TASKS.periodic_check_interval > 0 else None)
+
+        if self.periodic_scheduler:
+            self.periodic_scheduler.start()
+
         self.__class__.instances.append(self)
         logging.getLogger('django').debug('New task runner: %s.', self)
 
     def __str__(self) -> str:
-        return f'loop={self.worker_event_loop}, thread={self.worker_thread}'
+        return '; '.join(map(str, self.workers))
 
     def __repr__(self) -> str:
         return f'<{self.__class__.__name__}: {self}>'
 
+    @staticmethod
+    def get_task_concurrency_limit(registered_task: str) -> int:
+        """Returns the configured maximum number of concurrent runs of the given task, 0 meaning no limit."""
+        if not registered_task:
+            return 0
+
+        limit: int = settings.CHANNEL_TASKS.get_task_int(registered_task, 'max-concurrency', 0)
+        return limit
+
+    @property
+    def worker_event_loop(self) -> asyncio.AbstractEventLoop:
+        """The event loop of the first worker, where the tasks run if there is a single worker."""
+        return self.workers[0].event_loop
+
+    @property
+    def worker_thread(self) -> threading.Thread:
+        """The thread of the first worker, where the tasks run if there is a single worker."""
+        return self.workers[0].thread
+
+    @staticmethod
+    def get_task_timeout(registered_task: str, requested_timeout: Optional[float] = None) -> Optional[float]:
+        """
+        Returns the maximum run time of the given task, in seconds, or `None` for no limit: the "timeout" option of
+        the task if set, or the "task-timeout" setting otherwise, shortened to the requested timeout, if any.
+        """
+        configured_timeout: float = settings.CHANNEL_TASKS.task_timeout
+
+        if registered_task:
+            configured_timeout = settings.CHANNEL_TASKS.get_task_float(registered_task, 'timeout', configured_timeout)
+
+        timeouts = [t for t in (configured_timeout, requested_timeout) if t]
+
+        return min(timeouts) if timeouts else None
+
     def ensure_alive(self):
-        """Ensures the worker thread is alive."""
-        if not self.worker_thread.is_alive():
-            self.worker_thread.start()
+        """Ensures the worker threads are alive."""
+        for worker in self.workers:
+            worker.ensure_alive()
+
+    def get_worker(self, task_id: str) -> TaskWorker:
+        """
+        Returns the worker where to place the given task: the one with fewest in-flight tasks for the
+        'least-loaded' placement, or the one given by a hash of the task ID for the 'task-id-hash' placement.
+        """
+        if len(self.workers) == 1:
+            return self.workers[0]
+
+        if self.worker_placement == 'task-id-hash':
+            return self.workers[zlib.crc32(task_id.encode()) % len(self.workers)]
+
+        return min(self.workers, key=lambda worker: worker.in_flight)
+
+    def get_coroutine(self, task_coro: TaskCoroutine, **inputs: JSON) -> Union[Coroutine, AsyncGenerator]:
+        """
+        Returns the coroutine to schedule for the given task: the task coroutine (or async generator) itself or,
+        for tasks with 'process' "execution-mode", a coroutine awaiting the task run in the process pool. The
+        given `inputs`, if any, update those of the task, as the ones taken from the outputs of earlier tasks.
+        """
+        task_coro.inputs.update(inputs)
+        execution_mode = settings.CHANNEL_TASKS.get_task_string(task_coro.registered_task, 'execution-mode', 'loop')
+
+        if execution_mode != 'process':
+            return task_coro.coroutine
+
+        if task_coro.is_generator:
+            logging.getLogger('django').warning(
+                'Async-generator task %s cannot run in the process pool, running it in the worker loop.',
+                task_coro.registered_task)
+            return task_coro.coroutine
 
-    def run_coroutine(self, coroutine: Coroutine) -> asyncio.Future:
-        """Runs the given coroutine thread-safe in the worker loop."""
-        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, self.worker_event_loop))
+        if not self.process_pool:
+            logging.getLogger('django').warning(
+                'No process pool for %s, running it in the worker loop.', task_coro.registered_task)
+            return task_coro.coroutine
+
+        coroutine = self.process_pool.run(task_coro.registered_task, task_coro.inputs)
+        coroutine.__name__ = task_coro.callable.__name__
+        return coroutine
+
+    def run_coroutine(self,
+                      coroutine: Coroutine,
+                      event_loop: Optional[asyncio.AbstractEventLoop] = None) -> asyncio.Future:
+        """Runs the given coroutine thread-safe in the given worker loop, or in the first one by default."""
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, event_loop or self.worker_event_loop))
 
     def run_on_task_info(self,
                          async_callback: Callable[[str, TaskStatusJSON], Coroutine],
                          task_id: str,
+                         event_loop: asyncio.AbstractEventLoop,
                          task: asyncio.Future) -> asyncio.Future:
         """
         Runs the given async callback on the task result, taking the task ID and yielded task data as arguments.
         """
-        return self.run_coroutine(async_callback(task_id, self.get_task_status(task)))
+        return self.run_callback(async_callback(task_id, self.get_task_status(task)), event_loop)
+
+    def run_callback(self, coroutine: Coroutine, event_loop: asyncio.AbstractEventLoop) -> asyncio.Future:
+        """
+        Runs the given task callback coroutine as :py:meth:`TaskRunner.run_coroutine` does, keeping track of it
+        until done, so that the shutdown drain awaits it.
+        """
+        future = self.run_coroutine(coroutine, event_loop)
+        self.pending_callbacks.add(future)
+        future.add_done_callback(self.pending_callbacks.discard)
+        return future
 
     async def schedule(self,
-                       coroutine: Coroutine,
+                       coroutine: Union[Coroutine, AsyncGenerator],
                        *coro_callbacks: Callable[[str, TaskStatusJSON], Coroutine],
                        task_id: str = '',
-                       user_name: str = '') -> asyncio.Future:
+                       user_name: str = '',
+                       registered_task: str = '',
+                       priority: int = 0,
+                       timeout: Optional[float] = None,
+                       status_callback: Optional[Callable[[str, TaskStatusJSON], Coroutine]] = None,
+                       coroutine_factory: Optional[Callable[..., Union[Coroutine, AsyncGenerator]]] = None,
+                       inputs: Optional[dict[str, JSON]] = None,
+                       task_graph: Optional[TaskGraph] = None,
+                       graph_index: int = 0,
+                       delay: float = 0) -> asyncio.Future:
         """
-        Schedules the given coroutine and (optional) callbacks to run immediately in the worker thread,
-        and notifies the specified user of the task state.
+        Schedules the given coroutine and (optional) callbacks to run in a worker thread as soon as a run slot
+        is free, and notifies the specified user of the task state.
 
-        :param coroutine: Coroutine of the main task to run.
+        :param coroutine: Coroutine of the main task to run, or async generator whose yielded items are
+            broadcasted with 'Progress' status; see :py:meth:`TaskRunner.stream_progress`.
         :param coro_callbacks: Sequence of async callbacks that will run just after the main task has finished,
             taking as arguments the task ID and the yielded task data.
         :param task_id: A universally unique identifier of the main task.
         :param user_name: A Django user name.
+        :param registered_task: The dotted path of the task, to which the per-task concurrency limit applies.
+        :param priority: Tasks waiting in the task queue are started by priority, higher values first.
+        :param timeout: Requested maximum run time in seconds, which may only shorten the configured one;
+            see :py:meth:`TaskRunner.get_task_timeout`.
+        :param status_callback: Async callback that will run on each intermediate status of the task, namely
+            the progress of an async-generator task and the retries, taking as arguments the task ID and the
+            status data.
+        :param coroutine_factory: Returns a new coroutine of the main task, for each retry of failed runs, taking
+            as keyword arguments the inputs taken from the outputs of earlier tasks, if any. Tasks are retried
+            only if given; see :py:class:`django_tasks.retry_policy.RetryPolicy`.
+        :param inputs: The inputs of the task, given for result caching; see :py:meth:`TaskRunner.schedule_cached`.
+        :param task_graph: The dependencies between the tasks of the schedule request, if any, where this task
+            has array index `graph_index`. Dependent tasks are notified with 'Queued' status, and held in the
+            worker loop until the tasks they depend on are done; see :py:class:`django_tasks.task_graph.TaskGraph`.
+        :param delay: Time, in seconds, to wait before running the task. Delayed tasks are notified with
+            'Scheduled' status, and wait in the heap of delayed tasks of their worker; see
+            :py:class:`django_tasks.delayed_tasks.DelayedTaskHeap`.
+
+        Note that `task_id`, `user_name`, `registered_task` are optional parameters here; this class is not
+        responsible of validating them. Tasks that exceed the concurrency limits wait in the task queue, and are
+        notified with 'Queued' status, or raise :py:class:`django_tasks.task_queue.TaskQueueFull` if the queue is
+        full; see :py:class:`django_tasks.task_queue.TaskQueue`. All schedule requests raise
+        :py:class:`django_tasks.task_queue.TaskQueueClosed` once the task runner is draining.
+        """
+        if self.task_queue.closed:
+            await self.close_coroutine(coroutine)
+            raise TaskQueueClosed()
+
+        task_name: str = getattr(coroutine, '__name__')
+        has_graph_inputs = task_graph is not None and task_graph.has_inputs_from(graph_index)
+        result_cache = (TaskResultCache.from_settings(registered_task, inputs)
+                        if inputs is not None and isinstance(coroutine, Coroutine) and not has_graph_inputs else None)
+
+        if (result_cache and isinstance(coroutine, Coroutine) and delay <= 0
+                and (cache_entry := result_cache.get()) is not None):
+            return await self.schedule_cached(coroutine, cache_entry['output'], *coro_callbacks, task_name=task_name,
+                                              task_id=task_id, user_name=user_name, registered_task=registered_task,
+                                              task_graph=task_graph, graph_index=graph_index)
+
+        worker = self.get_worker(task_id)
+        ticket = PendingTask(registered_task, worker.event_loop, priority, user_name)
+
+        is_dependent = task_graph is not None and bool(task_graph.depends_on[graph_index])
+
+        try:
+            if delay > 0:
+                initial_status = self.get_scheduled_status(delay)
+            elif not is_dependent and self.task_queue.push(ticket):
+                initial_status = self.get_started_status()
+            else:
+                initial_status = self.get_queued_status()
+        except TaskQueueFull:
+            await self.close_coroutine(coroutine)
+            raise
+
+        worker.add_in_flight(1)
+        initial_broadcast = self.run_coroutine(
+            self.broadcast_status(task_name, task_id, user_name, initial_status), worker.event_loop)
+        run_coroutine = self.run_admitted(
+            coroutine, ticket, task_name, task_id, user_name, self.get_task_timeout(registered_task, timeout),
+            status_callback, coroutine_factory, result_cache, task_graph, graph_index,
+        )
+        concurrent_future = (worker.delayed_tasks.push(delay, run_coroutine) if delay > 0
+                             else asyncio.run_coroutine_threadsafe(run_coroutine, worker.event_loop))
+        task = asyncio.wrap_future(concurrent_future)
+        self.scheduled_futures.add(concurrent_future)
+        concurrent_future.add_done_callback(self.scheduled_futures.discard)
+
+        if task_graph:
+            task_graph.add_future(graph_index, concurrent_future)
+
+        if task_id:
+            self.in_flight_tasks[task_id] = InFlightTask(concurrent_future, user_name, registered_task)
+            task.add_done_callback(lambda tk: self.in_flight_tasks.pop(task_id, None))
+
+        await initial_broadcast
+
+        task.add_done_callback(lambda tk: worker.add_in_flight(-1))
+        task.add_done_callback(lambda tk: metrics.completed_tasks.inc(
+            registered_task, self.get_task_status(tk)['status']))
+        task.add_done_callback(lambda tk: self.run_callback(
+            self.broadcast_task(task_name, task_id, user_name, tk), worker.event_loop))
+
+        for coro_callback in coro_callbacks:
+            task.add_done_callback(functools.partial(self.run_on_task_info, coro_callback, task_id, worker.event_loop))
+
+        return task
 
-        Note that `task_id`, `user_name` are optional parameters here; this class is not responsible
-        of validating them.
+    async def schedule_cached(self,
+                              coroutine: Coroutine,
+                              output: Any,
+                              *coro_callbacks: Callable[[str, TaskStatusJSON], Coroutine],
+                              task_name: str,
+                              task_id: str,
+                              user_name: str,
+                              registered_task: str,
+                              task_graph: Optional[TaskGraph] = None,
+                              graph_index: int = 0) -> asyncio.Future:
+        """
+        Short-circuits the schedule of a task whose output is found in its result cache: the coroutine is closed
+        without running, and the cached output is broadcasted with 'Success' status and a `cached` marker, in the
+        running loop rather than in a worker loop. The callbacks are awaited, and a done future is returned; it is
+        also registered in the given task graph, if any, for the tasks that depend on this one.
         """
-        task_name = coroutine.__name__
-        task = self.run_coroutine(coroutine)
-        await self.broadcast_task(task_name, task_id, user_name, task)
+        coroutine.close()
 
-        task.add_done_callback(lambda tk: self.run_coroutine(self.broadcast_task(task_name, task_id, user_name, tk)))
+        if task_graph:
+            graph_future: concurrent.futures.Future = concurrent.futures.Future()
+            graph_future.set_result(output)
+            task_graph.add_future(graph_index, graph_future)
+
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(output)
+        metrics.completed_tasks.inc(registered_task, 'Success')
+        await self.broadcast_status(task_name, task_id, user_name, self.get_cached_status(output))
 
         for coro_callback in coro_callbacks:
-            task.add_done_callback(lambda tk: self.run_on_task_info(coro_callback, task_id, tk))
+            await coro_callback(task_id, self.get_cached_status(output))
+
+        logging.getLogger('django').debug('Task %s (%s) output found in result cache.', task_id, registered_task)
+        return future
+
+    async def run_admitted(self,
+                           coroutine: Union[Coroutine, AsyncGenerator],
+                           ticket: PendingTask,
+                           task_name: str,
+                           task_id: str,
+                           user_name: str,
+                           timeout: Optional[float],
+                           status_callback: Optional[Callable[[str, TaskStatusJSON], Coroutine]] = None,
+                           coroutine_factory: Optional[Callable[..., Union[Coroutine, AsyncGenerator]]] = None,
+                           result_cache: Optional[TaskResultCache] = None,
+                           task_graph: Optional[TaskGraph] = None,
+                           graph_index: int = 0) -> Any:
+        """
+        Awaits, in the worker loop, the tasks this one depends on in the given task graph, if any, then the
+        admission of the given ticket, then the task coroutine (or the streaming of the task generator), raising
+        :py:class:`TaskTimeout` if the latter exceeds the given `timeout`. The tickets of dependent and delayed
+        tasks are pushed to the task queue here, when they are ready to run.
+
+        Failed runs are retried, with new coroutines from the `coroutine_factory`, as the retry policy of the task
+        decides, notifying each retry with 'Retry' status; see :py:class:`django_tasks.retry_policy.RetryPolicy`.
+        The run slot is freed during the backoff delay, and a new ticket is pushed for the retry.
+        The output is stored in the given result cache, if any, before the task is done.
+        """
+        retry_policy = RetryPolicy.from_settings(ticket.registered_task) if coroutine_factory else None
+        attempt = 1
+        try:
+            if task_graph and task_graph.depends_on[graph_index]:
+                graph_inputs = await task_graph.wait_predecessors(graph_index)
+
+                if graph_inputs and coroutine_factory:
+                    await self.close_coroutine(coroutine)
+                    coroutine = coroutine_factory(**graph_inputs)
+
+            if not (ticket.running or ticket.queued):
+                ticket.created_at = time.monotonic()
+
+                if self.task_queue.push(ticket):
+                    await self.broadcast_status(task_name, task_id, user_name, self.get_started_status())
+
+            if ticket.queued:
+                await ticket.admitted.wait()
+                await self.broadcast_status(task_name, task_id, user_name, self.get_started_status())
+
+            running_task = asyncio.current_task()
+            metrics.queue_wait.observe(time.monotonic() - ticket.created_at, ticket.registered_task)
+
+            if running_task:
+                self.running_tasks[running_task] = (task_id, ticket.registered_task)
+            try:
+                while True:
+                    try:
+                        output = await self.run_attempt(
+                            coroutine, ticket, task_name, task_id, user_name, timeout, status_callback)
+
+                        if result_cache:
+                            result_cache.set(output)
+
+                        return output
+                    except Exception as error:
+                        if not (retry_policy and coroutine_factory and retry_policy.should_retry(error, attempt)):
+                            raise
+
+                        retry_status = self.get_retry_status(error, attempt, retry_policy.get_delay(attempt))
+                        await self.broadcast_status(task_name, task_id, user_name, retry_status)
+
+                        if status_callback:
+                            await status_callback(task_id, self.get_retry_status(
+                                error, attempt, retry_status['delay']))
+
+                        self.task_queue.release(ticket)
+                        await asyncio.sleep(retry_status['delay'])
+                        ticket = PendingTask(ticket.registered_task, ticket.loop, ticket.priority, ticket.user_name)
+
+                        if not self.task_queue.push(ticket, bounded=False):
+                            await ticket.admitted.wait()
+
+                        attempt += 1
+                        coroutine = coroutine_factory()
+            finally:
+                if running_task:
+                    del self.running_tasks[running_task]
+        finally:
+            await self.close_coroutine(coroutine)
+            self.task_queue.release(ticket)
 
-        return task
+    @staticmethod
+    async def close_coroutine(coroutine: Union[Coroutine, AsyncGenerator]) -> None:
+        """Closes the given task coroutine, or async generator, which is a no-op if it has finished."""
+        if isinstance(coroutine, AsyncGenerator):
+            await coroutine.aclose()
+        else:
+            coroutine.close()
+
+    async def run_attempt(self,
+                          coroutine: Union[Coroutine, AsyncGenerator],
+                          ticket: PendingTask,
+                          task_name: str,
+                          task_id: str,
+                          user_name: str,
+                          timeout: Optional[float],
+                          status_callback: Optional[Callable[[str, TaskStatusJSON], Coroutine]] = None) -> Any:
+        """Runs the task coroutine, or streams the task generator, within the given `timeout`."""
+        started_at = time.monotonic()
+        try:
+            async with asyncio.timeout(timeout) as timeout_context:
+                if isinstance(coroutine, AsyncGenerator):
+                    return await self.stream_progress(coroutine, task_name, task_id, user_name, status_callback)
+
+                return await coroutine
+        except TimeoutError as error:
+            if timeout is not None and timeout_context.expired():
+                raise TaskTimeout(timeout, time.monotonic() - started_at) from error
+            raise
+        finally:
+            metrics.run_duration.observe(time.monotonic() - started_at, ticket.registered_task)
+
+    async def stream_progress(self,
+                              generator: AsyncGenerator,
+                              task_name: str,
+                              task_id: str,
+                              user_name: str,
+                              status_callback: Optional[Callable[[str, TaskStatusJSON], Coroutine]] = None
+                              ) -> int:
+        """
+        Iterates the given task generator, broadcasting each yielded item as 'Progress' status data, and running
+        the status callback on it, so that outputs are streamed instead of being held until the task finishes.
+        Returns the number of yielded items, which is the task output.
+        """
+        progress = 0
+
+        async for item in generator:
+            progress += 1
+            await self.broadcast_status(task_name, task_id, user_name, self.get_progress_status(item, progress))
+
+            if status_callback:
+                await status_callback(task_id, self.get_progress_status(item, progress))
+
+        return progress
+
+    def cancel_tasks(self, user_name: str, task_id: str = '', request_id: str = '') -> list[str]:
+        """
+        Cancels, thread-safe, the in-flight task of the given user with ID `task_id`, or all those scheduled by the
+        request with ID `request_id`, and returns the IDs of the cancelled tasks. The final 'Cancelled' status is
+        broadcasted as usual, and the task callbacks run.
+
+        Note that tasks running in the process pool are only cancelled for the task runner; their process runs on.
+        """
+        cancelled_ids = []
+
+        for in_flight_id, in_flight_task in list(self.in_flight_tasks.items()):
+            if in_flight_task.user_name != user_name:
+                continue
+
+            if in_flight_id == task_id or (request_id and in_flight_id.rsplit('.', 1)[0] == request_id):
+                if in_flight_task.future.cancel():
+                    cancelled_ids.append(in_flight_id)
+
+        logging.getLogger('django').info('Cancelled tasks %s of user %s.', cancelled_ids, user_name)
+        return cancelled_ids
+
+    async def drain(self, grace_period: float) -> None:
+        """
+        Drains the task runner on shutdown: stops the loop watchdog and the periodic scheduler, closes the task
+        queue to new schedule requests, waits up to `grace_period` seconds for the scheduled tasks to finish, and
+        cancels the rest. Then waits, up to the same period, for the task callbacks that broadcast, cache and store
+        the final task status, and flushes the event batches of the worker loops.
+        """
+        if self.loop_watchdog:
+            self.loop_watchdog.stop()
+
+        if self.periodic_scheduler:
+            self.periodic_scheduler.stop()
+
+        self.task_queue.close()
+        scheduled_futures = {asyncio.wrap_future(future): future for future in list(self.scheduled_futures)}
+        logging.getLogger('django').info('Draining %s scheduled tasks, with a grace period of %ss.',
+                                         len(scheduled_futures), grace_period)
+
+        if scheduled_futures:
+            done, pending = await asyncio.wait(scheduled_futures, timeout=grace_period)
+
+            if pending:
+                task_ids = {in_flight_task.future: in_flight_id
+                            for in_flight_id, in_flight_task in list(self.in_flight_tasks.items())}
+                cancelled_ids = [task_ids.get(scheduled_futures[future], '') for future in pending
+                                 if scheduled_futures[future].cancel()]
+                logging.getLogger('django').warning('Cancelled tasks %s on shutdown.', cancelled_ids)
+                await asyncio.wait(pending)
+
+        if self.pending_callbacks:
+            await asyncio.wait(set(self.pending_callbacks), timeout=grace_period)
+
+        await asyncio.gather(*[self.run_coroutine(TaskEventBatcher.drain_running_loop(), worker.event_loop)
+                               for worker in self.workers])
+        await TaskEventBatcher.drain_running_loop()
+
+        if self.process_pool:
+            self.process_pool.executor.shutdown(wait=False, cancel_futures=True)
+
+        logging.getLogger('django').info('Drained task runner: %s.', self)
 
     @classmethod
     async def broadcast_task(cls, name: str, task_id: str, user_name: str, task: asyncio.Future):
@@ -127,16 +620,60 @@ class TaskRunner:
 
         Note that this class is not responsible of validating these parameters.
         """
-        status_data = cls.get_task_status(task)
+        await cls.broadcast_status(name, task_id, user_name, cls.get_task_status(task))
+
+    @classmethod
+    async def broadcast_status(cls, name: str, task_id: str, user_name: str, status_data: TaskStatusJSON):
+        """Caches the given task status data, and sends it to all consumers to which the user is connected,
+        as a message of type `task.<status>`; or adds it to the batch of events of the running loop, if
+        "broadcast-batch-window" is set. See :py:class:`django_tasks.event_batcher.TaskEventBatcher`.
+        """
         status_data['registered_task'] = name
         task_info: TaskMessageJSON = {'task_id': task_id, 'detail': status_data}
+        task_event = {'type': f"task.{status_data['status'].lower()}", 'content': task_info, 'timestamp': time.time()}
 
-        user_task_cache = TaskCache(user_name)
-        user_task_cache.cache_task_event(task_id, task_info)
+        if settings.CHANNEL_TASKS.broadcast_batch_window > 0:
+            TaskEventBatcher.get().add(user_name, task_event)
+            return
 
-        task_event = {'type': f"task.{status_data['status'].lower()}", 'content': task_info, 'timestamp': time.time()}
-        channel_layer = get_channel_layer()
-        await channel_layer.group_send(f'{user_name}_{settings.CHANNEL_TASKS.channel_group}', task_event)
+        with metrics.broadcast_latency.time():
+            user_task_cache = TaskCache(user_name)
+            user_task_cache.cache_task_event(task_id, task_info)
+
+            channel_layer = get_channel_layer()
+            await channel_layer.group_send(f'{user_name}_{settings.CHANNEL_TASKS.channel_group}', task_event)
+
+    @staticmethod
+    def get_started_status() -> TaskStatusJSON:
+        """Returns the status data of a task that has just been started."""
+        return {'status': 'Started', 'http_status': status.HTTP_200_OK}
+
+    @staticmethod
+    def get_progress_status(output: Any, progress: int) -> TaskStatusJSON:
+        """Returns the status data of the given item yielded by an async-generator task, as its `progress`-th."""
+        return {'status': 'Progress', 'http_status': status.HTTP_200_OK, 'output': output, 'progress': progress}
+
+    @staticmethod
+    def get_retry_status(error: Exception, attempt: int, delay: float) -> TaskStatusJSON:
+        """Returns the status data of a task whose `attempt`-th run raised `error`, to be retried after `delay`."""
+        return {'status': 'Retry', 'http_status': status.HTTP_200_OK,
+                'attempt': attempt, 'delay': delay, 'exception-repr': repr(error)}
+
+    @staticmethod
+    def get_cached_status(output: Any) -> TaskStatusJSON:
+        """Returns the status data of a task whose output is taken from its result cache."""
+        return {'status': 'Success', 'http_status': status.HTTP_200_OK, 'output': output, 'cached': True}
+
+    @staticmethod
+    def get_scheduled_status(delay: float) -> TaskStatusJSON:
+        """Returns the status data of a task that will run after `delay` seconds, with its run time."""
+        run_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=delay)
+        return {'status': 'Scheduled', 'http_status': status.HTTP_200_OK, 'run_at': run_at.isoformat()}
+
+    @staticmethod
+    def get_queued_status() -> TaskStatusJSON:
+        """Returns the status data of a task waiting in the task queue."""
+        return {'status': 'Queued', 'http_status': status.HTTP_200_OK}
 
     @staticmethod
     def get_task_status(task: asyncio.Future) -> TaskStatusJSON:
@@ -147,6 +684,13 @@ class TaskRunner:
             task_info['status'] = 'Started'
         elif task.cancelled():
             task_info['status'] = 'Cancelled'
+        elif isinstance(timeout_error := task.exception(), TaskTimeout):
+            task_info.update({'status': 'Timeout',
+                              'elapsed': timeout_error.elapsed,
+                              'exception-repr': repr(timeout_error)})
+        elif isinstance(skipped_error := task.exception(), TaskSkipped):
+            task_info.update({'status': 'Skipped',
+                              'exception-repr': repr(skipped_error)})
         elif task.exception():
             task_info.update({'status': 'Error',
                               'exception-repr': repr(task.exception())})
@@ -34,3 +34,10 @@ async def doctask_deletion_test(instance_ids: list[int]):
         time.sleep(1)
 
     await ModelTask('django_tasks', 'DocTask', delete_doctasks)(instance_ids)
+
+
+async def progress_test(steps: int, interval: float = 0.1):
+    for step in range(1, steps + 1):
+        await asyncio.sleep(interval)
+        logging.getLogger('django').info('Progress test step %s.', step)
+        yield f'Step {step} of {steps}'
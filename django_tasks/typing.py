@@ -1,5 +1,5 @@
 """Module that defines the custom `typing` types of this project, and some type assertion functions."""
-from typing import Any, TypeAlias, TypedDict
+from typing import Any, NotRequired, Optional, TypeAlias, TypedDict
 
 
 #: Union type of all the flat JSON-serializable objects, lacking substructure.
@@ -19,10 +19,21 @@ TaskStatusJSON = TypedDict('TaskStatusJSON', {
     'http_status': int,
     'exception-repr': str,
     'output': JSON,
+    'elapsed': float,
+    'progress': int,
+    'attempt': int,
+    'delay': float,
+    'cached': bool,
+    'run_at': str,
 }, total=False)
 
 #: JSON-serializable type for the content of task events broadcasted by the task runner.
-TaskMessageJSON = TypedDict('TaskMessageJSON', {'task_id': str, 'detail': TaskStatusJSON})
+TaskMessageJSON = TypedDict('TaskMessageJSON', {
+    'task_id': str,
+    'detail': TaskStatusJSON,
+    'created_at': NotRequired[float],
+    'updated_at': NotRequired[float],
+})
 
 #: Type for the web-socket responses.
 WSResponseJSON = TypedDict('WSResponseJSON', {
@@ -35,10 +46,27 @@ WSResponseJSON = TypedDict('WSResponseJSON', {
 CacheClearJSON = TypedDict('CacheClearJSON', {'task_id': str})
 
 #: JSON-serializable type for a single-task schedule request content.
-TaskJSON = TypedDict('TaskJSON', {'registered_task': str, 'inputs': dict[str, JSON]})
+TaskJSON = TypedDict('TaskJSON', {
+    'registered_task': str,
+    'inputs': dict[str, JSON],
+    'priority': NotRequired[int],
+    'timeout': NotRequired[Optional[float]],
+    'depends_on': NotRequired[list[int]],
+    'inputs_from': NotRequired[dict[str, int]],
+    'run_at': NotRequired[Optional[str]],
+})
 
 #: JSON-serializable type for a DocTask schedule request content.
-DocTaskJSON = TypedDict('DocTaskJSON', {'id': int, 'registered_task': str, 'inputs': dict[str, JSON]})
+DocTaskJSON = TypedDict('DocTaskJSON', {
+    'id': int,
+    'registered_task': str,
+    'inputs': dict[str, JSON],
+    'priority': NotRequired[int],
+    'timeout': NotRequired[Optional[float]],
+    'depends_on': NotRequired[list[int]],
+    'inputs_from': NotRequired[dict[str, int]],
+    'run_at': NotRequired[Optional[str]],
+})
 
 
 def is_string_key_dict(value: Any) -> bool:
@@ -12,6 +12,9 @@ from django_tasks.consumers import (
     TaskScheduleWebSocketConsumer,
     DocTaskScheduleWebSocketConsumer,
     CacheClearWebSocketConsumer,
+    TaskCancelHttpConsumer,
+    TaskCancelWebSocketConsumer,
+    MetricsHttpConsumer,
 )
 
 path = django.urls.path
@@ -44,9 +47,16 @@ def get_http_channels_urls():
     if settings.CHANNEL_TASKS.expose_rest_api is True:
         yield path('doctasks/schedule', DocTaskScheduleHttpConsumer.as_asgi())
         yield path('tasks/schedule', TaskScheduleHttpConsumer.as_asgi())
+        yield path('tasks/cancel', TaskCancelHttpConsumer.as_asgi())
+
+
+def get_metrics_urls():
+    if settings.CHANNEL_TASKS.expose_metrics is True:
+        yield path('metrics', MetricsHttpConsumer.as_asgi())
 
 
 def get_websocket_urls():
     yield path('tasks/schedule', TaskScheduleWebSocketConsumer.as_asgi())
     yield path('tasks/schedule-store', DocTaskScheduleWebSocketConsumer.as_asgi())
     yield path('tasks/clear-cache', CacheClearWebSocketConsumer.as_asgi())
+    yield path('tasks/cancel', TaskCancelWebSocketConsumer.as_asgi())
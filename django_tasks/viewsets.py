@@ -23,23 +23,36 @@ class WSDocTaskViewSet(ModelViewSet):
     #: Name of the header to include to authorize against the ASGI application.
     auth_header = 'Authorization'
 
+    #: Name of the header that identifies a schedule request, in order to make it idempotent.
+    request_id_header = 'Request-ID'
+
     #: The :py:class:`django_tasks.websocket.backend_client.BackendWebSocketClient` instance employed by this class.
     ws_client = BackendWebSocketClient()
 
+    def get_ws_headers(self, request: Request) -> dict[str, str]:
+        """
+        Returns the headers of the web-socket request for the given one: the authorization header, and the
+        Request-ID header if given, so that repeated requests are not scheduled twice.
+        """
+        headers = {self.auth_header: request.headers[self.auth_header]}
+
+        if self.request_id_header in request.headers:
+            headers[self.request_id_header] = request.headers[self.request_id_header]
+
+        return headers
+
     def create(self, request: Request, *args, **kwargs):
         """DRF action that schedules a doc-task through local Websocket."""
-        ws_response = self.ws_client.perform_request('schedule-store', [request.data], headers={
-            self.auth_header: request.headers[self.auth_header],
-        })
+        ws_response = self.ws_client.perform_request(
+            'schedule-store', [request.data], headers=self.get_ws_headers(request))
         status = ws_response.pop('http_status')
         return Response(status=HTTP_201_CREATED if status == HTTP_200_OK else status, data=ws_response)
 
     @action(detail=False, methods=['post'])
     def schedule(self, request: Request, *args, **kwargs):
         """DRF action that schedules an array of doc-tasks through local Websocket."""
-        ws_response = self.ws_client.perform_request('schedule-store', request.data, headers={
-            self.auth_header: request.headers[self.auth_header],
-        })
+        ws_response = self.ws_client.perform_request(
+            'schedule-store', request.data, headers=self.get_ws_headers(request))
         status = ws_response.pop('http_status')
         return Response(status=HTTP_201_CREATED if status == HTTP_200_OK else status, data=ws_response)
 
@@ -73,7 +73,7 @@ class BackendWebSocketClient:
                         headers: Optional[dict[str, str]] = None) -> WSResponseJSON:
         header = headers or {}
         header.update(self.default_headers)
-        header['Request-ID'] = uuid.uuid4().hex
+        header.setdefault('Request-ID', uuid.uuid4().hex)
 
         connect_ok, connect_error = self.connect(action, header)
         if not connect_ok:
@@ -0,0 +1,131 @@
+"""
+This module provides the :py:class:`django_tasks.worker_process.TaskWorkerProcess` class, which runs the tasks
+scheduled through the channel layer in a standalone process; see the `run_task_workers` management command.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+
+from typing import Optional
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+from rest_framework import exceptions, status
+
+from django_tasks.durable_queue import DurableTaskQueue
+from django_tasks.scheduler import DocTaskScheduler, schedule_tasks
+from django_tasks.task_runner import TaskRunner
+from django_tasks.typing import JSON
+
+
+class TaskWorkersFull(exceptions.APIException):
+    """Raised when a schedule request cannot be sent to the task workers, as their channel is full."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The task workers are busy, try again later.'
+    default_code = 'task_workers_full'
+
+
+def get_cancel_group(worker_channel: str) -> str:
+    """Returns the name of the channel-layer group through which task cancel requests reach the task workers."""
+    return f'{worker_channel}_cancel'
+
+
+class TaskWorkerProcess:
+    """
+    Consumes the schedule requests sent by the ASGI application to the "task-worker-channel" channel, and runs
+    them in the local :py:class:`django_tasks.task_runner.TaskRunner`, which broadcasts the task events to the
+    same user groups. Each request is received by a single worker, and no more requests are received while the
+    local task queue is full. In durable queue mode, doc-tasks are instead claimed from database, by a
+    :py:class:`django_tasks.durable_queue.DurableTaskQueue`.
+
+    On SIGTERM or SIGINT, stops receiving requests and drains the task runner; see
+    :py:meth:`django_tasks.task_runner.TaskRunner.drain`.
+    """
+
+    def __init__(self, worker_channel: str):
+        self.worker_channel = worker_channel
+        self.channel_layer = get_channel_layer()
+        self.durable_queue = DurableTaskQueue() if settings.CHANNEL_TASKS.durable_task_queue else None
+        self.stopped = asyncio.Event()
+        self.poll_interval = 0.1
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: {self.worker_channel}>'
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    async def run(self) -> None:
+        """Runs until stopped, then drains the task runner."""
+        loop = asyncio.get_running_loop()
+
+        for signal_number in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signal_number, self.stop)
+
+        cancel_channel = await self.channel_layer.new_channel()
+        await self.channel_layer.group_add(get_cancel_group(self.worker_channel), cancel_channel)
+        background_tasks = [asyncio.create_task(self.receive_schedule_requests()),
+                            asyncio.create_task(self.receive_cancel_requests(cancel_channel))]
+        durable_queue_task: Optional[asyncio.Task] = (
+            asyncio.create_task(self.durable_queue.run()) if self.durable_queue else None)
+        logging.getLogger('django').info('Started task worker %s.', self)
+        await self.stopped.wait()
+
+        for background_task in background_tasks:
+            background_task.cancel()
+
+        await self.channel_layer.group_discard(get_cancel_group(self.worker_channel), cancel_channel)
+
+        if self.durable_queue and durable_queue_task:
+            self.durable_queue.stop()
+            await durable_queue_task
+            await self.durable_queue.release_claims(settings.CHANNEL_TASKS.shutdown_grace_period)
+
+        await TaskRunner.get().drain(settings.CHANNEL_TASKS.shutdown_grace_period)
+        logging.getLogger('django').info('Stopped task worker %s.', self)
+
+    async def receive_schedule_requests(self) -> None:
+        runner = TaskRunner.get()
+
+        while True:
+            while runner.task_queue.pending_count >= runner.task_queue.max_pending:
+                await asyncio.sleep(self.poll_interval)
+
+            message = await self.channel_layer.receive(self.worker_channel)
+
+            try:
+                await self.schedule(message)
+            except Exception:
+                logging.getLogger('django').exception('Failed to schedule the request %s.', message)
+
+    async def schedule(self, message: dict[str, JSON]) -> None:
+        """
+        Schedules the tasks of the given schedule request message. If rejected, as when the task queue is full,
+        a `task.rejected` message is broadcasted to the user, as the schedule consumers do.
+        """
+        request_id, user_name, tasks = message['request_id'], message['user_name'], message['tasks']
+        assert isinstance(request_id, str) and isinstance(user_name, str) and isinstance(tasks, list)
+        try:
+            if message['type'] == 'doctask.schedule':
+                await DocTaskScheduler.schedule_doctasks(request_id, user_name, *tasks)  # type: ignore[arg-type]
+            else:
+                await schedule_tasks(request_id, user_name, *tasks)  # type: ignore[arg-type]
+        except exceptions.APIException as error:
+            logging.getLogger('django').warning('Rejected the schedule request %s: %r', request_id, error)
+            full_details = error.get_full_details()
+            await self.channel_layer.group_send(f'{user_name}_{settings.CHANNEL_TASKS.channel_group}', {
+                'type': 'task.rejected',
+                'content': {
+                    'http_status': error.status_code,
+                    'request_id': request_id,
+                    'details': full_details if isinstance(full_details, list) else [full_details],
+                },
+            })
+
+    async def receive_cancel_requests(self, cancel_channel: str) -> None:
+        while True:
+            message = await self.channel_layer.receive(cancel_channel)
+            TaskRunner.get().cancel_tasks(
+                str(message['user_name']), task_id=str(message['task_id']), request_id=str(message['request_id']))
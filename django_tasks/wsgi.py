@@ -7,5 +7,6 @@ application = get_wsgi_application()
 
 RegisteredTask = apps.get_model('django_tasks', 'RegisteredTask')
 RegisteredTask.register(tasks.sleep_test)
+RegisteredTask.register(tasks.progress_test)
 RegisteredTask.register(tasks.doctask_deletion_test)
 RegisteredTask.register(tasks.doctask_access_test)